@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+End-to-end load and latency benchmarks for mcp-bridge.
+
+Starts the local stand-in MCP server (mcp_bridge.mock_server), drives a
+real bridge process over stdio and reports throughput, latency
+percentiles, CPU time and peak RSS of the bridge for each scenario.
+
+Usage:
+    python benchmarks/e2e.py                          # all scenarios
+    python benchmarks/e2e.py --scenario small-calls --quick
+    python benchmarks/e2e.py --output results.json
+    python benchmarks/e2e.py --baseline v0.2.0.json   # fail on regressions
+    python benchmarks/e2e.py --bridge-cmd "mcp-bridge" # benchmark an installed release
+"""
+
+import os
+import sys
+import json
+import time
+import shlex
+import asyncio
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from mcp_bridge import __version__
+from mcp_bridge.harness import BridgeProcess, bridge_command
+from mcp_bridge.stats import percentile
+
+SCENARIOS = {
+    "small-calls": {
+        "description": "Many small sequential tool calls",
+        "calls": 2000, "concurrency": 1,
+        "arguments": {"size": 64},
+    },
+    "small-calls-uds": {
+        "description": "small-calls with the upstream on a Unix domain socket",
+        "calls": 2000, "concurrency": 1,
+        "arguments": {"size": 64},
+        "unix_socket": True,
+    },
+    "small-calls-ws": {
+        "description": "small-calls with a WebSocket upstream",
+        "calls": 2000, "concurrency": 1,
+        "arguments": {"size": 64},
+        "websocket": True,
+    },
+    "large-results": {
+        "description": "4 MiB tool results",
+        "calls": 40, "concurrency": 1,
+        "arguments": {"size": 4 * 1024 * 1024},
+    },
+    "concurrent-burst": {
+        "description": "Bursts of 64 concurrent calls against a 5 ms upstream",
+        "calls": 2000, "concurrency": 64,
+        "arguments": {"size": 256, "latency": 0.005},
+        "config": {"lanes": {"tools": 64}},
+    },
+    "sse-stream": {
+        "description": "50 SSE events per call",
+        "calls": 200, "concurrency": 8,
+        "arguments": {"size": 1024, "events": 50},
+    },
+    "small-beside-large": {
+        "description": "Small calls while 16 MiB results are relayed in the background",
+        "calls": 500, "concurrency": 1,
+        "arguments": {"size": 64},
+        "background": {"arguments": {"size": 16 * 1024 * 1024}, "concurrency": 1},
+    },
+}
+
+
+def process_usage(pid: int) -> Dict[str, Optional[float]]:
+    """CPU seconds and peak RSS of a process, from /proc where available"""
+    usage = {"cpu_s": None, "peak_rss_mb": None}
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        usage["cpu_s"] = round((int(fields[11]) + int(fields[12])) / ticks, 3)
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    usage["peak_rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    return usage
+
+
+async def start_mock_server(env: dict, args: List[str]):
+    server = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "mcp_bridge.mock_server", *args,
+        stdout=asyncio.subprocess.PIPE, env=env,
+    )
+    url = (await server.stdout.readline()).decode().strip()
+    return server, url
+
+
+async def run_scenario(name: str, scenario: dict, bridge_cmd: List[str], scale: float) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server_args = ["--unix-socket", str(Path(tmp) / "mock.sock")] if scenario.get("unix_socket") else []
+        if scenario.get("websocket"):
+            server_args.append("--websocket")
+        server, url = await start_mock_server(env, server_args)
+        config_path = Path(tmp) / "bench.json"
+        config_path.write_text(json.dumps({"url": url, **scenario.get("config", {})}))
+
+        bridge = BridgeProcess(bridge_command(str(config_path), ["--log-level", "quiet"], bridge_cmd), env)
+        await bridge.start()
+        try:
+            await bridge.request("initialize", {
+                "protocolVersion": "2024-11-05", "capabilities": {},
+                "clientInfo": {"name": "mcp-bridge-bench", "version": __version__},
+            })
+            bridge.notify("notifications/initialized")
+
+            calls = max(1, int(scenario["calls"] * scale))
+            semaphore = asyncio.Semaphore(scenario["concurrency"])
+            latencies = []
+            errors = 0
+
+            async def call():
+                nonlocal errors
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await bridge.request("tools/call", {
+                        "name": "payload", "arguments": scenario["arguments"]})
+                    latencies.append(time.perf_counter() - start)
+                    if "error" in response or response.get("result", {}).get("isError"):
+                        errors += 1
+
+            # Unmeasured load running alongside the measured calls
+            done = asyncio.Event()
+            background = scenario.get("background")
+
+            async def background_call():
+                while not done.is_set():
+                    await bridge.request("tools/call", {"name": "payload", "arguments": background["arguments"]})
+
+            if background:
+                # The first large result is slow to build in the mock server
+                await bridge.request("tools/call", {"name": "payload", "arguments": background["arguments"]})
+            background_tasks = [asyncio.ensure_future(background_call())
+                                for _ in range(background["concurrency"] if background else 0)]
+
+            usage_before = process_usage(bridge.process.pid)
+            started = time.perf_counter()
+            await asyncio.gather(*(call() for _ in range(calls)))
+            duration = time.perf_counter() - started
+            usage_after = process_usage(bridge.process.pid)
+            done.set()
+            await asyncio.gather(*background_tasks)
+        finally:
+            await bridge.stop()
+            server.terminate()
+            await server.wait()
+
+    latencies.sort()
+    cpu_s = None
+    if usage_before["cpu_s"] is not None and usage_after["cpu_s"] is not None:
+        cpu_s = round(usage_after["cpu_s"] - usage_before["cpu_s"], 3)
+    return {
+        "description": scenario["description"],
+        "calls": calls,
+        "concurrency": scenario["concurrency"],
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(calls / duration, 1),
+        "stdout_mb_per_s": round(bridge.bytes_out / duration / 1e6, 2),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+        },
+        "cpu_s": cpu_s,
+        "peak_rss_mb": usage_after["peak_rss_mb"],
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> List[str]:
+    """List scenarios whose p95 latency or throughput regressed past the threshold"""
+    regressions = []
+    for name, result in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        p95_change = result["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1
+        rps_change = result["throughput_rps"] / old["throughput_rps"] - 1
+        print(f"  {name}: p95 {p95_change:+.1%}, throughput {rps_change:+.1%}")
+        if p95_change > max_regression or rps_change < -max_regression:
+            regressions.append(name)
+    return regressions
+
+
+def print_result(name: str, result: dict):
+    latency = result["latency_ms"]
+    print(f"{name:18} {result['throughput_rps']:>9.1f} req/s  "
+          f"p50 {latency['p50']:>8.2f}ms  p95 {latency['p95']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms  "
+          f"errors {result['errors']}  cpu {result['cpu_s']}s  rss {result['peak_rss_mb']}MB")
+
+
+async def main_async(args) -> int:
+    bridge_cmd = shlex.split(args.bridge_cmd) if args.bridge_cmd else None
+    names = args.scenario or list(SCENARIOS)
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "scale": args.scale,
+        "scenarios": {},
+    }
+    for name in names:
+        result = await run_scenario(name, SCENARIOS[name], bridge_cmd, args.scale)
+        results["scenarios"][name] = result
+        print_result(name, result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        print(f"Compared with {args.baseline}:")
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        if regressions:
+            print(f"Regressions beyond {args.max_regression:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run (repeatable, default all)")
+    parser.add_argument("--quick", dest="scale", action="store_const", const=0.1, default=1.0,
+                        help="Run 10%% of the calls for a fast smoke check")
+    parser.add_argument("--output", "-o", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed p95/throughput regression vs baseline (default 0.2)")
+    parser.add_argument("--bridge-cmd", help="Bridge command to benchmark (default: this checkout)")
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the bridge's hot paths.
+
+Each benchmark isolates one step of relaying a message, over a range of
+payload sizes, so optimisations can be measured against a baseline.
+
+Requires pytest-benchmark:
+    pytest benchmarks/ --benchmark-only
+    pytest benchmarks/ --benchmark-only --benchmark-save=baseline
+    pytest benchmarks/ --benchmark-only --benchmark-compare
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip("pytest_benchmark")
+
+import httpx
+
+from mcp_bridge.bridge import MCPHTTPBridge, deserialize_stringified_params
+from mcp_bridge.mock_server import make_text, sse_event
+
+SIZES = {"1KiB": 1024, "64KiB": 64 * 1024, "1MiB": 1024 * 1024}
+
+
+def tool_result(msg_id: int, size: int) -> dict:
+    """A tools/call result carrying `size` characters of text"""
+    return {"jsonrpc": "2.0", "id": msg_id,
+            "result": {"content": [{"type": "text", "text": make_text(size)}], "isError": False}}
+
+
+def wide_arguments(keys: int) -> dict:
+    """Arguments mixing stringified objects, arrays, plain strings and numbers"""
+    arguments = {}
+    for i in range(keys):
+        kind = i % 4
+        if kind == 0:
+            arguments[f"filter{i}"] = json.dumps({"field": f"name{i}", "op": "eq", "value": i})
+        elif kind == 1:
+            arguments[f"tags{i}"] = json.dumps([f"tag{j}" for j in range(5)])
+        elif kind == 2:
+            arguments[f"text{i}"] = f"plain value {i}"
+        else:
+            arguments[f"count{i}"] = i
+    return arguments
+
+
+def nested_arguments(depth: int) -> dict:
+    """One stringified argument holding a deeply nested object"""
+    value = {"leaf": list(range(10))}
+    for level in range(depth):
+        value = {f"level{level}": value, "siblings": [{"k": j} for j in range(5)]}
+    return {"query": json.dumps(value), "limit": 50}
+
+
+class NullBridge(MCPHTTPBridge):
+    """Bridge whose upstream replays a fixed SSE body"""
+
+    def __init__(self, body: bytes):
+        self._body = body
+        super().__init__("http://upstream.bench/mcp")
+
+    def _make_client(self, pool_size):
+        def handler(request):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                                  stream=httpx.ByteStream(self._body))
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def devnull_stdout(monkeypatch):
+    """Send stdout frames to /dev/null so the sink costs stay constant"""
+    sink = open(os.devnull, "w")
+    monkeypatch.setattr(sys, "stdout", sink)
+    yield sink
+    sink.close()
+
+
+@pytest.mark.parametrize("keys", [10, 100, 1000])
+def test_deserialize_wide(benchmark, keys):
+    """Parameter repair on wide argument dicts"""
+    arguments = wide_arguments(keys)
+    result = benchmark(deserialize_stringified_params, arguments)
+    assert isinstance(result["filter0"], dict)
+
+
+@pytest.mark.parametrize("depth", [2, 8, 32])
+def test_deserialize_nested(benchmark, depth):
+    """Parameter repair on a deeply nested stringified object"""
+    arguments = nested_arguments(depth)
+    result = benchmark(deserialize_stringified_params, arguments)
+    assert isinstance(result["query"], dict)
+
+
+@pytest.mark.parametrize("size", list(SIZES.values()), ids=list(SIZES))
+def test_json_decode_result(benchmark, size):
+    """Decoding a tool result received from SSE"""
+    data = json.dumps(tool_result(1, size))
+    result = benchmark(json.loads, data)
+    assert result["id"] == 1
+
+
+@pytest.mark.parametrize("size", list(SIZES.values()), ids=list(SIZES))
+def test_json_encode_result(benchmark, size):
+    """Encoding a tool result for stdout"""
+    message = tool_result(1, size)
+    assert benchmark(json.dumps, message)
+
+
+@pytest.mark.parametrize("size", list(SIZES.values()), ids=list(SIZES))
+def test_stdout_framing(benchmark, devnull_stdout, size):
+    """write_message: encode, frame and flush one message"""
+    bridge = NullBridge(b"")
+    message = tool_result(1, size)
+    assert benchmark(bridge.write_message, message)
+    asyncio.run(bridge.close())
+
+
+def test_build_headers(benchmark):
+    """Header construction for a request in an established session"""
+    bridge = NullBridge(b"")
+    bridge.headers = {"Authorization": "Bearer token", "X-Custom-Header": "value"}
+    bridge.session_id = "3f1c2b7a9d8e4f6a"
+    headers = benchmark(bridge.build_headers, "tools/call")
+    assert headers["mcp-session-id"] == bridge.session_id
+    asyncio.run(bridge.close())
+
+
+@pytest.mark.parametrize("events,size", [(1, 1024 * 1024), (100, 1024), (1000, 256)],
+                         ids=["1x1MiB", "100x1KiB", "1000x256B"])
+def test_sse_relay(benchmark, devnull_stdout, events, size):
+    """send_message over a multi-event SSE body: line splitting, decode, stdout"""
+    body = b"".join(sse_event(tool_result(i, size)) for i in range(events))
+    bridge = NullBridge(body)
+    loop = asyncio.new_event_loop()
+    message = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+               "params": {"name": "payload", "arguments": {}}}
+
+    def relay():
+        return loop.run_until_complete(bridge.send_message(dict(message)))
+
+    assert benchmark(relay) is None
+    assert bridge.metrics.sse_events.total() >= events
+    loop.run_until_complete(bridge.close())
+    loop.close()
@@ -5,6 +5,23 @@ MCP Bridge - Universal transport bridge for Model Context Protocol
 __version__ = "0.2.0"
 __author__ = "MCP Bridge Contributors"
 
-from .bridge import MCPHTTPBridge
+__all__ = ["MCPHTTPBridge", "MCPSession", "SessionPool", "MCPError"]
 
-__all__ = ["MCPHTTPBridge"]
+# Public names and the modules that define them
+_EXPORTS = {
+    "MCPHTTPBridge": "bridge",
+    "MCPSession": "client",
+    "SessionPool": "client",
+    "MCPError": "client",
+}
+
+
+def __getattr__(name):
+    # Imported on first access (PEP 562) so the command line entry point
+    # does not load httpx before it needs to
+    if name in _EXPORTS:
+        from importlib import import_module
+        value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,8 @@
+"""
+Allow running the bridge with `python -m mcp_bridge`
+"""
+
+from .shim import main
+
+if __name__ == "__main__":
+    main()
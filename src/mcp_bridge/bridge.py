@@ -4,14 +4,31 @@ Core bridge logic for MCP HTTP/SSE Bridge
 
 import sys
 import json
+import time
 import asyncio
-import httpx
-from typing import Optional
+import functools
+from typing import TYPE_CHECKING, Dict, Optional
+
+from .logs import logger
+from .compression import ByteCounter, Compression, GzipStream, gzip_body
+from .metrics import MetricsExporter, MetricsRegistry
+from .offload import EncodedMessage, Offloader
+from .recording import RECORDED_RESPONSE_HEADERS, Recorder
+from .scheduler import CONTROL, LaneScheduler
+from .upstream import make_transport, parse_upstream_url
+from .transports import CONNECT_TIMEOUT, REQUEST_TIMEOUT, transport_for_url
+from .spool import MessageLimits, MessageTooLargeError, SpooledLine, SpooledMessage, iter_lines, read_line
+
+# httpx and the optional subsystems are imported when first needed, so a
+# bridge starts reading stdin without waiting for them
+if TYPE_CHECKING:
+    import httpx
+    from .diagnostics import Diagnostics
+    from .tracing import MessageTrace, Tracer
 
 def log(message: str):
-    """Log to stderr"""
-    sys.stderr.write(f"[Bridge] {message}\n")
-    sys.stderr.flush()
+    """Log an info-level message (kept for callers of the old stderr helper)"""
+    logger.info(message)
 
 def deserialize_stringified_params(arguments: dict) -> dict:
     """
@@ -35,6 +52,18 @@ def deserialize_stringified_params(arguments: dict) -> dict:
     Returns:
         Corrected arguments dict with deserialized objects/arrays
     """
+    corrected, fixed_params = repair_stringified_params(arguments)
+    if fixed_params:
+        logger.info("Fixed stringified params: %s", ', '.join(fixed_params))
+    return corrected
+
+def repair_stringified_params(arguments: dict):
+    """
+    Deserialize stringified object/array parameters without logging.
+
+    Returns:
+        The corrected arguments and a list of "name:type" for each fixed parameter
+    """
     corrected = {}
     fixed_params = []
 
@@ -57,138 +86,646 @@ def deserialize_stringified_params(arguments: dict) -> dict:
             # Pass through non-string values unchanged
             corrected[key] = value
 
-    if fixed_params:
-        log(f"Fixed stringified params: {', '.join(fixed_params)}")
+    return corrected, fixed_params
 
-    return corrected
+def _import_http_stack():
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        # Reported when the first request needs it
+        pass
+
+def tool_name(message: dict) -> str:
+    """The tool a tools/call message calls ('' for any other message)"""
+    if message.get('method') == 'tools/call' and isinstance(message.get('params'), dict):
+        return str(message['params'].get('name', ''))
+    return ''
+
+class RequestAccounting:
+    """
+    Metrics and log lines for one message sent upstream, whatever the transport.
+
+    Counts the request and its in-flight gauge when created; the transport
+    reports the first byte of the response, a failure, and the end.
+    """
+
+    def __init__(self, metrics: MetricsRegistry, message: dict):
+        self.metrics = metrics
+        self.method = message.get('method', 'unknown')
+        self.tool = tool_name(message)
+        self.msg_id = message.get('id')
+        self.start = time.monotonic()
+        metrics.requests.inc(self.method, self.tool)
+        metrics.in_flight.inc(self.method)
+
+    def first_byte(self, at: float):
+        """The response started arriving at `at` (time.monotonic())"""
+        self.metrics.ttfb.observe(self.method, self.tool, value=at - self.start)
+
+    def failed(self, error: Exception):
+        self.metrics.errors.inc(self.method, self.tool)
+        logger.error("Error: %s", error, extra={"request_id": self.msg_id, "method": self.method})
+        logger.debug("Traceback:", exc_info=True)
+
+    def finish(self):
+        elapsed = time.monotonic() - self.start
+        self.metrics.in_flight.dec(self.method)
+        self.metrics.latency.observe(self.method, self.tool, value=elapsed)
+        logger.debug("Completed %s (id=%s) in %.1fms", self.method, self.msg_id, elapsed * 1000,
+                     extra={"request_id": self.msg_id, "method": self.method,
+                            "duration_ms": round(elapsed * 1000, 3)})
+
+def _id_key(msg_id) -> str:
+    """Dictionary key for a JSON-RPC id, keeping 1 and "1" apart"""
+    return json.dumps(msg_id)
+
+def _text(line) -> str:
+    """A stdin line as text (stdin is read as bytes unless it has no binary buffer)"""
+    return line if isinstance(line, str) else line.decode("utf-8", "replace")
 
 class MCPHTTPBridge:
-    def __init__(self, url: str, headers: Optional[dict] = None):
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        lanes: Optional[dict] = None,
+        adaptive_concurrency=None,
+        metrics: Optional[dict] = None,
+        tracer: Optional["Tracer"] = None,
+        recorder: Optional[Recorder] = None,
+        offload=True,
+        message_limits: Optional[dict] = None,
+        compression=None,
+        http_path: Optional[str] = None,
+        diagnostics=None
+    ):
         self.url = url
+        # unix:// upstreams are requested as http://localhost/... over the socket
+        self.request_url, self.uds = parse_upstream_url(url, http_path)
         self.headers = headers or {}
-        self.client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+        self.scheduler = LaneScheduler(self._make_client, lanes)
+        self.limiter = None
+        if adaptive_concurrency:
+            from .limiter import AdaptiveLimiter
+            # The limiter covers every lane but control
+            capacity = sum(lane.limit for lane in self.scheduler.lanes.values() if lane.name != CONTROL)
+            self.limiter = AdaptiveLimiter.from_config(adaptive_concurrency, capacity)
+        self.metrics = MetricsRegistry()
+        self.exporter = None
+        if metrics not in (None, False):
+            self.exporter = MetricsExporter(self.metrics, {} if metrics is True else metrics)
+        self.tracer = tracer
+        self.recorder = recorder
+        self.offloader = Offloader.from_config(offload)
+        self.limits = MessageLimits.from_config(message_limits)
+        self.compression = Compression.from_config(compression)
+        self.transport = transport_for_url(url)(self)
+        self.diagnostics: Optional["Diagnostics"] = None
+        if diagnostics not in (None, False):
+            from .diagnostics import Diagnostics
+            self.diagnostics = Diagnostics.from_config(self, diagnostics)
         self.session_id = None
-        
-    async def send_message(self, message: dict):
-        """Send a message and read SSE response"""
+        # Task -> (id, method, start) of each message being dispatched
+        self.in_flight: Dict[asyncio.Task, tuple] = {}
+        # Id key -> cancelled flag of stdin requests waiting for a lane or the limiter
+        self.queued: Dict[str, bool] = {}
+        self._tasks = set()
+
+    def _make_client(self, pool_size: int) -> "httpx.AsyncClient":
+        """Create an HTTP client with its own connection pool"""
+        import httpx
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=limits,
+            transport=make_transport(self.uds, limits)
+        )
+
+    def write_message(self, message: dict, trace: Optional["MessageTrace"] = None) -> bool:
+        """Write a JSON-RPC message to stdout. Returns False if stdout is gone."""
+        return self.write_line(json.dumps(message), trace)
+
+    def write_line(self, line: str, trace: Optional["MessageTrace"] = None) -> bool:
+        """Write an already encoded JSON-RPC message to stdout"""
+        start = time.monotonic()
+        try:
+            sys.stdout.write(line + '\n')
+            sys.stdout.flush()
+            if self.recorder:
+                self.recorder.record_encoded("stdout", "message", line)
+            return True
+        except BrokenPipeError:
+            logger.warning("Stdout broken")
+            return False
+        finally:
+            if trace:
+                trace.add("stdout.write", start, time.monotonic())
+
+    def write_spooled(self, line: SpooledLine, offset: int, trace: Optional["MessageTrace"] = None) -> bool:
+        """Copy a spooled JSON-RPC message to stdout in chunks"""
+        start = time.monotonic()
+        try:
+            sys.stdout.flush()
+            out = getattr(sys.stdout, "buffer", None)
+            if out is None:
+                import codecs
+                decoder = codecs.getincrementaldecoder("utf-8")("replace")
+                for chunk in line.chunks(offset):
+                    sys.stdout.write(decoder.decode(chunk))
+                sys.stdout.write(decoder.decode(b"", final=True) + '\n')
+                sys.stdout.flush()
+            else:
+                for chunk in line.chunks(offset):
+                    out.write(chunk)
+                out.write(b'\n')
+                out.flush()
+            if self.recorder:
+                self.recorder.record_file("stdout", "message", line.chunks(offset))
+            return True
+        except BrokenPipeError:
+            logger.warning("Stdout broken")
+            return False
+        finally:
+            if trace:
+                trace.add("stdout.write", start, time.monotonic(), bytes=line.size - offset)
+
+    def write_error(self, message: dict, code: int, error_message: str,
+                    trace: Optional["MessageTrace"] = None):
+        """Write a JSON-RPC error response for a request"""
+        error_response = {
+            "jsonrpc": "2.0",
+            "id": message.get("id"),
+            "error": {"code": code, "message": error_message}
+        }
+        self.write_message(error_response, trace)
+
+    def build_headers(self, method: str) -> dict:
+        """Build the HTTP headers for an upstream request"""
+        headers = {
+            **self.headers,
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream, application/json",
+            "Accept-Encoding": self.compression.accept_encoding
+        }
+
+        # Add session ID header for non-initialize requests
+        if self.session_id and method != "initialize":
+            headers["mcp-session-id"] = self.session_id
+
+        return headers
+
+    async def dispatch(self, message: dict, trace: Optional["MessageTrace"] = None):
+        """Send a message through its priority lane"""
+        if trace is None and self.tracer:
+            trace = self.tracer.begin(message)
+        task = asyncio.current_task()
+        self.in_flight[task] = (message.get('id'), message.get('method'), time.monotonic())
+        try:
+            await self._dispatch(message, trace)
+        finally:
+            self.in_flight.pop(task, None)
+            if trace:
+                trace.finish()
+
+    async def _dispatch(self, message: dict, trace: Optional["MessageTrace"]):
+        lane = self.scheduler.lane_for(message)
+
+        # Control traffic is never held back by the adaptive limiter
+        if self.limiter is None or lane.name == CONTROL:
+            await self._send_in_lane(message, lane, trace)
+            return
+
+        from .limiter import QueueFullError, is_overload
+
+        wait_start = time.monotonic()
+        try:
+            await self.limiter.acquire()
+        except QueueFullError as e:
+            self._unqueue(message)
+            logger.warning("Rejected %s (id=%s): %s", message.get('method'), message.get('id'), e,
+                           extra={"request_id": message.get('id'), "method": message.get('method')})
+            if "id" in message:
+                self.write_error(message, -32000, str(e), trace)
+            return
+        if trace:
+            trace.add("limiter.wait", wait_start, time.monotonic(), limit=self.limiter.current_limit)
+
+        latency = None
+        error = None
+        try:
+            error, latency = await self._send_in_lane(message, lane, trace)
+        finally:
+            self.limiter.release(latency if error is None else None, overloaded=is_overload(error),
+                                 key=(message.get('method'), tool_name(message)))
+
+    async def _send_in_lane(self, message: dict, lane, trace: Optional["MessageTrace"]):
+        """
+        Wait for a slot in the lane, then send.
+
+        Returns:
+            The exception that failed the request (or None), and the seconds
+            from getting the lane slot to the end of the response. Time
+            queued for the lane is left out so the limiter does not mistake
+            its own queue for a slow upstream.
+        """
+        wait_start = time.monotonic()
+        async with lane:
+            start = time.monotonic()
+            if trace:
+                trace.add("lane.wait", wait_start, start, lane=lane.name)
+            if self._unqueue(message):
+                # The server never saw it, so neither the request nor its
+                # cancellation goes out, and the client expects no response
+                logger.info("Dropped %s (id=%s), cancelled while queued", message.get('method'), message.get('id'),
+                            extra={"request_id": message.get('id'), "method": message.get('method')})
+                return None, None
+            error = await self.transport.send(message, lane, trace)
+            return error, time.monotonic() - start
+
+    def _enqueue(self, message: dict):
+        """Track a stdin request until it leaves the queues, so it can be cancelled there"""
+        if "id" in message and "method" in message:
+            self.queued[_id_key(message["id"])] = False
+
+    def _unqueue(self, message: dict) -> bool:
+        """Stop tracking a queued request; True if it was cancelled meanwhile"""
+        if "id" in message and "method" in message:
+            return self.queued.pop(_id_key(message["id"]), False)
+        return False
+
+    def _cancel_queued(self, message: dict) -> bool:
+        """Mark the request a cancellation names as cancelled if it is still queued"""
+        params = message.get('params')
+        if not isinstance(params, dict):
+            return False
+        key = _id_key(params.get('requestId'))
+        if key not in self.queued:
+            return False
+        self.queued[key] = True
+        return True
+
+    def repair_params(self, message: dict, trace: Optional["MessageTrace"] = None):
+        """Fix stringified tools/call parameters in place (workaround for Claude Desktop bug)"""
+        # For tools/call, the arguments are nested in params.arguments
+        if message.get('method') == 'tools/call' and 'params' in message and 'arguments' in message['params']:
+            repair_start = time.monotonic()
+            original_args = message['params']['arguments']
+            fixed_args = deserialize_stringified_params(original_args)
+            if fixed_args != original_args:
+                message['params']['arguments'] = fixed_args
+            if trace:
+                trace.add("param_repair", repair_start, time.monotonic(),
+                          changed=fixed_args != original_args)
+
+    def _spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until done"""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def start_request(self, message: dict) -> RequestAccounting:
+        """Start the metrics and logging of a message sent upstream (every transport calls this)"""
+        return RequestAccounting(self.metrics, message)
+
+    async def send_message(
+        self,
+        message: dict,
+        client: Optional["httpx.AsyncClient"] = None,
+        trace: Optional["MessageTrace"] = None
+    ):
+        """
+        Send a message and read SSE response.
+
+        Returns:
+            The exception that failed the request, or None on success
+        """
+        if client is None:
+            client = self.scheduler.lane_for(message).client
+
+        accounting = self.start_request(message)
+        method = accounting.method
+        metrics = self.metrics
+        recorder = self.recorder
+        seq = recorder.next_seq() if recorder else None
+
         try:
-            method = message.get('method', 'unknown')
             msg_id = message.get('id')
 
-            # Fix stringified parameters (workaround for Claude Desktop bug)
-            # For tools/call, the arguments are nested in params.arguments
-            if method == 'tools/call' and 'params' in message and 'arguments' in message['params']:
-                original_args = message['params']['arguments']
-                fixed_args = deserialize_stringified_params(original_args)
-                if fixed_args != original_args:
-                    message['params']['arguments'] = fixed_args
+            # Large messages were repaired and encoded in the offload pool;
+            # spooled ones are streamed from their temporary file unrepaired
+            body = message.body if isinstance(message, EncodedMessage) else None
+            spooled = message.line if isinstance(message, SpooledMessage) else None
 
-            log(f"Sending: {method} (id={msg_id})")
-            
-            # Build headers
-            headers = {
-                **self.headers,
-                "Content-Type": "application/json",
-                "Accept": "text/event-stream, application/json"
-            }
-            
-            # Add session ID header for non-initialize requests
-            if self.session_id and method != "initialize":
-                headers["mcp-session-id"] = self.session_id
+            if body is None and spooled is None:
+                self.repair_params(message, trace)
+
+            logger.debug("Sending: %s (id=%s)", method, msg_id,
+                         extra={"request_id": msg_id, "method": method})
             
+            headers = self.build_headers(method)
+            gzipped = None
+            if spooled is not None:
+                body = spooled.aiter_chunks()
+                if self.compression.should_compress(spooled.size):
+                    body = gzipped = GzipStream(body, self.compression.level)
+                    headers["Content-Encoding"] = "gzip"
+                else:
+                    headers["Content-Length"] = str(spooled.size)
+
             # Send request with streaming
-            request = self.client.build_request(
+            request = client.build_request(
                 "POST",
-                self.url,
-                json=message,
-                headers=headers
+                self.request_url,
+                json=message if body is None else None,
+                content=body,
+                headers=headers,
+                extensions={"trace": trace.httpx_trace} if trace else None
             )
+            raw_size = spooled.size if spooled is not None else len(request.content)
+            if recorder:
+                if spooled is not None:
+                    recorder.record_file("request", "body", spooled.chunks(), seq=seq, method=method, id=msg_id)
+                else:
+                    recorder.record_encoded("request", "body", request.content.decode(),
+                                            seq=seq, method=method, id=msg_id)
+
+            if spooled is None and self.compression.should_compress(raw_size):
+                compress_start = time.monotonic()
+                compressed = await self._gzip(request.content)
+                headers["Content-Encoding"] = "gzip"
+                request = client.build_request("POST", self.request_url, content=compressed, headers=headers,
+                                               extensions=request.extensions)
+                if trace:
+                    trace.add("request.gzip", compress_start, time.monotonic(),
+                              bytes=raw_size, compressed=len(compressed))
             
-            response = await self.client.send(request, stream=True)
-            response.raise_for_status()
-            
-            # For initialize, extract session ID
-            if method == "initialize":
-                self.session_id = response.headers.get("mcp-session-id")
-                if self.session_id:
-                    log(f"Session ID: {self.session_id}")
-            
-            # Read SSE response from this request
-            content_type = response.headers.get("content-type", "")
-            if "text/event-stream" in content_type:
-                log(f"Reading SSE response...")
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:].strip()
-                        if data:
-                            try:
-                                sse_message = json.loads(data)
-                                log(f"Received SSE: id={sse_message.get('id')}")
-                                
-                                # Write to stdout
-                                try:
-                                    sys.stdout.write(json.dumps(sse_message) + '\n')
-                                    sys.stdout.flush()
-                                except BrokenPipeError:
-                                    log("Stdout broken")
-                                    return
-                                    
-                            except json.JSONDecodeError as e:
-                                log(f"Invalid JSON in SSE: {e}")
+            send_start = time.monotonic()
+            if trace:
+                trace.request_started(send_start)
+            response = await client.send(request, stream=True)
+            # The body has been sent in full by the time headers arrive
+            if gzipped is not None:
+                request_size = gzipped.sent_bytes
             else:
-                log(f"Unexpected content type: {content_type}")
-                
+                request_size = raw_size if spooled is not None else len(request.content)
+            metrics.bytes_sent.inc(amount=request_size)
+            if request_size < raw_size:
+                metrics.compression_saved.inc("request", amount=raw_size - request_size)
+            headers_received = time.monotonic()
+            accounting.first_byte(headers_received)
+            if trace:
+                trace.add("upstream.ttfb", send_start, headers_received,
+                          status=response.status_code, bytes=request_size)
+            if recorder:
+                recorder.record("response", at=headers_received, seq=seq, status=response.status_code,
+                                headers={name: response.headers[name] for name in RECORDED_RESPONSE_HEADERS
+                                         if name in response.headers})
+            counter = None
+            try:
+                response.raise_for_status()
+
+                # For initialize, extract session ID
+                if method == "initialize":
+                    self.session_id = response.headers.get("mcp-session-id")
+                    if self.session_id:
+                        logger.info("Session ID: %s", self.session_id)
+
+                # Read SSE response from this request; compressed responses
+                # are decoded as they stream and their decoded size counted
+                decoded = response.aiter_bytes()
+                if response.headers.get("content-encoding", "identity") != "identity":
+                    decoded = counter = ByteCounter(decoded)
+                content_type = response.headers.get("content-type", "")
+                if "text/event-stream" in content_type:
+                    logger.debug("Reading SSE response...", extra={"request_id": msg_id})
+                    async for line in iter_lines(decoded, self.limits):
+                        if isinstance(line, SpooledLine):
+                            if not self._relay_spooled_event(line, msg_id, seq, trace):
+                                return
+                            continue
+                        if line.startswith(b"data: "):
+                            data = line[6:].strip()
+                            if data:
+                                if recorder:
+                                    recorder.record("sse", seq=seq, data=data.decode("utf-8", "replace"))
+                                if self.offloader and self.offloader.should_offload(len(data)):
+                                    if not await self._relay_large_event(data, msg_id, trace):
+                                        return
+                                    continue
+                                try:
+                                    decode_start = time.monotonic()
+                                    sse_message = json.loads(data)
+                                    if trace:
+                                        trace.add("sse.event", decode_start, time.monotonic(),
+                                                  bytes=len(data), id=sse_message.get('id'))
+                                    logger.debug("Received SSE: id=%s", sse_message.get('id'),
+                                                 extra={"request_id": msg_id})
+                                    metrics.sse_events.inc()
+
+                                    # Write to stdout
+                                    if not self.write_message(sse_message, trace):
+                                        return
+
+                                except ValueError as e:
+                                    logger.warning("Invalid JSON in SSE: %s", e, extra={"request_id": msg_id})
+                else:
+                    logger.debug("Unexpected content type: %s", content_type, extra={"request_id": msg_id})
+            finally:
+                await response.aclose()
+                metrics.bytes_received.inc(amount=response.num_bytes_downloaded)
+                if counter is not None and counter.bytes > response.num_bytes_downloaded:
+                    metrics.compression_saved.inc("response", amount=counter.bytes - response.num_bytes_downloaded)
+                if recorder:
+                    recorder.record("end", seq=seq)
+                if trace:
+                    trace.add("upstream.stream", headers_received, time.monotonic(),
+                              bytes=response.num_bytes_downloaded)
+
         except Exception as e:
-            log(f"Error: {e}")
-            import traceback
-            log(f"Traceback: {traceback.format_exc()}")
+            if recorder:
+                recorder.record("error", seq=seq, error=str(e), type=type(e).__name__)
+            accounting.failed(e)
             
             # Send error response
-            error_response = {
-                "jsonrpc": "2.0",
-                "id": message.get("id"),
-                "error": {"code": -32603, "message": str(e)}
-            }
-            try:
-                sys.stdout.write(json.dumps(error_response) + '\n')
-                sys.stdout.flush()
-            except:
-                pass
+            self.write_error(message, -32603, str(e), trace)
+            return e
+
+        finally:
+            accounting.finish()
     
+    async def _gzip(self, body: bytes) -> bytes:
+        """gzip a request body, in the offload pool if it is large"""
+        if self.offloader and self.offloader.should_offload(len(body)):
+            return await self.offloader.run(functools.partial(gzip_body, level=self.compression.level), body)
+        return gzip_body(body, self.compression.level)
+
+    async def _relay_large_event(self, data: bytes, msg_id, trace: Optional["MessageTrace"]) -> bool:
+        """Decode and re-encode a large SSE event off the event loop, then write it"""
+        decode_start = time.monotonic()
+        try:
+            event_id, line = await self.offloader.relay_event(data)
+        except ValueError as e:
+            logger.warning("Invalid JSON in SSE: %s", e, extra={"request_id": msg_id})
+            return True
+        if trace:
+            trace.add("sse.event", decode_start, time.monotonic(), bytes=len(data), id=event_id, offloaded=True)
+        logger.debug("Received SSE: id=%s (%d bytes, offloaded)", event_id, len(data),
+                     extra={"request_id": msg_id})
+        self.metrics.sse_events.inc()
+        self.metrics.offloaded.inc("sse")
+        return self.write_line(line, trace)
+
+    def _relay_spooled_event(self, line: SpooledLine, msg_id, seq: Optional[int],
+                             trace: Optional["MessageTrace"]) -> bool:
+        """Copy an SSE event over the spill threshold to stdout without decoding it"""
+        try:
+            head = line.read_at(0, 1024)
+            if not head.startswith(b"data: "):
+                return True
+            # Past "data: " and any further leading whitespace
+            offset = len(head) - len(head[6:].lstrip())
+            if self.recorder:
+                self.recorder.record_file("sse", "message", line.chunks(offset), seq=seq)
+            if trace:
+                now = time.monotonic()
+                trace.add("sse.event", now, now, bytes=line.size - offset, spilled=True)
+            logger.debug("Received SSE: %d bytes, spooled", line.size - offset, extra={"request_id": msg_id})
+            self.metrics.sse_events.inc()
+            self.metrics.spilled.inc("sse")
+            return self.write_spooled(line, offset, trace)
+        finally:
+            line.close()
+
+    async def _dispatch_spooled(self, line: SpooledLine, read_done: float):
+        """Dispatch a stdin message over the spill threshold straight from its temporary file"""
+        message = SpooledMessage(line)
+        try:
+            self.metrics.spilled.inc("stdin")
+            logger.debug("Spooled %s (id=%s): %d bytes", message.get('method'), message.get('id'), line.size,
+                         extra={"request_id": message.get('id'), "method": message.get('method')})
+            if self.recorder:
+                self.recorder.record_file("stdin", "message", line.chunks(), at=read_done)
+            trace = None
+            if self.tracer:
+                trace = self.tracer.begin(message, start=read_done)
+                trace.add("stdin.parse", read_done, time.monotonic(), bytes=line.size, spilled=True)
+            await self.dispatch(message, trace)
+        finally:
+            line.close()
+
+    async def _dispatch_large(self, line: bytes, read_done: float):
+        """Decode a large stdin message off the event loop, then dispatch it"""
+        try:
+            message = await self.offloader.prepare_request(line)
+        except ValueError as e:
+            logger.warning("Invalid JSON from stdin: %s", e)
+            return
+        self.metrics.offloaded.inc("stdin")
+        if self.recorder:
+            self.recorder.record_encoded("stdin", "message", _text(line), at=read_done)
+        trace = None
+        if self.tracer:
+            trace = self.tracer.begin(message, start=read_done)
+            trace.add("stdin.parse", read_done, time.monotonic(), bytes=len(line), offloaded=True)
+        await self.dispatch(message, trace)
+
     async def read_stdin(self):
         """Read messages from stdin"""
         loop = asyncio.get_event_loop()
+        # Bytes, so oversized lines can be spooled without decoding them
+        stdin = getattr(sys.stdin, "buffer", sys.stdin)
         
         while True:
             try:
                 # Read line from stdin
-                line = await loop.run_in_executor(None, sys.stdin.readline)
+                line = await loop.run_in_executor(None, read_line, stdin, self.limits)
+                read_done = time.monotonic()
+
+                if isinstance(line, SpooledLine):
+                    self._spawn(self._dispatch_spooled(line, read_done))
+                    continue
                 
                 if not line:
-                    log("stdin closed")
+                    logger.info("stdin closed")
                     break
                 
                 line = line.strip()
                 if not line:
                     continue
+
+                if self.offloader and self.offloader.should_offload(len(line)):
+                    self._spawn(self._dispatch_large(line, read_done))
+                    continue
                 
-                # Parse and send message
+                # Parse and dispatch message. The handshake (initialize and
+                # notifications/initialized) is awaited so the session ID is
+                # known and the server initialized before anything else goes
+                # out; other messages run concurrently in their priority lane.
                 message = json.loads(line)
-                await self.send_message(message)
+                if self.recorder:
+                    self.recorder.record_encoded("stdin", "message",
+                                                 _text(line), at=read_done)
+                trace = None
+                if self.tracer:
+                    trace = self.tracer.begin(message, start=read_done)
+                    trace.add("stdin.parse", read_done, time.monotonic(), bytes=len(line))
+                method = message.get('method')
+                if method in ('initialize', 'notifications/initialized'):
+                    await self.dispatch(message, trace)
+                elif method == 'notifications/cancelled' and self._cancel_queued(message):
+                    # The request is dropped before it is sent
+                    if trace:
+                        trace.finish()
+                else:
+                    self._enqueue(message)
+                    self._spawn(self.dispatch(message, trace))
                 
-            except json.JSONDecodeError as e:
-                log(f"Invalid JSON from stdin: {e}")
+            except MessageTooLargeError as e:
+                envelope = e.envelope
+                logger.warning("Rejected %s (id=%s) from stdin: %s", envelope.get('method'), envelope.get('id'), e,
+                               extra={"request_id": envelope.get('id'), "method": envelope.get('method')})
+                # Requests get an error; notifications and responses are dropped
+                if "id" in envelope and "method" in envelope:
+                    self.write_error(envelope, -32600, str(e))
+            except ValueError as e:
+                # Invalid JSON, or bytes that are not UTF-8
+                logger.warning("Invalid JSON from stdin: %s", e)
             except Exception as e:
-                log(f"Error reading stdin: {e}")
-                import traceback
-                log(f"Traceback: {traceback.format_exc()}")
+                logger.error("Error reading stdin: %s", e)
+                logger.debug("Traceback:", exc_info=True)
                 break
     
     async def run(self):
         """Run the bridge"""
-        log(f"Bridge ready. Target URL: {self.url}")
+        logger.info("Bridge ready. Target URL: %s", self.url)
+        # Import the HTTP stack on a worker thread while waiting for the
+        # client's first message
+        asyncio.get_event_loop().run_in_executor(None, _import_http_stack)
+        if self.exporter:
+            await self.exporter.start()
+        if self.diagnostics:
+            self.diagnostics.install()
         await self.read_stdin()
-    
+        await self.drain()
+
+    async def drain(self):
+        """Wait for in-flight messages to finish"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
     async def close(self):
         """Close connections"""
-        await self.client.aclose()
+        if self.diagnostics:
+            self.diagnostics.uninstall()
+        if self.exporter:
+            await self.exporter.stop()
+            self.exporter.log_summary()
+        if self.tracer:
+            self.tracer.close()
+        if self.recorder:
+            self.recorder.close()
+        if self.offloader:
+            self.offloader.close()
+        await self.transport.aclose()
+        await self.scheduler.aclose()
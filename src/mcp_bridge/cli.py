@@ -6,95 +6,28 @@ import sys
 import json
 import asyncio
 from pathlib import Path
-from typing import Optional
 import click
 
-from .bridge import MCPHTTPBridge, log
-
-def find_config_path(config_name: Optional[str] = None) -> Path:
-    """
-    Find configuration file in order of precedence:
-    1. Explicit path (if provided and exists)
-    2. ~/.config/mcp-bridge/<config_name or config.json>
-    3. Current directory config.json (for backward compat)
-    4. Old location: mcp_http_bridge/config.json (deprecated)
-    """
-    
-    # 1. Explicit path provided
-    if config_name:
-        explicit_path = Path(config_name)
-        if explicit_path.is_absolute() and explicit_path.exists():
-            return explicit_path
-    
-    # 2. Check user config directory
-    config_dir = Path.home() / ".config" / "mcp-bridge"
-    if config_name:
-        # Look for named config in config directory
-        config_path = config_dir / config_name
-        if config_path.exists():
-            return config_path
-        # Also try with .json extension if not provided
-        if not config_name.endswith('.json'):
-            config_path = config_dir / f"{config_name}.json"
-            if config_path.exists():
-                return config_path
-    else:
-        # Look for default config.json
-        default_config = config_dir / "config.json"
-        if default_config.exists():
-            return default_config
-    
-    # 3. Check current directory (backward compat)
-    local_config = Path("config.json")
-    if local_config.exists():
-        log("Warning: Using config.json from current directory (deprecated)")
-        log(f"         Please move to {config_dir}/config.json")
-        return local_config
-    
-    # 4. Check old location (deprecated)
-    old_location = Path("mcp_http_bridge") / "config.json"
-    if old_location.exists():
-        log("Warning: Using config from mcp_http_bridge/config.json (deprecated)")
-        log(f"         Please move to {config_dir}/config.json")
-        return old_location
-    
-    # Not found - show helpful error
-    search_locations = [
-        str(config_dir),
-        str(local_config.absolute()),
-        str(old_location.absolute())
-    ]
-    raise FileNotFoundError(
-        f"Config file not found. Searched:\n" + 
-        "\n".join(f"  - {loc}" for loc in search_locations) +
-        f"\n\nCreate a config file with:\n  mcp-bridge init"
-    )
-
-def load_config(config_path: Path) -> dict:
-    """Load and validate configuration file"""
-    try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-        
-        if 'url' not in config:
-            log("Error: 'url' is required in config file")
-            sys.exit(1)
-        
-        log(f"Loaded config from {config_path}")
-        return config
-    
-    except json.JSONDecodeError as e:
-        log(f"Error: Invalid JSON in config file: {e}")
-        sys.exit(1)
-    except Exception as e:
-        log(f"Error loading config: {e}")
-        sys.exit(1)
+from .logs import LEVELS, configure_logging, stop_logging
+from .recording import Recording
+# Re-exported: these lived here before the click-free run path was split out
+from .runner import find_config_path, load_config, run, run_bridge
 
 @click.group(invoke_without_command=True)
 @click.option('--config', '-c', default=None, help='Path to config file')
 @click.option('--version', is_flag=True, help='Show version')
+@click.option('--trace', 'trace_path', default=None, type=click.Path(dir_okay=False),
+              help='Write a per-message timeline trace to this file')
+@click.option('--trace-format', type=click.Choice(['chrome', 'otlp']), default='chrome',
+              show_default=True, help='Trace file format')
+@click.option('--record', 'record_path', default=None, type=click.Path(dir_okay=False),
+              help='Capture all traffic to this file for mcp-bridge replay')
+@click.option('--log-level', type=click.Choice(list(LEVELS)), default='info', show_default=True,
+              help='quiet: warnings and errors only; debug: every message and SSE event')
+@click.option('--log-format', type=click.Choice(['text', 'json']), default='text', show_default=True,
+              help='stderr log format')
 @click.pass_context
-def cli(ctx, config, version):
+def cli(ctx, config, version, trace_path, trace_format, record_path, log_level, log_format):
     """MCP Bridge - Connect stdio MCP clients to HTTP/SSE servers"""
     
     if version:
@@ -102,9 +35,13 @@ def cli(ctx, config, version):
         click.echo(f"mcp-bridge version {__version__}")
         return
     
+    # Every subcommand logs through the same handler and level
+    configure_logging(log_level, log_format)
+    ctx.call_on_close(stop_logging)
+    
     if ctx.invoked_subcommand is None:
         # Run the bridge
-        asyncio.run(run_bridge(config))
+        asyncio.run(run_bridge(config, trace_path, trace_format, record_path))
 
 @cli.command()
 @click.option('--name', '-n', default=None, help='Config file name')
@@ -174,29 +111,143 @@ def list_configs():
     
     click.echo(f"\nUse with: mcp-bridge --config <name>")
 
-async def run_bridge(config_name: Optional[str]):
-    """Run the bridge with specified config"""
+@cli.command()
+@click.argument('config_name', required=False)
+@click.option('--sessions', '-s', type=int, default=1, show_default=True, help='Concurrent MCP sessions')
+@click.option('--concurrency', '-n', type=int, default=None,
+              help='Requests in flight, closed loop (default: one per session)')
+@click.option('--rate', '-r', type=float, default=None, help='Target requests per second, open loop')
+@click.option('--duration', '-d', type=float, default=None, help='Seconds to run (default: 10)')
+@click.option('--requests', type=int, default=None, help='Stop after this many requests')
+@click.option('--tool', '-t', default=None, help='Tool to call in the mix (default: tools/list only)')
+@click.option('--arguments', '-a', default='{}', help='JSON arguments for --tool')
+@click.option('--list-weight', type=float, default=1, show_default=True, help='Relative weight of tools/list')
+@click.option('--call-weight', type=float, default=4, show_default=True, help='Relative weight of tools/call')
+@click.option('--script', default=None, type=click.Path(exists=True, dir_okay=False),
+              help='JSON list of {"method", "params", "weight"} steps instead of the tools/list/tools/call mix')
+@click.option('--timeout', type=float, default=30.0, show_default=True, help='Per-request timeout in seconds')
+@click.option('--seed', type=int, default=None, help='Seed for the request mix')
+@click.option('--output', '-o', default=None, type=click.Path(dir_okay=False), help='Write the report as JSON')
+@click.pass_context
+def bench(ctx, config_name, sessions, concurrency, rate, duration, requests, tool, arguments,
+          list_weight, call_weight, script, timeout, seed, output):
+    """Load test the server in a config (default: the --config or default config)"""
+    from .loadgen import Workload, format_report, run_bench
+    
+    if duration is None and requests is None:
+        duration = 10.0
+    try:
+        config = load_config(find_config_path(config_name or ctx.parent.params.get('config')))
+        if script:
+            workload = Workload.from_file(script, seed)
+        else:
+            workload = Workload.from_options(tool, json.loads(arguments), list_weight, call_weight, seed)
+        report = asyncio.run(run_bench(
+            config['url'], config.get('headers', {}), workload,
+            sessions=sessions, concurrency=concurrency or sessions, rate=rate,
+            duration=duration, requests=requests, timeout=timeout, http_path=config.get('http_path')
+        ))
+    except FileNotFoundError as e:
+        click.echo(str(e), err=True)
+        sys.exit(1)
+    except ValueError as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"❌ Benchmark failed: {e}", err=True)
+        sys.exit(1)
+    
+    click.echo(format_report(report))
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        click.echo(f"\nReport written to {output}")
+
+@cli.command()
+@click.argument('recording', type=click.Path(exists=True, dir_okay=False))
+@click.option('--speed', type=float, default=1.0, show_default=True,
+              help='Replay speed multiplier (2 = twice as fast, 0 = no pacing)')
+@click.option('--upstream-speed', type=float, default=None,
+              help='Speed multiplier for recorded upstream latency (default: --speed)')
+@click.option('--serve', is_flag=True, help='Only act as the upstream, serving the recorded responses')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Listen address with --serve')
+@click.option('--port', type=int, default=0, help='Listen port with --serve (default: any free port)')
+@click.option('--bridge-config', default=None,
+              help='Config whose settings (other than url) the replayed bridge uses')
+@click.option('--bridge-cmd', default=None, help='Bridge command to replay through (default: this installation)')
+@click.option('--output', '-o', default=None, type=click.Path(dir_okay=False),
+              help='Write per-request results as JSON')
+def replay(recording, speed, upstream_speed, serve, host, port, bridge_config, bridge_cmd, output):
+    """Replay a traffic recording made with --record"""
+    import shlex
+    from .replay import replay_through_bridge, serve_recording
     
+    if speed < 0 or (upstream_speed is not None and upstream_speed < 0):
+        raise click.BadParameter("speed must not be negative")
     try:
-        config_path = find_config_path(config_name)
-        config = load_config(config_path)
-        
-        bridge = MCPHTTPBridge(
-            url=config['url'],
-            headers=config.get('headers', {})
-        )
-        
+        loaded = Recording.load(recording)
+    except (ValueError, KeyError) as e:
+        click.echo(f"❌ Cannot read recording: {e}", err=True)
+        sys.exit(1)
+    
+    if serve:
         try:
-            await bridge.run()
-        finally:
-            await bridge.close()
-            log("Bridge shut down")
+            asyncio.run(serve_recording(loaded, host, port, speed=speed if upstream_speed is None else upstream_speed))
+        except KeyboardInterrupt:
+            pass
+        return
     
-    except FileNotFoundError as e:
-        log(str(e))
+    config = {}
+    if bridge_config:
+        config = load_config(find_config_path(bridge_config))
+    results = asyncio.run(replay_through_bridge(
+        loaded, speed, upstream_speed, config, shlex.split(bridge_cmd) if bridge_cmd else None))
+    
+    summary = results["summary"]
+    click.echo(f"Replayed {summary['requests']} requests from {recording} at {speed}x")
+    for name in ("recorded_ms", "replay_ms"):
+        latency = summary[name]
+        if latency["p50"] is not None:
+            click.echo(f"  {name[:-3]:9} p50 {latency['p50']:>9.2f}ms  p95 {latency['p95']:>9.2f}ms  "
+                       f"max {latency['max']:>9.2f}ms")
+    click.echo(f"  missing {summary['missing']}  mismatched {summary['mismatched']}  "
+               f"unmatched upstream {summary['unmatched_upstream']}")
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        click.echo(f"Results written to {output}")
+    if summary['missing']:
         sys.exit(1)
+
+@cli.command(context_settings={"ignore_unknown_options": True})
+@click.argument('command', nargs=-1, required=True, type=click.UNPROCESSED)
+@click.option('--workers', '-w', type=int, default=1, show_default=True, help='Server processes to keep running')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Listen address')
+@click.option('--port', '-p', type=int, default=0, help='Listen port (default: any free port)')
+@click.option('--unix-socket', default=None, type=click.Path(dir_okay=False),
+              help='Listen on a Unix domain socket instead')
+@click.option('--path', 'http_path', default='/mcp', show_default=True, help='HTTP path of the MCP endpoint')
+@click.option('--timeout', type=float, default=60.0, show_default=True,
+              help='Seconds a request may wait on the server between messages')
+@click.option('--max-body-bytes', type=int, default=256 * 1024 * 1024, show_default=True,
+              help='Largest request body accepted, after decompression')
+def serve(command, workers, host, port, unix_socket, http_path, timeout, max_body_bytes):
+    """Serve a stdio MCP server command over HTTP/SSE (mcp-bridge serve -- COMMAND ...)"""
+    from .reverse import serve_stdio
+    
+    if workers < 1:
+        raise click.BadParameter("must be at least 1", param_hint="--workers")
+    if timeout <= 0:
+        raise click.BadParameter("must be positive", param_hint="--timeout")
+    if max_body_bytes < 1:
+        raise click.BadParameter("must be at least 1", param_hint="--max-body-bytes")
+    try:
+        asyncio.run(serve_stdio(list(command), workers, host, port, unix_socket, http_path, timeout, max_body_bytes))
     except KeyboardInterrupt:
-        log("Interrupted by user")
+        pass
+    except (OSError, RuntimeError) as e:
+        click.echo(f"❌ Cannot start MCP server: {e}", err=True)
+        sys.exit(1)
 
 def main():
     """Entry point for console script"""
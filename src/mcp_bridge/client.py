@@ -0,0 +1,443 @@
+"""
+Async client for Streamable-HTTP MCP servers
+
+For programs that call MCP tools directly, without a stdio client and a
+bridge in between:
+
+    async with MCPSession("http://localhost:8080/mcp") as session:
+        tools = await session.list_tools()
+        result = await session.call_tool("get_forecast", {"city": "Boston"})
+        results = await session.call_many(
+            [("get_forecast", {"city": city}) for city in cities], concurrency=32)
+
+Responses are read as they stream, so progress notifications reach their
+callback while the call is still running. Any number of requests can be
+in flight on one session; they share the session's connection pool.
+SessionPool spreads calls over several sessions on several servers.
+"""
+
+import json
+import asyncio
+import inspect
+from typing import (Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple,
+                    Union)
+
+import httpx
+
+from . import __version__
+from .upstream import make_transport, parse_upstream_url
+
+PROTOCOL_VERSION = "2024-11-05"
+SESSION_HEADER = "mcp-session-id"
+
+# Called with every message that arrives on a request's stream before its
+# response: progress and other notifications, server requests
+MessageHandler = Callable[[dict], Union[None, Awaitable[None]]]
+
+
+class MCPError(Exception):
+    """
+    A JSON-RPC error response, or a request that got no response.
+
+    Attributes:
+        code: JSON-RPC error code, None when there was no response
+        data: The error's data member, if any
+    """
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class MCPSession:
+    """
+    One MCP session with a Streamable-HTTP server.
+
+    Args:
+        url: Server URL; unix:// URLs are supported (see mcp_bridge.upstream)
+        headers: Extra headers for every request, e.g. Authorization
+        client: httpx client to share with other sessions; by default the
+            session creates (and closes) its own
+        timeout: Per-request timeout in seconds
+        max_connections: Connection pool size of the session's own client
+        http_path: HTTP path for unix:// URLs whose socket is not named *.sock
+        client_info: clientInfo sent with initialize
+        retry_expired: Start a new session and resend a request when the
+            server no longer knows the session; otherwise the 404 is raised
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        timeout: float = 30.0,
+        max_connections: int = 100,
+        http_path: Optional[str] = None,
+        client_info: Optional[dict] = None,
+        retry_expired: bool = True,
+    ):
+        self.url, uds = parse_upstream_url(url, http_path)
+        self.headers = headers or {}
+        self.client_info = client_info or {"name": "mcp-bridge-client", "version": __version__}
+        self.retry_expired = retry_expired
+        self._owns_client = client is None
+        if client is None:
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            client = httpx.AsyncClient(timeout=httpx.Timeout(timeout, connect=10.0), limits=limits,
+                                       transport=make_transport(uds, limits))
+        self.client = client
+        self.session_id: Optional[str] = None
+        self.server_info: Optional[dict] = None
+        self.in_flight = 0
+        self._next_id = 0
+        self._init_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self):
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _build_headers(self, method: str) -> dict:
+        headers = {
+            **self.headers,
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream, application/json"
+        }
+        if self.session_id and method != "initialize":
+            headers[SESSION_HEADER] = self.session_id
+        return headers
+
+    def _lock(self) -> asyncio.Lock:
+        if self._init_lock is None:
+            # Created here so it belongs to the running event loop
+            self._init_lock = asyncio.Lock()
+        return self._init_lock
+
+    async def initialize(self) -> dict:
+        """Start the session; returns the server's initialize result"""
+        async with self._lock():
+            return await self._initialize()
+
+    async def _initialize(self) -> dict:
+        self.session_id = None
+        result = await self.request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": self.client_info,
+        })
+        self.server_info = result.get("serverInfo") if isinstance(result, dict) else None
+        await self.notify("notifications/initialized")
+        return result
+
+    async def _reinitialize(self, expired: Optional[str]):
+        """Start a new session after the server dropped `expired`, once for all waiting requests"""
+        async with self._lock():
+            if self.session_id == expired:
+                await self._initialize()
+
+    async def notify(self, method: str, params: Optional[dict] = None):
+        """Send a notification"""
+        message = {"jsonrpc": "2.0", "method": method, "params": params or {}}
+        response = await self.client.post(self.url, json=message, headers=self._build_headers(method))
+        response.raise_for_status()
+
+    async def request(self, method: str, params: Optional[dict] = None,
+                      on_message: Optional[MessageHandler] = None) -> Any:
+        """
+        Send a request and wait for its response.
+
+        If the server no longer knows the session (HTTP 404), a new session
+        is started and the request is sent once more, unless retry_expired
+        is off.
+
+        Args:
+            method: JSON-RPC method
+            params: Request params
+            on_message: Called with each message streamed before the response
+
+        Returns:
+            The JSON-RPC result
+
+        Raises:
+            MCPError for JSON-RPC errors, missing responses and invalid SSE
+            events; httpx errors for transport and HTTP status failures
+        """
+        self.in_flight += 1
+        try:
+            for attempt in range(2):
+                session_id = self.session_id
+                self._next_id += 1
+                msg_id = self._next_id
+                message = {"jsonrpc": "2.0", "id": msg_id, "method": method, "params": params or {}}
+                request = self.client.build_request("POST", self.url, json=message,
+                                                    headers=self._build_headers(method))
+                response = await self.client.send(request, stream=True)
+                try:
+                    if (response.status_code == 404 and session_id and method != "initialize" and not attempt
+                            and self.retry_expired):
+                        await response.aclose()
+                        await self._reinitialize(session_id)
+                        continue
+                    response.raise_for_status()
+                    if method == "initialize":
+                        self.session_id = response.headers.get(SESSION_HEADER)
+                    reply = await self._read_reply(response, msg_id, on_message)
+                finally:
+                    await response.aclose()
+                break
+        finally:
+            self.in_flight -= 1
+
+        if reply is None:
+            raise MCPError(f"No response to {method}")
+        if "error" in reply:
+            error = reply["error"] if isinstance(reply["error"], dict) else {"message": str(reply["error"])}
+            raise MCPError(error.get("message", ""), error.get("code"), error.get("data"))
+        return reply.get("result")
+
+    async def _read_reply(self, response: httpx.Response, msg_id: int,
+                          on_message: Optional[MessageHandler]) -> Optional[dict]:
+        """The response to `msg_id`, handing earlier SSE events to on_message as they arrive"""
+        if "text/event-stream" not in response.headers.get("content-type", ""):
+            body = await response.aread()
+            return json.loads(body) if body else None
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if not data:
+                # Keep-alive or empty event
+                continue
+            try:
+                event = json.loads(data)
+            except ValueError as e:
+                raise MCPError(f"Invalid JSON in SSE event: {e}") from None
+            if isinstance(event, dict) and "method" not in event and event.get("id") == msg_id:
+                return event
+            if on_message is not None:
+                handled = on_message(event)
+                if inspect.isawaitable(handled):
+                    await handled
+        return None
+
+    async def list_tools(self) -> List[dict]:
+        """Every tool the server offers, following pagination"""
+        tools = []
+        cursor = None
+        while True:
+            result = await self.request("tools/list", {"cursor": cursor} if cursor else {})
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None,
+                        on_progress: Optional[MessageHandler] = None,
+                        on_message: Optional[MessageHandler] = None) -> dict:
+        """
+        Call a tool.
+
+        Args:
+            name: Tool name
+            arguments: Tool arguments
+            on_progress: Called with the params of each progress notification;
+                setting it asks the server for progress
+            on_message: Called with every other message streamed before the result
+
+        Returns:
+            The tool result; check its `isError` member for tool failures
+        """
+        params: dict = {"name": name, "arguments": arguments or {}}
+        handler = on_message
+        if on_progress is not None:
+            token = f"{name}-{self._next_id + 1}"
+            params["_meta"] = {"progressToken": token}
+
+            def handler(message: dict):
+                if message.get("method") == "notifications/progress" and \
+                        (message.get("params") or {}).get("progressToken") == token:
+                    return on_progress(message["params"])
+                if on_message is not None:
+                    return on_message(message)
+                return None
+
+        return await self.request("tools/call", params, on_message=handler)
+
+    async def call_many(self, calls: Iterable[Tuple[str, Optional[dict]]], concurrency: int = 16,
+                        return_exceptions: bool = False) -> List[Any]:
+        """
+        Call tools concurrently on this session.
+
+        Args:
+            calls: (tool name, arguments) pairs
+            concurrency: Calls in flight at once
+            return_exceptions: Put failures in the results instead of raising
+                the first one (which stops further calls from starting)
+
+        Returns:
+            Tool results in the order of `calls`
+        """
+        return await run_bounded([lambda call=call: self.call_tool(*call) for call in calls],
+                                 concurrency, return_exceptions)
+
+    async def close(self):
+        """End the session on the server and release connections"""
+        if self.session_id:
+            try:
+                await self.client.delete(self.url, headers=self._build_headers("close"))
+            except httpx.HTTPError:
+                pass
+            self.session_id = None
+        if self._owns_client:
+            await self.client.aclose()
+
+
+class SessionPool:
+    """
+    Sessions with several servers, several per server, for batch work.
+
+    Sessions start on first use of a server. Each call goes to the
+    server's session with the fewest requests in flight, and sessions to
+    one server share a connection pool.
+
+    Args:
+        servers: Server name to a URL or a config dict ("url", "headers",
+            "http_path"), e.g. from mcp_bridge.runner.load_config
+        sessions_per_server: Sessions to open with each server
+        timeout: Per-request timeout in seconds
+        max_connections: Connection pool size for each server
+    """
+
+    def __init__(self, servers: Dict[str, Union[str, dict]], sessions_per_server: int = 1,
+                 timeout: float = 30.0, max_connections: int = 100):
+        if sessions_per_server < 1:
+            raise ValueError("sessions_per_server must be at least 1")
+        self.servers = {name: {"url": config} if isinstance(config, str) else dict(config)
+                        for name, config in servers.items()}
+        for name, config in self.servers.items():
+            if "url" not in config:
+                raise ValueError(f"server '{name}' has no url")
+        self.sessions_per_server = sessions_per_server
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._sessions: Dict[str, List[MCPSession]] = {}
+        self._clients: List[httpx.AsyncClient] = []
+        self._starting: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_configs(cls, names: Iterable[str], **kwargs) -> "SessionPool":
+        """A pool over bridge config files, keyed by config name"""
+        from .runner import find_config_path, load_config
+        return cls({name: load_config(find_config_path(name)) for name in names}, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def session(self, server: str) -> MCPSession:
+        """The server's least busy session, starting the sessions on first use"""
+        sessions = self._sessions.get(server)
+        if sessions is None:
+            if server not in self.servers:
+                raise KeyError(f"Unknown server: {server}")
+            starting = self._starting.get(server)
+            if starting is None:
+                starting = self._starting[server] = asyncio.ensure_future(self._start(server))
+            try:
+                sessions = await asyncio.shield(starting)
+            finally:
+                if starting.done():
+                    self._starting.pop(server, None)
+        return min(sessions, key=lambda session: session.in_flight)
+
+    async def _start(self, server: str) -> List[MCPSession]:
+        config = self.servers[server]
+        url, uds = parse_upstream_url(config["url"], config.get("http_path"))
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        client = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, connect=10.0), limits=limits,
+                                   transport=make_transport(uds, limits))
+        sessions = [MCPSession(url, config.get("headers"), client=client) for _ in range(self.sessions_per_server)]
+        # Every initialize finishes before any failure is handled, so none
+        # can start a session after the others are closed
+        results = await asyncio.gather(*(session.initialize() for session in sessions), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            # End the sessions that did start; a later call tries again from scratch
+            await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+            await client.aclose()
+            raise failures[0]
+        self._clients.append(client)
+        self._sessions[server] = sessions
+        return sessions
+
+    async def call_tool(self, server: str, name: str, arguments: Optional[dict] = None, **kwargs) -> dict:
+        """Call a tool on one of the server's sessions (see MCPSession.call_tool)"""
+        session = await self.session(server)
+        return await session.call_tool(name, arguments, **kwargs)
+
+    async def call_many(self, calls: Iterable[Tuple[str, str, Optional[dict]]], concurrency: int = 16,
+                        return_exceptions: bool = False) -> List[Any]:
+        """
+        Call tools concurrently across servers.
+
+        Args:
+            calls: (server, tool name, arguments) triples
+            concurrency: Calls in flight at once, over all servers
+            return_exceptions: Put failures in the results instead of raising
+                the first one
+
+        Returns:
+            Tool results in the order of `calls`
+        """
+        return await run_bounded([lambda call=call: self.call_tool(*call) for call in calls],
+                                 concurrency, return_exceptions)
+
+    async def close(self):
+        """End every session and release connections"""
+        sessions = [session for group in self._sessions.values() for session in group]
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+        await asyncio.gather(*(client.aclose() for client in self._clients), return_exceptions=True)
+        self._sessions.clear()
+        self._clients.clear()
+
+
+async def run_bounded(jobs: Sequence[Callable[[], Awaitable[Any]]], concurrency: int,
+                      return_exceptions: bool = False) -> List[Any]:
+    """
+    Run coroutine functions with at most `concurrency` running at once.
+
+    A fixed set of workers takes jobs in order, so even very long job
+    lists cost one task per worker, not one per job.
+
+    Returns:
+        Job results in order; exceptions in place with return_exceptions,
+        otherwise the first exception is raised once running jobs finish
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    results: List[Any] = [None] * len(jobs)
+    queue = iter(enumerate(jobs))
+    failures: List[BaseException] = []
+
+    async def worker():
+        for index, job in queue:
+            if failures:
+                return
+            try:
+                results[index] = await job()
+            except Exception as e:
+                if not return_exceptions:
+                    failures.append(e)
+                    return
+                results[index] = e
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(jobs)))))
+    if failures:
+        raise failures[0]
+    return results
@@ -0,0 +1,146 @@
+"""
+HTTP compression for upstream traffic
+
+Responses: the bridge advertises the encodings it can decode in
+Accept-Encoding and httpx decodes them as they stream, so SSE events are
+relayed as soon as each compressed chunk arrives. gzip and deflate are
+always available; br needs the `brotli` (or `brotlicffi`) package and
+zstd the `zstandard` package (`pip install 'mcp-bridge[compression]'`).
+
+Requests: bodies at or above a size threshold can be sent gzip-encoded.
+This is off by default because not every server accepts compressed
+request bodies.
+"""
+
+import zlib
+from importlib.util import find_spec
+from typing import AsyncIterator, List, Optional, Union
+
+# Preference order for Accept-Encoding
+ENCODINGS = ("zstd", "br", "gzip", "deflate")
+
+# Packages that provide each optional decoder (any one will do)
+_DECODER_PACKAGES = {
+    "br": ("brotli", "brotlicffi"),
+    "zstd": ("zstandard",),
+}
+
+DEFAULT_LEVEL = 6
+
+
+def encoding_available(encoding: str) -> bool:
+    """Whether httpx can decode `encoding` with the packages installed"""
+    packages = _DECODER_PACKAGES.get(encoding)
+    if packages is None:
+        return encoding in ENCODINGS
+    return any(find_spec(package) is not None for package in packages)
+
+
+def gzip_body(body: bytes, level: int = DEFAULT_LEVEL) -> bytes:
+    """gzip a request body (runs in the offload pool for large bodies)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class GzipStream:
+    """
+    gzip-encodes a streamed request body, counting bytes in and out.
+
+    Used for spooled messages, which are never held in memory whole.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], level: int = DEFAULT_LEVEL):
+        self.chunks = chunks
+        self.level = level
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+
+    async def __aiter__(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        async for chunk in self.chunks:
+            self.raw_bytes += len(chunk)
+            data = compressor.compress(chunk)
+            if data:
+                self.sent_bytes += len(data)
+                yield data
+        data = compressor.flush()
+        self.sent_bytes += len(data)
+        yield data
+
+
+class ByteCounter:
+    """Passes a decoded response stream through, counting its bytes"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self.chunks = chunks
+        self.bytes = 0
+
+    async def __aiter__(self):
+        async for chunk in self.chunks:
+            self.bytes += len(chunk)
+            yield chunk
+
+
+class Compression:
+    """
+    Compression settings from the `compression` config option.
+
+    Args:
+        accept: Encodings to accept on responses, in preference order;
+            "auto" for every encoding that can be decoded here
+        request_threshold: gzip request bodies of at least this many
+            bytes; None to never compress requests
+        level: gzip level for request bodies (1-9)
+    """
+
+    CONFIG_KEYS = frozenset({"accept", "request_threshold", "level"})
+
+    def __init__(self, accept: Union[str, List[str]] = "auto", request_threshold: Optional[int] = None,
+                 level: int = DEFAULT_LEVEL):
+        if accept == "auto":
+            accept = [encoding for encoding in ENCODINGS if encoding_available(encoding)]
+        elif not isinstance(accept, list):
+            raise ValueError('compression accept must be "auto" or a list of encodings')
+        for encoding in accept:
+            if encoding not in ENCODINGS:
+                raise ValueError(f"Unknown encoding '{encoding}' (expected any of: {', '.join(ENCODINGS)})")
+            if not encoding_available(encoding):
+                package = _DECODER_PACKAGES[encoding][0]
+                raise ValueError(f"Encoding '{encoding}' needs the '{package}' package "
+                                 f"(pip install 'mcp-bridge[compression]')")
+        if request_threshold is not None and (not isinstance(request_threshold, int) or request_threshold < 1):
+            raise ValueError("compression request_threshold must be a positive integer")
+        if not isinstance(level, int) or not 1 <= level <= 9:
+            raise ValueError("compression level must be an integer from 1 to 9")
+        self.accept = list(accept)
+        self.request_threshold = request_threshold
+        self.level = level
+
+    @classmethod
+    def from_config(cls, config) -> "Compression":
+        """
+        Build settings from the `compression` config option.
+
+        Args:
+            config: True (or missing) to accept every available encoding,
+                False to ask for uncompressed responses, or a dict with any
+                of the keys accept, request_threshold, level
+        """
+        if config is None or config is True:
+            return cls()
+        if config is False:
+            return cls(accept=[])
+        if not isinstance(config, dict):
+            raise ValueError("compression must be true, false or an object")
+        unknown = set(config) - cls.CONFIG_KEYS
+        if unknown:
+            raise ValueError(f"Unknown compression option(s): {', '.join(sorted(unknown))}")
+        return cls(**config)
+
+    @property
+    def accept_encoding(self) -> str:
+        """Value for the Accept-Encoding request header"""
+        return ", ".join(self.accept) if self.accept else "identity"
+
+    def should_compress(self, size: int) -> bool:
+        return self.request_threshold is not None and size >= self.request_threshold
@@ -0,0 +1,338 @@
+"""
+On-demand diagnostics for a running bridge
+
+When a long-lived bridge gets slow or grows, restarting it under a
+profiler loses the state that caused the problem. With the `diagnostics`
+config option set, signal it instead:
+
+    kill -USR1 <pid>   write the asyncio task stacks, with the request each
+                       task is working on, and a tracemalloc snapshot
+    kill -USR2 <pid>   start a sampling CPU profile; it stops after
+                       `profile_seconds` or at the next SIGUSR2
+
+Dumps show request ids, task state and allocation sites, so files go to
+a private directory: `directory`, or $XDG_STATE_HOME/mcp-bridge/diagnostics
+(~/.local/state/mcp-bridge/diagnostics) by default. Directories the bridge
+creates are mode 0700 and every file is created new with mode 0600. Files
+are named mcp-bridge-<pid>-<time>-<kind>, and the bridge logs each path.
+
+Memory tracing slows allocation down, so tracemalloc only starts at the
+first SIGUSR1. That first snapshot is the baseline. Later snapshots list
+the top allocation sites and the growth since the previous snapshot.
+Snapshots are taken and compared on a worker thread, so requests keep
+flowing while a large heap is walked.
+
+The profiler samples the event loop thread's stack from a background
+thread and writes collapsed stacks (`<frame>;<frame>;... <count>`), the
+input format of flamegraph.pl and speedscope. Samples in `select` are
+the loop waiting for I/O.
+"""
+
+import io
+import os
+import sys
+import time
+import signal
+import asyncio
+import threading
+import traceback
+from collections import Counter
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, TextIO, Tuple
+
+from .logs import logger
+
+if TYPE_CHECKING:
+    from .bridge import MCPHTTPBridge
+
+DEFAULT_PROFILE_SECONDS = 30.0
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEFAULT_TOP = 25
+
+
+def default_directory() -> str:
+    """The private per-user directory diagnostics are written to"""
+    state = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(state, "mcp-bridge", "diagnostics")
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def await_chain(coro) -> list:
+    """
+    Frames of a coroutine and everything it is awaiting, outermost first.
+
+    Task.get_stack() stops at the task's own coroutine; following the
+    await chain shows where the task is actually waiting.
+    """
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is not None:
+            frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval.
+
+    Args:
+        thread_id: Thread to sample (threading.get_ident() on that thread)
+        interval: Seconds between samples
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self.stopped = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="mcp-bridge-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped = time.monotonic()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, most frequent first"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 5) -> List[Tuple[str, int]]:
+        """Functions on top of the stack in the most samples"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack[-1]] += count
+        return leaves.most_common(limit)
+
+
+class Diagnostics:
+    """
+    Signal-triggered task dumps, memory snapshots and CPU profiles.
+
+    Args:
+        bridge: The bridge whose in-flight requests are reported
+        directory: Where to write files (default: default_directory())
+        profile_seconds: Length of a SIGUSR2 profile
+        sample_interval: Seconds between profile samples
+        top: Allocation sites listed in memory snapshots
+    """
+
+    CONFIG_KEYS = frozenset({"directory", "profile_seconds", "sample_interval", "top"})
+    SIGNALS = ("SIGUSR1", "SIGUSR2")
+
+    def __init__(self, bridge: "MCPHTTPBridge", directory: Optional[str] = None,
+                 profile_seconds: float = DEFAULT_PROFILE_SECONDS,
+                 sample_interval: float = DEFAULT_SAMPLE_INTERVAL, top: int = DEFAULT_TOP):
+        if not isinstance(profile_seconds, (int, float)) or profile_seconds <= 0:
+            raise ValueError("profile_seconds must be a positive number")
+        if not isinstance(sample_interval, (int, float)) or not 0 < sample_interval <= 1:
+            raise ValueError("sample_interval must be a number of seconds between 0 and 1")
+        if not isinstance(top, int) or top < 1:
+            raise ValueError("top must be a positive integer")
+        self.bridge = bridge
+        self.directory = directory
+        self.profile_seconds = float(profile_seconds)
+        self.sample_interval = float(sample_interval)
+        self.top = top
+        self.sampler: Optional[StackSampler] = None
+        # The SIGUSR1 dump being written, if any
+        self.dumping: Optional[asyncio.Task] = None
+        self._snapshot = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._installed: List[int] = []
+
+    @classmethod
+    def from_config(cls, bridge: "MCPHTTPBridge", config) -> Optional["Diagnostics"]:
+        """Diagnostics are off unless configured: true or an object of options"""
+        if config is None or config is False:
+            return None
+        if config is True:
+            return cls(bridge)
+        if not isinstance(config, dict):
+            raise ValueError("diagnostics must be an object or a boolean")
+        unknown = set(config) - cls.CONFIG_KEYS
+        if unknown:
+            raise ValueError(f"Unknown diagnostics option(s): {', '.join(sorted(unknown))}")
+        return cls(bridge, **config)
+
+    def install(self) -> bool:
+        """Handle SIGUSR1 and SIGUSR2 on the running loop; False where signals are unavailable"""
+        self._loop = asyncio.get_event_loop()
+        handlers = {"SIGUSR1": self._dump_soon, "SIGUSR2": self.toggle_profile}
+        for name in self.SIGNALS:
+            signum = getattr(signal, name, None)
+            if signum is None:
+                logger.debug("Diagnostics signals are not available on this platform")
+                return False
+            try:
+                self._loop.add_signal_handler(signum, handlers[name])
+            except (NotImplementedError, RuntimeError, ValueError) as e:
+                # No signal support in this loop, or not on the main thread
+                logger.debug("Cannot handle %s: %s", name, e)
+                return False
+            self._installed.append(signum)
+        logger.debug("Diagnostics: kill -USR1 %d for tasks and memory, -USR2 to profile", os.getpid())
+        return True
+
+    def uninstall(self):
+        """Remove signal handlers and stop a running profile"""
+        if self.sampler is not None:
+            self.stop_profile()
+        for signum in self._installed:
+            self._loop.remove_signal_handler(signum)
+        self._installed = []
+
+    def _path(self, kind: str) -> str:
+        if self.directory is None:
+            self.directory = default_directory()
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+        return os.path.join(self.directory, f"mcp-bridge-{os.getpid()}-{stamp}-{kind}")
+
+    def _write(self, kind: str, write: Callable[[TextIO], None]) -> Optional[str]:
+        """Write a new private file with write(f); returns its path, None on failure"""
+        path = self._path(kind)
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                # makedirs' mode is subject to the umask
+                os.chmod(self.directory, 0o700)
+            # O_EXCL: never write through an existing file or symlink
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                write(f)
+        except OSError as e:
+            logger.error("Cannot write %s: %s", path, e)
+            return None
+        return path
+
+    def _dump_soon(self):
+        """SIGUSR1: start a dump unless one is still being written"""
+        if self.dumping is not None and not self.dumping.done():
+            logger.info("Diagnostics dump already in progress")
+            return
+        self.dumping = self._loop.create_task(self.dump())
+
+    async def dump(self) -> List[str]:
+        """Write a task dump and a memory snapshot; returns their paths"""
+        # Task stacks are read on the loop, where they cannot change under us;
+        # the snapshot and the file writes run on a worker thread
+        tasks = io.StringIO()
+        self.write_tasks(tasks)
+        loop = asyncio.get_event_loop()
+        paths = [
+            await loop.run_in_executor(None, self._write, "tasks.txt", lambda f: f.write(tasks.getvalue())),
+            await loop.run_in_executor(None, self._write, "memory.txt", self.write_memory),
+        ]
+        paths = [path for path in paths if path is not None]
+        for path in paths:
+            logger.info("Wrote %s", path)
+        return paths
+
+    def write_tasks(self, f):
+        """Every asyncio task's stack, labelled with the request it is working on"""
+        now = time.monotonic()
+        in_flight: Dict[asyncio.Task, Tuple] = dict(self.bridge.in_flight)
+        tasks = asyncio.all_tasks(self._loop or asyncio.get_event_loop())
+        f.write(f"MCP Bridge task dump, pid {os.getpid()}, {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"{len(tasks)} task(s), {len(in_flight)} request(s) in flight\n\n")
+
+        for msg_id, method, started in sorted(in_flight.values(), key=lambda request: request[2]):
+            f.write(f"  id={msg_id} {method} running {(now - started) * 1000:.1f} ms\n")
+
+        for task in sorted(tasks, key=lambda task: id(task)):
+            request = in_flight.get(task)
+            label = ""
+            if request is not None:
+                label = f" [id={request[0]} {request[1]}, {(now - request[2]) * 1000:.1f} ms]"
+            f.write(f"\n--- {task.get_name()}{label}\n")
+            frames = await_chain(task.get_coro())
+            f.writelines(traceback.StackSummary.extract((frame, frame.f_lineno) for frame in frames).format())
+
+    def write_memory(self, f):
+        """Top allocation sites, and growth since the previous snapshot"""
+        import tracemalloc
+
+        f.write(f"MCP Bridge memory snapshot, pid {os.getpid()}, {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._snapshot = tracemalloc.take_snapshot()
+            f.write("tracemalloc started; this is the baseline. Signal again to see allocations since now.\n")
+            return
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        f.write(f"Traced: {current / 1048576:.1f} MiB now, {peak / 1048576:.1f} MiB peak\n")
+
+        f.write(f"\nTop {self.top} allocation sites:\n")
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            f.write(f"  {stat}\n")
+        if self._snapshot is not None:
+            f.write(f"\nTop {self.top} changes since the previous snapshot:\n")
+            for stat in snapshot.compare_to(self._snapshot, "lineno")[:self.top]:
+                f.write(f"  {stat}\n")
+        self._snapshot = snapshot
+
+    def toggle_profile(self):
+        """Start a CPU profile, or stop the running one early"""
+        if self.sampler is None:
+            self.start_profile()
+        else:
+            self.stop_profile()
+
+    def start_profile(self, seconds: Optional[float] = None):
+        """Sample the event loop thread for `seconds` (default: profile_seconds)"""
+        if self.sampler is not None:
+            return
+        loop = self._loop or asyncio.get_event_loop()
+        self.sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        self.sampler.start()
+        self._timer = loop.call_later(seconds or self.profile_seconds, self.stop_profile)
+        logger.info("CPU profile started for %.0fs", seconds or self.profile_seconds)
+
+    def stop_profile(self) -> Optional[str]:
+        """Stop the running profile and write it; returns its path"""
+        sampler, self.sampler = self.sampler, None
+        if sampler is None:
+            return None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        sampler.stop()
+
+        path = self._write("profile.folded", lambda f: f.write(sampler.collapsed()))
+        if path is None:
+            return None
+        top = ", ".join(f"{name} {count * 100 // max(1, sampler.samples)}%"
+                        for name, count in sampler.top_functions(3))
+        logger.info("Wrote %s: %d samples over %.1fs; top: %s", path, sampler.samples,
+                    sampler.stopped - sampler.started, top)
+        return path
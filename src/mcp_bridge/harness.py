@@ -0,0 +1,105 @@
+"""
+Drive a bridge subprocess over stdio
+
+Used by the benchmarks and replay to talk to a real bridge process the
+way an MCP client does.
+"""
+
+import sys
+import json
+import time
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+
+def bridge_command(config_path: str, extra_args: Optional[List[str]] = None,
+                   base: Optional[List[str]] = None) -> List[str]:
+    """Command line for a bridge using this interpreter, or a custom base command"""
+    command = list(base) if base else [sys.executable, "-m", "mcp_bridge"]
+    return command + ["--config", config_path] + list(extra_args or [])
+
+
+class BridgeProcess:
+    """A bridge subprocess with request/response matching by JSON-RPC id"""
+
+    def __init__(self, command: List[str], env: Optional[dict] = None,
+                 on_message: Optional[Callable[[dict], None]] = None):
+        """
+        Args:
+            command: Bridge command line
+            env: Environment for the subprocess
+            on_message: Called with every message the bridge writes to stdout
+        """
+        self.command = command
+        self.env = env
+        self.on_message = on_message
+        self.process = None
+        self.pending: Dict[object, asyncio.Future] = {}
+        self.next_id = 0
+        self.bytes_out = 0
+        self._reader = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=self.env,
+            # Tool results can be very large single lines
+            limit=1 << 30,
+        )
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def _read(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            self.bytes_out += len(line)
+            message = json.loads(line)
+            if self.on_message:
+                self.on_message(message)
+            if "method" in message:
+                continue
+            future = self.pending.pop(message.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result((time.monotonic(), message))
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("bridge exited"))
+
+    def send(self, message: dict) -> Optional[asyncio.Future]:
+        """
+        Write a message to the bridge's stdin.
+
+        Returns:
+            For requests, a future resolving to (monotonic receive time, response)
+        """
+        future = None
+        if "id" in message and "method" in message:
+            future = asyncio.get_event_loop().create_future()
+            self.pending[message["id"]] = future
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        return future
+
+    def notify(self, method: str, params: Optional[dict] = None):
+        self.send({"jsonrpc": "2.0", "method": method, "params": params or {}})
+
+    async def request(self, method: str, params: Optional[dict] = None) -> dict:
+        """Send a request with the next numeric id and wait for its response"""
+        self.next_id += 1
+        future = self.send({"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": params or {}})
+        await self.process.stdin.drain()
+        _, response = await future
+        return response
+
+    async def stop(self, timeout: float = 10.0):
+        """Close stdin and wait for the bridge to finish in-flight work and exit"""
+        self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        await self._reader
@@ -0,0 +1,287 @@
+"""
+Minimal asyncio HTTP/1.1 server used by the bridge's local endpoints
+
+Supports keep-alive, Content-Length and chunked request bodies, gzip or
+deflate encoded request bodies, and streamed (chunked) responses for
+Server-Sent Events, optionally gzip-compressed.
+
+Request bodies are capped at max_body_bytes, both as sent and after
+decompression, and larger ones get 413; header lines and their number
+are bounded too. There are no read timeouts, so put it behind a reverse
+proxy before exposing it to untrusted networks.
+"""
+
+import os
+import json
+import zlib
+import asyncio
+from http import HTTPStatus
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .logs import logger
+from .spool import DEFAULT_MAX_MESSAGE_BYTES
+
+
+class Request:
+    """A parsed HTTP request"""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.target = target
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+
+class Response:
+    """
+    An HTTP response with either a fixed body or a streamed one.
+
+    Args:
+        status: HTTP status code
+        headers: Response headers
+        body: Complete body, sent with Content-Length
+        stream: Async iterator of body chunks, sent with chunked encoding
+    """
+
+    def __init__(
+        self,
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+        stream: Optional[AsyncIterator[bytes]] = None,
+    ):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+        self.stream = stream
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class PayloadTooLarge(Exception):
+    """A request body over the server's max_body_bytes"""
+
+
+def sse_event(message: dict) -> bytes:
+    """Frame a JSON-RPC message as one SSE event"""
+    return b"event: message\ndata: " + json.dumps(message).encode() + b"\n\n"
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Requests with more header lines than this are dropped
+MAX_HEADERS = 100
+
+# Seconds to keep reading a refused request body before closing
+LINGER_TIMEOUT = 1.0
+
+
+class HTTPServer:
+    """
+    Serve a request handler over TCP or a Unix domain socket.
+
+    With `compress`, responses are gzip-encoded for clients that accept
+    it; streamed responses are flushed after every chunk so each SSE
+    event is delivered as soon as it is written. Request bodies over
+    `max_body_bytes` (None for no limit) are refused with 413.
+    """
+
+    def __init__(self, handler: Handler, host: str = "127.0.0.1", port: int = 0,
+                 unix_socket: Optional[str] = None, compress: bool = False,
+                 max_body_bytes: Optional[int] = DEFAULT_MAX_MESSAGE_BYTES):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.compress = compress
+        self.max_body_bytes = max_body_bytes
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = set()
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        if self.unix_socket:
+            return f"unix://{self.unix_socket}"
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        if self.unix_socket:
+            if os.path.exists(self.unix_socket):
+                os.unlink(self.unix_socket)
+            self._server = await asyncio.start_unix_server(self._serve, self.unix_socket)
+        else:
+            self._server = await asyncio.start_server(self._serve, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._connections):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except PayloadTooLarge as e:
+                    # The rest of the body is unread, so the connection cannot be reused
+                    await self._write_response(writer, Response(413, {"Content-Type": "text/plain"}, str(e).encode()),
+                                               keep_alive=False)
+                    await self._linger(reader, writer)
+                    break
+                if request is None:
+                    break
+                try:
+                    response = await self.handler(request)
+                except Exception as e:
+                    logger.error("HTTP handler failed: %s", e)
+                    logger.debug("Traceback:", exc_info=True)
+                    response = Response(500, {"Content-Type": "text/plain"}, str(e).encode())
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, response, keep_alive, self._accepts_gzip(request))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # ValueError: a malformed request line, chunk size or oversized header line
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _linger(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Read and discard what the client is still sending, for a moment.
+
+        Closing a socket with unread input resets the connection, and the
+        client may lose the response before reading it.
+        """
+        if writer.can_write_eof():
+            writer.write_eof()
+        try:
+            await asyncio.wait_for(self._discard(reader), LINGER_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+    @staticmethod
+    async def _discard(reader: asyncio.StreamReader):
+        while await reader.read(65536):
+            pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, target, _version = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise ValueError(f"More than {MAX_HEADERS} headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        limit = self.max_body_bytes
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            total = 0
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                total += size
+                if limit is not None and total > limit:
+                    raise PayloadTooLarge(f"Request body over {limit} bytes")
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        else:
+            length = int(headers.get("content-length", 0))
+            if limit is not None and length > limit:
+                raise PayloadTooLarge(f"Request body of {length} bytes is over {limit}")
+            body = await reader.readexactly(length)
+
+        if headers.get("content-encoding", "identity").lower() in ("gzip", "x-gzip", "deflate"):
+            # wbits 47 accepts both gzip and zlib framing
+            decompressor = zlib.decompressobj(47)
+            try:
+                # One byte past the limit is enough to tell it is over
+                decoded = decompressor.decompress(body, 0 if limit is None else limit + 1)
+            except zlib.error:
+                decoded = None
+            if decoded is not None and limit is not None and (len(decoded) > limit or decompressor.unconsumed_tail):
+                raise PayloadTooLarge(f"Decompressed request body over {limit} bytes")
+            # A truncated or corrupt body is left encoded; the handler will reject it
+            if decoded is not None and decompressor.eof:
+                body = decoded
+                del headers["content-encoding"]
+
+        return Request(method, target, headers, body)
+
+    def _accepts_gzip(self, request: Request) -> bool:
+        if not self.compress:
+            return False
+        accepted = [part.split(";")[0].strip() for part in request.headers.get("accept-encoding", "").split(",")]
+        return "gzip" in accepted
+
+    async def _write_response(self, writer: asyncio.StreamWriter, response: Response, keep_alive: bool,
+                              use_gzip: bool = False):
+        headers = dict(response.headers)
+        if use_gzip and any(name.lower() == "content-encoding" for name in headers):
+            use_gzip = False
+        compressor = None
+        if use_gzip and (response.stream is not None or len(response.body) >= MIN_COMPRESS_SIZE):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            headers["Content-Encoding"] = "gzip"
+            if response.stream is None:
+                response.body = compressor.compress(response.body) + compressor.flush()
+        if response.stream is not None:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            headers["Content-Length"] = str(len(response.body))
+        if not keep_alive:
+            headers["Connection"] = "close"
+
+        head = [f"HTTP/1.1 {response.status} {HTTPStatus(response.status).phrase}"]
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+        if response.stream is None:
+            writer.write(response.body)
+        else:
+            async for chunk in response.stream:
+                if chunk and compressor is not None:
+                    chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if chunk:
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()
+            if compressor is not None:
+                tail = compressor.flush()
+                writer.write(b"%x\r\n%s\r\n" % (len(tail), tail))
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
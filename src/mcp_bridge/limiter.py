@@ -0,0 +1,231 @@
+"""
+Adaptive (AIMD) concurrency limiter for requests to the upstream server
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Hashable, Optional
+
+# Status codes that mean the upstream is shedding load
+OVERLOAD_STATUS_CODES = frozenset({429, 503})
+
+DEFAULT_INITIAL = 4
+DEFAULT_MAX_LIMIT = 64
+
+
+class QueueFullError(Exception):
+    """Raised when a request arrives while the limiter's queue is full"""
+
+
+def is_overload(error: Optional[BaseException]) -> bool:
+    """Return True if a request failure signals an overloaded upstream"""
+    if error is None:
+        return False
+    if isinstance(error, asyncio.TimeoutError):
+        # No response from a WebSocket upstream in time
+        return True
+    import httpx
+    if isinstance(error, httpx.TimeoutException):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in OVERLOAD_STATUS_CODES
+    return False
+
+
+class KeyLatency:
+    """Best and smoothed latency of one kind of request"""
+
+    __slots__ = ("baseline", "smoothed")
+
+    def __init__(self, latency: float):
+        self.baseline = latency
+        self.smoothed = latency
+
+    def observe(self, latency: float, smoothing: float):
+        self.smoothed += smoothing * (latency - self.smoothed)
+        if latency < self.baseline:
+            self.baseline = latency
+        else:
+            # Let the baseline drift up slowly so one lucky sample does
+            # not pin it forever
+            self.baseline += 0.01 * (latency - self.baseline)
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    The limit grows by roughly one request per round trip while latency
+    stays close to the best latency seen so far. It is multiplied by
+    `backoff` when a request times out, the upstream answers 429/503, or
+    smoothed latency rises above `latency_tolerance` times the baseline.
+    Requests over the limit wait in a FIFO queue of at most `queue_size`
+    entries; beyond that, `acquire()` raises QueueFullError.
+
+    Baseline and smoothed latency are kept per key (the bridge uses the
+    method and tool name), so a slow tool is compared with its own best
+    latency rather than with a fast `tools/list`.
+    """
+
+    CONFIG_KEYS = {
+        "initial": "initial",
+        "min": "min_limit",
+        "max": "max_limit",
+        "queue_size": "queue_size",
+        "backoff": "backoff",
+        "latency_tolerance": "latency_tolerance",
+    }
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_INITIAL,
+        min_limit: int = 1,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        queue_size: int = 256,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.2,
+    ):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("adaptive_concurrency requires 1 <= min <= initial <= max")
+        if queue_size < 0:
+            raise ValueError("adaptive_concurrency queue_size must not be negative")
+        if not 0 < backoff < 1:
+            raise ValueError("adaptive_concurrency backoff must be between 0 and 1")
+        if latency_tolerance <= 1:
+            raise ValueError("adaptive_concurrency latency_tolerance must be greater than 1")
+
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+
+        self.in_flight = 0
+        # Smoothed latency over all requests, used as the round-trip time
+        self.smoothed: Optional[float] = None
+        self.latencies: Dict[Hashable, KeyLatency] = {}
+        self._last_decrease = 0.0
+        self._waiters = deque()
+
+    @classmethod
+    def from_config(cls, config, capacity: Optional[int] = None) -> "AdaptiveLimiter":
+        """
+        Build a limiter from the `adaptive_concurrency` config option.
+
+        Args:
+            config: True for defaults, or a dict with any of the keys
+                initial, min, max, queue_size, backoff, latency_tolerance
+            capacity: Requests the lanes behind the limiter can hold at
+                once; `max` (and `initial`) are capped to it
+
+        Returns:
+            A configured AdaptiveLimiter
+        """
+        if config is True:
+            config = {}
+        if not isinstance(config, dict):
+            raise ValueError("adaptive_concurrency must be true or an object")
+        unknown = set(config) - set(cls.CONFIG_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown adaptive_concurrency option(s): {', '.join(sorted(unknown))}")
+        options = {cls.CONFIG_KEYS[key]: value for key, value in config.items()}
+        if capacity is not None:
+            # A limit above what the lanes admit would only grow unchecked
+            options["max_limit"] = min(options.get("max_limit", DEFAULT_MAX_LIMIT), capacity)
+            options["initial"] = min(options.get("initial", DEFAULT_INITIAL), options["max_limit"])
+            if options.get("min_limit", 1) > options["max_limit"]:
+                raise ValueError(f"adaptive_concurrency min must not exceed the lane capacity ({capacity})")
+        return cls(**options)
+
+    @property
+    def current_limit(self) -> int:
+        """The number of requests currently allowed in flight"""
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def queued(self) -> int:
+        """The number of requests waiting for a slot"""
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Wait for a slot, or raise QueueFullError if the queue is full"""
+        if not self._waiters and self.in_flight < self.current_limit:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            raise QueueFullError(
+                f"Bridge request queue is full ({self.queue_size} waiting, "
+                f"upstream limit {self.current_limit} in flight)"
+            )
+
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif not waiter.cancelled():
+                # The slot was handed over just before cancellation
+                self.release()
+            raise
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False,
+                key: Hashable = None):
+        """
+        Free a slot and adjust the limit.
+
+        Args:
+            latency: Seconds the request took, or None if it gives no signal
+            overloaded: True if the request failed because of overload
+            key: What the request was (e.g. method and tool); latency is
+                only compared with earlier requests of the same key
+        """
+        self.in_flight -= 1
+
+        if overloaded:
+            self._decrease()
+        elif latency is not None:
+            self._observe(latency, key)
+
+        self._wake()
+
+    def _observe(self, latency: float, key: Hashable = None):
+        """Feed a successful request's latency into the limit"""
+        if self.smoothed is None:
+            self.smoothed = latency
+        else:
+            self.smoothed += self.smoothing * (latency - self.smoothed)
+
+        tracked = self.latencies.get(key)
+        if tracked is None:
+            tracked = self.latencies[key] = KeyLatency(latency)
+        else:
+            tracked.observe(latency, self.smoothing)
+
+        if tracked.smoothed > tracked.baseline * self.latency_tolerance:
+            self._decrease()
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self):
+        """Back off multiplicatively, at most once per smoothed round trip"""
+        now = time.monotonic()
+        if self.smoothed is not None and now - self._last_decrease < self.smoothed:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+
+    def _wake(self):
+        """Hand free slots to queued requests in arrival order"""
+        while self._waiters and self.in_flight < self.current_limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
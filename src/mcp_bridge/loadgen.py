@@ -0,0 +1,285 @@
+"""
+Load generator for Streamable-HTTP MCP servers
+
+Drives a configured server directly (without a bridge in between) with a
+weighted mix of requests over one or more MCP sessions, either closed
+loop (a fixed number of requests in flight) or open loop (a target
+request rate), and reports throughput, latency percentiles and errors.
+"""
+
+import json
+import time
+import random
+import asyncio
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from .client import MCPError, MCPSession
+from .stats import percentile
+from .upstream import make_transport, parse_upstream_url
+
+
+class BenchError(Exception):
+    """A request that did not produce a successful result"""
+
+    def __init__(self, kind: str, detail: str = ""):
+        super().__init__(f"{kind}: {detail}" if detail else kind)
+        self.kind = kind
+
+
+def classify_error(error: Exception) -> str:
+    """Short category used to group errors in the report"""
+    if isinstance(error, BenchError):
+        return error.kind
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.ConnectError):
+        return "connect"
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http {error.response.status_code}"
+    return type(error).__name__
+
+
+class BenchSession(MCPSession):
+    """
+    One MCP session against the server.
+
+    Expired sessions are not restarted: the 404 is counted as an error
+    instead of hiding a session restart in the latency of a request.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, url: str, headers: Optional[dict] = None):
+        super().__init__(url, headers, client=client, retry_expired=False,
+                         client_info={"name": "mcp-bridge-bench", "version": "1.0.0"})
+
+    async def request(self, method: str, params: Optional[dict] = None, on_message=None) -> dict:
+        """
+        Send a request and wait for its response.
+
+        Returns:
+            The JSON-RPC result
+
+        Raises:
+            BenchError for JSON-RPC errors, tool errors and missing responses;
+            httpx errors for transport and HTTP status failures
+        """
+        try:
+            result = await super().request(method, params, on_message)
+        except MCPError as e:
+            if e.code is None:
+                raise BenchError("no response") from None
+            raise BenchError(f"jsonrpc {e.code}", str(e)) from None
+        result = result or {}
+        if isinstance(result, dict) and result.get("isError"):
+            raise BenchError("tool error")
+        return result
+
+
+class Workload:
+    """
+    Weighted mix of requests.
+
+    Args:
+        steps: Dicts with "method", optional "params" and optional "weight"
+        seed: Seed for choosing steps
+    """
+
+    def __init__(self, steps: List[dict], seed: Optional[int] = None):
+        if not steps:
+            raise ValueError("workload has no steps")
+        for step in steps:
+            if not isinstance(step, dict) or "method" not in step:
+                raise ValueError(f"workload step needs a 'method': {step!r}")
+            if step.get("weight", 1) < 0:
+                raise ValueError(f"workload weight must not be negative: {step!r}")
+        self.steps = steps
+        self.weights = [step.get("weight", 1) for step in steps]
+        if not any(self.weights):
+            raise ValueError("workload weights are all zero")
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_options(cls, tool: Optional[str] = None, arguments: Optional[dict] = None,
+                     list_weight: float = 1, call_weight: float = 4, seed: Optional[int] = None) -> "Workload":
+        """tools/list plus, when a tool is given, tools/call of that tool"""
+        steps = [{"method": "tools/list", "weight": list_weight if tool else 1}]
+        if tool:
+            steps.append({"method": "tools/call", "weight": call_weight,
+                          "params": {"name": tool, "arguments": arguments or {}}})
+        return cls(steps, seed)
+
+    @classmethod
+    def from_file(cls, path: str, seed: Optional[int] = None) -> "Workload":
+        """Load steps from a JSON file holding a list of steps"""
+        with open(path) as f:
+            steps = json.load(f)
+        if not isinstance(steps, list):
+            raise ValueError("workload file must contain a JSON list of steps")
+        return cls(steps, seed)
+
+    def choose(self) -> dict:
+        return self.rng.choices(self.steps, self.weights)[0]
+
+
+def label(step: dict) -> str:
+    """Report label for a step: the method, plus the tool name for tools/call"""
+    if step["method"] == "tools/call":
+        return f"tools/call {step.get('params', {}).get('name', '')}".rstrip()
+    return step["method"]
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, Optional[float]]:
+    """Latency percentiles in milliseconds"""
+    if not latencies:
+        return {"count": 0, "mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    values = sorted(latencies)
+
+    def at(q):
+        return round(percentile(values, q) * 1000, 3)
+
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values) * 1000, 3),
+        "p50": at(0.50),
+        "p90": at(0.90),
+        "p99": at(0.99),
+        "max": round(values[-1] * 1000, 3),
+    }
+
+
+async def run_bench(
+    url: str,
+    headers: Optional[dict] = None,
+    workload: Optional[Workload] = None,
+    sessions: int = 1,
+    concurrency: int = 1,
+    rate: Optional[float] = None,
+    duration: Optional[float] = 10.0,
+    requests: Optional[int] = None,
+    timeout: float = 30.0,
+    http_path: Optional[str] = None,
+) -> dict:
+    """
+    Run a load test and return the report.
+
+    Closed loop (no rate): `concurrency` workers each send their next
+    request as soon as the previous one finishes. Open loop: requests
+    start at a fixed `rate` regardless of how many are still in flight,
+    and latency is measured from the scheduled start so server stalls are
+    not hidden by the generator slowing down.
+
+    The run stops after `duration` seconds or `requests` requests,
+    whichever comes first. `url` may be a unix:// URL (see
+    mcp_bridge.upstream).
+    """
+    if sessions < 1 or concurrency < 1:
+        raise ValueError("sessions and concurrency must be at least 1")
+    if rate is not None and rate <= 0:
+        raise ValueError("rate must be positive")
+    if duration is None and requests is None:
+        raise ValueError("set a duration or a number of requests")
+    workload = workload or Workload.from_options()
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, Counter] = defaultdict(Counter)
+    pool = max(sessions, concurrency) if rate is None else max(sessions, 100)
+    limits = httpx.Limits(max_connections=pool, max_keepalive_connections=pool)
+    url, uds = parse_upstream_url(url, http_path)
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(timeout, connect=10.0), limits=limits,
+                                 transport=make_transport(uds, limits)) as client:
+        bench_sessions = [BenchSession(client, url, headers) for _ in range(sessions)]
+        await asyncio.gather(*(session.initialize() for session in bench_sessions))
+
+        started = time.monotonic()
+        deadline = started + duration if duration is not None else None
+        issued = 0
+
+        def more() -> bool:
+            nonlocal issued
+            if requests is not None and issued >= requests:
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            issued += 1
+            return True
+
+        async def one(session: BenchSession, scheduled: float):
+            step = workload.choose()
+            name = label(step)
+            try:
+                await session.request(step["method"], step.get("params"))
+            except Exception as e:
+                errors[name][classify_error(e)] += 1
+            latencies[name].append(time.monotonic() - scheduled)
+
+        if rate is None:
+            async def worker(index: int):
+                session = bench_sessions[index % sessions]
+                while more():
+                    await one(session, time.monotonic())
+
+            await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        else:
+            tasks = []
+            interval = 1.0 / rate
+            while more():
+                scheduled = started + (issued - 1) * interval
+                delay = scheduled - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(one(bench_sessions[(issued - 1) % sessions], scheduled)))
+            await asyncio.gather(*tasks)
+
+        elapsed = time.monotonic() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    total_errors = sum(sum(counter.values()) for counter in errors.values())
+    return {
+        "url": url,
+        "mode": "closed" if rate is None else "open",
+        "sessions": sessions,
+        "concurrency": concurrency if rate is None else None,
+        "target_rate": rate,
+        "duration_s": round(elapsed, 3),
+        "requests": len(all_latencies),
+        "errors": total_errors,
+        "throughput_rps": round(len(all_latencies) / elapsed, 1) if elapsed else None,
+        "success_rps": round((len(all_latencies) - total_errors) / elapsed, 1) if elapsed else None,
+        "latency_ms": latency_stats(all_latencies),
+        "by_request": {
+            name: {"latency_ms": latency_stats(values), "errors": dict(errors.get(name, {}))}
+            for name, values in sorted(latencies.items())
+        },
+    }
+
+
+def format_report(report: dict) -> str:
+    """Human-readable summary of a run_bench report"""
+    if report["mode"] == "closed":
+        mode = f"closed loop, concurrency {report['concurrency']}"
+    else:
+        mode = f"open loop, {report['target_rate']:g} req/s target"
+    lines = [
+        f"{report['url']}: {report['sessions']} session(s), {mode}",
+        f"  {report['requests']} requests in {report['duration_s']:.2f}s: "
+        f"{report['throughput_rps']} req/s ({report['success_rps']} req/s ok), {report['errors']} errors",
+        "",
+        f"  {'request':28} {'count':>7} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  (ms)",
+    ]
+    rows = list(report["by_request"].items()) + [("all", {"latency_ms": report["latency_ms"], "errors": {}})]
+    for name, entry in rows:
+        stats = entry["latency_ms"]
+        if not stats["count"]:
+            continue
+        lines.append(f"  {name[:28]:28} {stats['count']:>7} {stats['mean']:>9.2f} {stats['p50']:>9.2f} "
+                     f"{stats['p90']:>9.2f} {stats['p99']:>9.2f} {stats['max']:>9.2f}")
+    breakdown = [(name, kind, count) for name, entry in report["by_request"].items()
+                 for kind, count in sorted(entry["errors"].items())]
+    if breakdown:
+        lines.append("")
+        lines.append("  Errors:")
+        lines.extend(f"    {name}: {kind} x{count}" for name, kind, count in breakdown)
+    return "\n".join(lines)
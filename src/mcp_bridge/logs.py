@@ -0,0 +1,100 @@
+"""
+Leveled, queue-backed logging for MCP Bridge
+
+Log calls on the event loop only build a LogRecord and put it on a queue.
+Formatting and the stderr write happen on a background listener thread.
+"""
+
+import sys
+import json
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+logger = logging.getLogger("mcp_bridge")
+
+LEVELS = {
+    "quiet": logging.WARNING,
+    "info": logging.INFO,
+    "debug": logging.DEBUG,
+}
+
+FORMATS = ("text", "json")
+
+# Structured fields passed with extra={...} and copied into JSON output
+STRUCTURED_FIELDS = ("request_id", "method", "tool", "duration_ms")
+
+_listener: Optional[QueueListener] = None
+
+
+class TextFormatter(logging.Formatter):
+    """The classic '[Bridge] message' stderr format"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return "[Bridge] " + super().format(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with request ids and durations when present"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "msg": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue records as-is so %-formatting runs on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: str = "info", fmt: str = "text", stream: Optional[TextIO] = None):
+    """
+    Route the bridge's logs through a background thread.
+
+    Args:
+        level: quiet (warnings and errors only), info or debug
+        fmt: text or json
+        stream: Destination, stderr by default
+    """
+    global _listener
+    if level not in LEVELS:
+        raise ValueError(f"Unknown log level '{level}' (expected one of: {', '.join(LEVELS)})")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown log format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+
+    stop_logging()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+    records = queue.SimpleQueue()
+    _listener = QueueListener(records, handler)
+    logger.handlers[:] = [DeferredQueueHandler(records)]
+    logger.setLevel(LEVELS[level])
+    logger.propagate = False
+    _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,331 @@
+"""
+Metrics registry and exporters for MCP Bridge
+"""
+
+import asyncio
+import os
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .logs import logger
+
+# Latency buckets in seconds, from fast local calls to the 60s request timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the exposition format"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], labels: Tuple[str, ...], extra: str = "") -> str:
+    """Render a Prometheus label set"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value without a trailing .0 on whole numbers"""
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Base class for labelled metrics"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Bucketed distribution of observed values"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self.series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, *labels: str, value: float):
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self.series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def quantile(self, q: float, *labels: str) -> Optional[float]:
+        """Estimate a quantile by interpolating within buckets"""
+        series = self.series.get(self._key(labels))
+        if not series:
+            return None
+        counts = series[0]
+        rank = q * sum(counts)
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the bridge's metrics and renders them for exporters"""
+
+    def __init__(self, prefix: str = "mcp_bridge"):
+        self.prefix = prefix
+        self.metrics: Dict[str, Metric] = {}
+
+        self.requests = self.counter("requests_total", "Requests forwarded upstream", ("method", "tool"))
+        self.errors = self.counter("errors_total", "Requests that failed", ("method", "tool"))
+        self.in_flight = self.gauge("in_flight", "Requests currently in flight", ("method",))
+        self.ttfb = self.histogram(
+            "ttfb_seconds", "Time to first byte of the upstream response", ("method", "tool"))
+        self.latency = self.histogram(
+            "latency_seconds", "Total request latency including the SSE stream", ("method", "tool"))
+        self.bytes_sent = self.counter("upstream_bytes_sent_total", "Request body bytes sent upstream")
+        self.bytes_received = self.counter(
+            "upstream_bytes_received_total", "Response bytes received from upstream")
+        self.sse_events = self.counter("sse_events_total", "SSE events relayed to stdout")
+        self.offloaded = self.counter(
+            "offloaded_total", "Large messages decoded and encoded in the offload pool", ("source",))
+        self.spilled = self.counter(
+            "spilled_total", "Messages over the spill threshold streamed through a temporary file", ("source",))
+        self.compression_saved = self.counter(
+            "compression_saved_bytes_total", "Upstream bytes saved by compression", ("direction",))
+
+    def _register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.prefix}_{name}", help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(f"{self.prefix}_{name}", help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.prefix}_{name}", help_text, labelnames, buckets))
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+    def summary(self) -> str:
+        """One-line-per-method summary for the periodic stderr report"""
+        lines = []
+        for (method, tool), count in sorted(self.requests.values.items()):
+            name = f"{method}[{tool}]" if tool else method
+            p50 = self.latency.quantile(0.5, method, tool)
+            p95 = self.latency.quantile(0.95, method, tool)
+            ttfb = self.ttfb.quantile(0.5, method, tool)
+            lines.append(
+                f"  {name}: n={int(count)} err={int(self.errors.get(method, tool))} "
+                f"p50={_format_seconds(p50)} p95={_format_seconds(p95)} ttfb_p50={_format_seconds(ttfb)}"
+            )
+        lines.append(
+            f"  bytes out={int(self.bytes_sent.total())} in={int(self.bytes_received.total())} "
+            f"sse_events={int(self.sse_events.total())} in_flight={int(self.in_flight.total())}"
+        )
+        saved = self.compression_saved.total()
+        if saved:
+            lines[-1] += f" compression_saved={int(saved)}"
+        return "\n".join(lines)
+
+
+def _format_seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}ms"
+
+
+class MetricsExporter:
+    """
+    Serves or writes a registry's metrics according to the `metrics` config.
+
+    Supported options:
+        prometheus_port: Serve /metrics over HTTP on this port
+        prometheus_host: Interface for the HTTP endpoint (default 127.0.0.1)
+        unix_socket: Serve the same HTTP endpoint on a Unix domain socket
+        textfile: Periodically write metrics to this file (atomic replace)
+        textfile_interval: Seconds between textfile writes (default 15)
+        summary_interval: Seconds between stderr summaries (default 60, 0 disables)
+    """
+
+    CONFIG_KEYS = frozenset({
+        "prometheus_port", "prometheus_host", "unix_socket",
+        "textfile", "textfile_interval", "summary_interval",
+    })
+
+    def __init__(self, registry: MetricsRegistry, config: dict):
+        unknown = set(config) - self.CONFIG_KEYS
+        if unknown:
+            raise ValueError(f"Unknown metrics option(s): {', '.join(sorted(unknown))}")
+
+        self.registry = registry
+        self.config = config
+        self._servers = []
+        self._tasks = []
+
+    async def start(self):
+        """Start the configured endpoints and periodic writers"""
+        port = self.config.get("prometheus_port")
+        if port is not None:
+            host = self.config.get("prometheus_host", "127.0.0.1")
+            server = await asyncio.start_server(self._handle, host, port)
+            self._servers.append(server)
+            logger.info("Metrics endpoint: http://%s:%s/metrics", host, port)
+
+        unix_socket = self.config.get("unix_socket")
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            server = await asyncio.start_unix_server(self._handle, unix_socket)
+            self._servers.append(server)
+            logger.info("Metrics socket: %s", unix_socket)
+
+        textfile = self.config.get("textfile")
+        if textfile:
+            interval = self.config.get("textfile_interval", 15)
+            self._tasks.append(asyncio.ensure_future(self._every(interval, self.write_textfile)))
+
+        summary_interval = self.config.get("summary_interval", 60)
+        if summary_interval:
+            self._tasks.append(asyncio.ensure_future(self._every(summary_interval, self.log_summary)))
+
+    async def stop(self):
+        """Stop endpoints and writers, flushing the textfile one last time"""
+        for task in self._tasks:
+            task.cancel()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        if self.config.get("unix_socket") and os.path.exists(self.config["unix_socket"]):
+            os.unlink(self.config["unix_socket"])
+        if self.config.get("textfile"):
+            self.write_textfile()
+
+    def write_textfile(self):
+        """Write metrics for the node_exporter textfile collector"""
+        path = self.config["textfile"]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.registry.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def log_summary(self):
+        logger.info("Metrics summary:\n%s", self.registry.summary())
+
+    async def _every(self, interval: float, callback):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                callback()
+            except Exception as e:
+                logger.warning("Metrics export failed: %s", e)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer any HTTP request with the current metrics"""
+        try:
+            try:
+                await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5.0)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                pass
+            body = self.registry.render_prometheus().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,333 @@
+"""
+Local stand-in for a Streamable-HTTP MCP server
+
+Used by the benchmarks and tests to exercise the bridge without a remote
+server. Latency, result size, SSE event count and failures are set on the
+server and can be overridden per call through tools/call arguments:
+
+    {"name": "payload", "arguments": {"latency": 0.05, "size": 1048576,
+                                      "events": 10, "fail": 503}}
+
+Run standalone with:
+
+    python -m mcp_bridge.mock_server --port 8765 --latency 0.01
+
+Add --compress to gzip responses, including SSE streams, --websocket to
+serve MCP over a WebSocket instead (needs the `websockets` package), or
+--stdio to act as a stdio MCP server for `mcp-bridge serve`.
+"""
+
+import sys
+import json
+import uuid
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from .httpserver import HTTPServer, Request, Response, sse_event
+
+TOOLS = [
+    {
+        "name": "echo",
+        "description": "Return the call arguments as JSON text",
+        "inputSchema": {"type": "object"},
+    },
+    {
+        "name": "payload",
+        "description": "Return a text result of the requested size",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "size": {"type": "integer"},
+                "latency": {"type": "number"},
+                "events": {"type": "integer"},
+                "interval": {"type": "number"},
+                "fail": {"type": "integer"},
+            },
+        },
+    },
+]
+
+_WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+          "incididunt ut labore et dolore magna aliqua temperature humidity forecast").split()
+
+
+def make_text(size: int, seed: int = 0) -> str:
+    """Deterministic word soup of exactly `size` characters"""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+class MockMCPServer:
+    """
+    Stand-in MCP server with configurable behaviour.
+
+    Args:
+        latency: Seconds to wait before sending response headers
+        response_bytes: Size of the text in payload tool results
+        sse_events: Events per tools/call response; all but the last are
+            progress notifications
+        event_interval: Seconds between SSE events
+        failure_rate: Fraction of tools/call requests that fail
+        failure_status: HTTP status used for injected failures
+        seed: Seed for failure injection
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        response_bytes: int = 64,
+        sse_events: int = 1,
+        event_interval: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 500,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.response_bytes = response_bytes
+        self.sse_events = max(1, sse_events)
+        self.event_interval = event_interval
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.rng = random.Random(seed)
+        self.requests = Counter()
+        self.sessions = set()
+        self._texts = {}
+
+    async def handle(self, request: Request) -> Response:
+        if request.method != "POST":
+            return Response(405, {"Allow": "POST"})
+        try:
+            message = json.loads(request.body)
+        except ValueError:
+            return Response(400, {"Content-Type": "text/plain"}, b"Invalid JSON")
+
+        method = message.get("method")
+        self.requests[method or "response"] += 1
+
+        if "id" not in message or method is None:
+            # Notifications and client responses are acknowledged without a body
+            return Response(202)
+
+        if method == "initialize":
+            session_id = uuid.uuid4().hex
+            self.sessions.add(session_id)
+            result = {
+                "protocolVersion": message.get("params", {}).get("protocolVersion", "2024-11-05"),
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "mcp-bridge-mock", "version": "1.0.0"},
+            }
+            return self._sse([{"jsonrpc": "2.0", "id": message["id"], "result": result}],
+                             {"mcp-session-id": session_id})
+
+        if method == "ping":
+            return self._sse([{"jsonrpc": "2.0", "id": message["id"], "result": {}}])
+
+        if method == "tools/list":
+            return self._sse([{"jsonrpc": "2.0", "id": message["id"], "result": {"tools": TOOLS}}])
+
+        if method == "tools/call":
+            return await self._call_tool(message)
+
+        return self._sse([{
+            "jsonrpc": "2.0", "id": message["id"],
+            "error": {"code": -32601, "message": f"Method not found: {method}"},
+        }])
+
+    async def _call_tool(self, message: dict) -> Response:
+        params = message.get("params") or {}
+        name = params.get("name")
+        arguments = params.get("arguments") or {}
+
+        latency = float(arguments.get("latency", self.latency))
+        if latency:
+            await asyncio.sleep(latency)
+
+        fail = arguments.get("fail")
+        if fail is None and self.failure_rate and self.rng.random() < self.failure_rate:
+            fail = self.failure_status
+        if fail:
+            return Response(int(fail), {"Content-Type": "text/plain"}, b"Injected failure")
+
+        if name == "echo":
+            text = json.dumps(arguments)
+        elif name == "payload":
+            text = self._text(int(arguments.get("size", self.response_bytes)))
+        else:
+            return self._sse([{
+                "jsonrpc": "2.0", "id": message["id"],
+                "result": {"content": [{"type": "text", "text": f"Unknown tool: {name}"}], "isError": True},
+            }])
+
+        events = max(1, int(arguments.get("events", self.sse_events)))
+        progress_token = (params.get("_meta") or {}).get("progressToken", message["id"])
+        messages = [
+            {"jsonrpc": "2.0", "method": "notifications/progress",
+             "params": {"progressToken": progress_token, "progress": i + 1, "total": events}}
+            for i in range(events - 1)
+        ]
+        messages.append({
+            "jsonrpc": "2.0", "id": message["id"],
+            "result": {"content": [{"type": "text", "text": text}], "isError": False},
+        })
+        return self._sse(messages, interval=float(arguments.get("interval", self.event_interval)))
+
+    async def answer(self, data, send: Callable[[str], Awaitable[None]]):
+        """
+        Handle one message outside HTTP, as the WebSocket and stdio modes do.
+
+        The message is handled like a POST body, and `send` is called with
+        each message the SSE response would have carried. HTTP failures
+        become JSON-RPC errors for requests.
+        """
+        body = data.encode() if isinstance(data, str) else data
+        response = await self.handle(Request("POST", "/mcp", {"content-type": "application/json"}, body))
+        if response.stream is not None:
+            async for chunk in response.stream:
+                for line in chunk.split(b"\n"):
+                    if line.startswith(b"data: "):
+                        await send(line[6:].decode())
+        elif response.status >= 400:
+            message = json.loads(body)
+            if "id" in message:
+                await send(json.dumps({"jsonrpc": "2.0", "id": message["id"], "error": {
+                    "code": -32603, "message": f"HTTP {response.status}: {response.body.decode()}"}}))
+
+    async def handle_websocket(self, connection):
+        """
+        Serve one WebSocket session.
+
+        Each text frame is answered with text frames. Messages are handled
+        concurrently, so slow calls do not hold up others.
+        """
+        from websockets.exceptions import ConnectionClosed
+
+        async def answer(data):
+            try:
+                await self.answer(data, connection.send)
+            except ConnectionClosed:
+                pass
+
+        tasks = set()
+        async for data in connection:
+            task = asyncio.ensure_future(answer(data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def handle_stdio(self, reader: asyncio.StreamReader, write: Callable[[bytes], None]):
+        """
+        Serve one session as a stdio MCP server: a message per line each way.
+
+        Messages are handled concurrently, so slow calls do not hold up
+        others. Returns when `reader` reaches EOF and every call is answered.
+        """
+
+        async def send(line: str):
+            write(line.encode() + b"\n")
+
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.ensure_future(self.answer(line, send))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _text(self, size: int) -> str:
+        text = self._texts.get(size)
+        if text is None:
+            text = self._texts[size] = make_text(size)
+        return text
+
+    def _sse(self, messages, headers: Optional[dict] = None, interval: float = 0.0) -> Response:
+        async def stream() -> AsyncIterator[bytes]:
+            for index, message in enumerate(messages):
+                if index and interval:
+                    await asyncio.sleep(interval)
+                yield sse_event(message)
+
+        response_headers = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        response_headers.update(headers or {})
+        return Response(200, response_headers, stream=stream())
+
+
+async def serve(args: argparse.Namespace):
+    mock = MockMCPServer(
+        latency=args.latency,
+        response_bytes=args.size,
+        sse_events=args.events,
+        event_interval=args.interval,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        seed=args.seed,
+    )
+    if args.stdio:
+        loop = asyncio.get_event_loop()
+        reader = asyncio.StreamReader(limit=1 << 30)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def write(data: bytes):
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+
+        await mock.handle_stdio(reader, write)
+        return
+
+    if args.websocket:
+        from websockets.asyncio.server import serve as serve_websocket
+        async with serve_websocket(mock.handle_websocket, args.host, args.port,
+                                   subprotocols=["mcp"], max_size=None) as server:
+            port = server.sockets[0].getsockname()[1]
+            print(f"ws://{args.host}:{port}/mcp", flush=True)
+            await asyncio.Event().wait()
+        return
+
+    server = HTTPServer(mock.handle, args.host, args.port, unix_socket=args.unix_socket, compress=args.compress)
+    await server.start()
+    # The first stdout line tells harnesses where to connect
+    print(f"{server.url}/mcp", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in Streamable-HTTP MCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--unix-socket", default=None, help="Listen on a Unix domain socket instead")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before response headers")
+    parser.add_argument("--size", type=int, default=64, help="Bytes of text in payload results")
+    parser.add_argument("--events", type=int, default=1, help="SSE events per tools/call")
+    parser.add_argument("--interval", type=float, default=0.0, help="Seconds between SSE events")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--failure-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--compress", action="store_true", help="gzip responses for clients that accept it")
+    parser.add_argument("--websocket", action="store_true", help="Serve MCP over a WebSocket instead of HTTP")
+    parser.add_argument("--stdio", action="store_true", help="Serve one session over stdin/stdout instead of HTTP")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
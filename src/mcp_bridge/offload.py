@@ -0,0 +1,196 @@
+"""
+Off-loop JSON handling for very large messages
+
+Decoding and re-encoding a tens-of-megabytes JSON-RPC message takes long
+enough to stall every other request and the stdin reader. Messages at or
+above a size threshold are handled in a worker pool instead; smaller ones
+stay inline, where a pool round trip would cost more than it saves.
+
+The default process pool works around the GIL, which the json module
+holds while it runs. Workers receive and return strings and bytes, so
+the event loop only pays for copying them, not for building or
+serialising large objects.
+"""
+
+import json
+import asyncio
+# concurrent.futures.process (and multiprocessing) load only with the pool
+from concurrent.futures import BrokenExecutor, Executor, ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple, Union
+
+from .logs import logger
+
+# 1 MiB: well below the sizes that cause visible stalls, well above
+# ordinary tool results
+DEFAULT_THRESHOLD = 1024 * 1024
+EXECUTORS = ("process", "thread")
+
+
+class EncodedMessage(dict):
+    """
+    A request decoded and re-encoded off the event loop.
+
+    Holds only the envelope (jsonrpc, id, method and the tool name); `body`
+    is the complete, parameter-repaired request ready to send upstream.
+    """
+
+    def __init__(self, envelope: dict, body: bytes):
+        super().__init__(envelope)
+        self.body = body
+
+
+def relay_event(data: Union[str, bytes]) -> Tuple[Any, str]:
+    """
+    Decode an SSE event and encode it for stdout (runs in a worker).
+
+    Returns:
+        The message id and the JSON line to write
+
+    Raises:
+        ValueError: If the event is not valid JSON
+    """
+    try:
+        message = json.loads(data)
+    except json.JSONDecodeError as e:
+        # Re-raised without the document, which would be pickled back whole
+        raise ValueError(str(e)) from None
+    msg_id = message.get("id") if isinstance(message, dict) else None
+    return msg_id, json.dumps(message)
+
+
+def relay_message(data: Union[str, bytes]) -> Tuple[Any, bool, str]:
+    """
+    Like relay_event, also reporting whether the message is a response (runs in a worker).
+
+    Returns:
+        The message id, True for a response (no method), and the JSON line to write
+    """
+    try:
+        message = json.loads(data)
+    except json.JSONDecodeError as e:
+        raise ValueError(str(e)) from None
+    if not isinstance(message, dict):
+        return None, False, json.dumps(message)
+    return message.get("id"), "method" not in message, json.dumps(message)
+
+
+def prepare_request(line: Union[str, bytes]) -> Tuple[dict, bytes, List[str]]:
+    """
+    Decode a stdin line, repair tools/call parameters and encode the request body (runs in a worker).
+
+    Returns:
+        The message envelope, the request body and the repaired parameters
+
+    Raises:
+        ValueError: If the line is not a JSON object
+    """
+    from .bridge import repair_stringified_params
+
+    try:
+        message = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(str(e)) from None
+    if not isinstance(message, dict):
+        raise ValueError("message is not a JSON object")
+
+    fixed_params: List[str] = []
+    envelope = {key: message[key] for key in ("jsonrpc", "id", "method") if key in message}
+    params = message.get("params")
+    if message.get("method") == "tools/call" and isinstance(params, dict):
+        envelope["params"] = {"name": params.get("name")}
+        if isinstance(params.get("arguments"), dict):
+            params["arguments"], fixed_params = repair_stringified_params(params["arguments"])
+    return envelope, json.dumps(message).encode(), fixed_params
+
+
+class Offloader:
+    """
+    Runs JSON work for large messages in a lazily started worker pool.
+
+    Args:
+        threshold: Size in characters at which a message is offloaded
+        executor: "process" (default) or "thread". Threads avoid process
+            start-up but share the GIL with the event loop, so they mostly
+            help parameter repair rather than the JSON codec itself.
+        workers: Pool size
+    """
+
+    CONFIG_KEYS = frozenset({"threshold", "executor", "workers"})
+
+    def __init__(self, threshold: int = DEFAULT_THRESHOLD, executor: str = "process", workers: int = 2):
+        if not isinstance(threshold, int) or threshold < 1:
+            raise ValueError("offload threshold must be a positive integer")
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown offload executor '{executor}' (expected one of: {', '.join(EXECUTORS)})")
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("offload workers must be a positive integer")
+        self.threshold = threshold
+        self.executor = executor
+        self.workers = workers
+        self._pool: Optional[Executor] = None
+
+    @classmethod
+    def from_config(cls, config) -> Optional["Offloader"]:
+        """
+        Build an offloader from the `offload` config option.
+
+        Args:
+            config: True (or missing) for defaults, False to keep
+                everything inline, or a dict with any of the keys
+                threshold, executor, workers
+
+        Returns:
+            A configured Offloader, or None when disabled
+        """
+        if config is False:
+            return None
+        if config is None or config is True:
+            return cls()
+        if not isinstance(config, dict):
+            raise ValueError("offload must be true, false or an object")
+        unknown = set(config) - cls.CONFIG_KEYS
+        if unknown:
+            raise ValueError(f"Unknown offload option(s): {', '.join(sorted(unknown))}")
+        return cls(**config)
+
+    def should_offload(self, size: int) -> bool:
+        return size >= self.threshold
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.executor == "process":
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # spawn: forking a process that runs threads is unsafe
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="mcp-bridge-offload")
+        return self._pool
+
+    async def run(self, func, arg):
+        """Run func(arg) in the pool, inline if the pool has broken"""
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(self._get_pool(), func, arg)
+        except BrokenExecutor as e:
+            logger.warning("Offload pool failed (%s); restarting it", e)
+            self._pool.shutdown(wait=False)
+            self._pool = None
+            return func(arg)
+
+    async def relay_event(self, data: Union[str, bytes]) -> Tuple[Any, str]:
+        return await self.run(relay_event, data)
+
+    async def relay_message(self, data: Union[str, bytes]) -> Tuple[Any, bool, str]:
+        return await self.run(relay_message, data)
+
+    async def prepare_request(self, line: Union[str, bytes]) -> EncodedMessage:
+        envelope, body, fixed_params = await self.run(prepare_request, line)
+        if fixed_params:
+            logger.info("Fixed stringified params: %s", ', '.join(fixed_params))
+        return EncodedMessage(envelope, body)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,171 @@
+"""
+Traffic capture for MCP Bridge
+
+Records everything that passes through the bridge as JSON lines with
+monotonic timestamps (seconds since the recording started):
+
+    {"t": 0.0, "kind": "start", "version": 1, "url": "...", "started": 1760000000.0}
+    {"t": 0.01, "kind": "stdin", "message": {...}}
+    {"t": 0.011, "kind": "request", "seq": 1, "method": "tools/call", "id": 3, "body": {...}}
+    {"t": 0.052, "kind": "response", "seq": 1, "status": 200, "headers": {...}}
+    {"t": 0.053, "kind": "sse", "seq": 1, "data": "{...}"}
+    {"t": 0.053, "kind": "stdout", "message": {...}}
+    {"t": 0.054, "kind": "end", "seq": 1}
+
+Upstream exchanges are numbered with `seq` so requests without an id
+(notifications) can be told apart. Request headers are never recorded;
+message bodies are recorded verbatim, so treat recordings like logs.
+"""
+
+import codecs
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FORMAT_VERSION = 1
+
+# Response headers replay needs; everything else is dropped
+RECORDED_RESPONSE_HEADERS = ("content-type", "mcp-session-id")
+
+
+class Recorder:
+    """Appends captured traffic to a JSON lines file"""
+
+    def __init__(self, path: str, url: Optional[str] = None):
+        self.path = path
+        self._start = time.monotonic()
+        self._seq = 0
+        # Line buffered so a recording survives the bridge being killed
+        self._file = open(path, "w", buffering=1)
+        self.record("start", version=FORMAT_VERSION, url=url, started=time.time())
+
+    def next_seq(self) -> int:
+        """Number for the next upstream exchange"""
+        self._seq += 1
+        return self._seq
+
+    def _prefix(self, kind: str, at: Optional[float]) -> str:
+        t = (time.monotonic() if at is None else at) - self._start
+        return '{"t": %.6f, "kind": %s' % (t, json.dumps(kind))
+
+    def record(self, kind: str, at: Optional[float] = None, **fields):
+        """Record an event; `at` is a time.monotonic() value, default now"""
+        if self._file.closed:
+            return
+        line = self._prefix(kind, at)
+        if fields:
+            line += ", " + json.dumps(fields)[1:-1]
+        self._file.write(line + "}\n")
+
+    def record_encoded(self, kind: str, field: str, encoded: str, at: Optional[float] = None, **fields):
+        """Record an event with one field that is already JSON-encoded text"""
+        if self._file.closed:
+            return
+        line = self._prefix(kind, at)
+        if fields:
+            line += ", " + json.dumps(fields)[1:-1]
+        self._file.write("%s, %s: %s}\n" % (line, json.dumps(field), encoded))
+
+    def record_file(self, kind: str, field: str, chunks: Iterable[bytes], at: Optional[float] = None, **fields):
+        """Record an event with one field whose JSON text is streamed in chunks (a spooled message)"""
+        if self._file.closed:
+            return
+        line = self._prefix(kind, at)
+        if fields:
+            line += ", " + json.dumps(fields)[1:-1]
+        self._file.write("%s, %s: " % (line, json.dumps(field)))
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        for chunk in chunks:
+            self._file.write(decoder.decode(chunk))
+        self._file.write(decoder.decode(b"", final=True) + "}\n")
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class Exchange:
+    """One recorded upstream request and its response"""
+
+    def __init__(self, seq: int, method: Optional[str], msg_id, body: dict, sent: float):
+        self.seq = seq
+        self.method = method
+        self.msg_id = msg_id
+        self.body = body
+        self.sent = sent
+        self.status: Optional[int] = None
+        self.headers: Dict[str, str] = {}
+        self.responded: Optional[float] = None
+        self.events: List[Tuple[float, str]] = []
+        self.ended: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def finished(self) -> float:
+        """Time the exchange completed, however it ended"""
+        times = [self.sent, self.responded, self.ended] + [t for t, _ in self.events[-1:]]
+        return max(t for t in times if t is not None)
+
+
+class Recording:
+    """A loaded capture file"""
+
+    def __init__(self):
+        self.header: dict = {}
+        self.stdin: List[Tuple[float, dict]] = []
+        self.stdout: List[Tuple[float, dict]] = []
+        self.exchanges: List[Exchange] = []
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        recording = cls()
+        exchanges: Dict[int, Exchange] = {}
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # A bridge killed mid-write leaves a partial last line
+                    continue
+                kind = event.get("kind")
+                t = event.get("t", 0.0)
+                if kind == "start":
+                    if event.get("version") != FORMAT_VERSION:
+                        raise ValueError(f"Unsupported recording version: {event.get('version')}")
+                    recording.header = event
+                elif kind == "stdin":
+                    recording.stdin.append((t, event["message"]))
+                elif kind == "stdout":
+                    recording.stdout.append((t, event["message"]))
+                elif kind == "request":
+                    exchange = Exchange(event["seq"], event.get("method"), event.get("id"), event["body"], t)
+                    exchanges[exchange.seq] = exchange
+                    recording.exchanges.append(exchange)
+                elif event.get("seq") in exchanges:
+                    exchange = exchanges[event["seq"]]
+                    if kind == "response":
+                        exchange.status = event["status"]
+                        exchange.headers = event.get("headers", {})
+                        exchange.responded = t
+                    elif kind == "sse":
+                        # Spooled events are recorded as a message rather than a string
+                        data = event["data"] if "data" in event else json.dumps(event["message"])
+                        exchange.events.append((t, data))
+                    elif kind == "end":
+                        exchange.ended = t
+                    elif kind == "error":
+                        exchange.error = event.get("error")
+        if not recording.header:
+            raise ValueError(f"Not a bridge recording: {path}")
+        return recording
+
+    def responses(self) -> Dict[str, Tuple[float, dict]]:
+        """First stdout response for each request id, keyed by the JSON-encoded id"""
+        responses = {}
+        for t, message in self.stdout:
+            if "method" not in message and "id" in message:
+                responses.setdefault(json.dumps(message["id"]), (t, message))
+        return responses
@@ -0,0 +1,230 @@
+"""
+Deterministic replay of recorded bridge traffic
+
+A recording made with `mcp-bridge --record FILE` can be used two ways:
+
+- RecordedUpstream serves the recorded upstream responses over HTTP,
+  with the recorded time to first byte and SSE event spacing, so a
+  bridge can be pointed at it instead of a live server.
+- replay_through_bridge starts a RecordedUpstream and a bridge process,
+  feeds the recorded stdin messages at their original times (optionally
+  sped up) and compares latencies and responses with the recording.
+"""
+
+import os
+import json
+import time
+import asyncio
+import tempfile
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .harness import BridgeProcess, bridge_command
+from .httpserver import HTTPServer, Request, Response
+from .logs import logger
+from .recording import Exchange, Recording
+from .stats import percentile
+
+
+def scaled(delay: float, speed: float) -> float:
+    """Delay after applying a speed multiplier; speed 0 means no delay at all"""
+    if speed <= 0 or delay <= 0:
+        return 0.0
+    return delay / speed
+
+
+class RecordedUpstream:
+    """
+    Stand-in upstream that answers with recorded responses.
+
+    Requests are matched to recorded exchanges by method and JSON-RPC id,
+    falling back to the next unused exchange for the method, so replays
+    stay deterministic when a client renumbers its requests.
+
+    Args:
+        recording: Loaded recording
+        speed: Multiplier for recorded upstream delays; 0 answers immediately
+    """
+
+    def __init__(self, recording: Recording, speed: float = 1.0):
+        self.speed = speed
+        self.matched = 0
+        self.unmatched = 0
+        self._by_id: Dict[Tuple[Optional[str], str], Deque[Exchange]] = defaultdict(deque)
+        self._by_method: Dict[Optional[str], Deque[Exchange]] = defaultdict(deque)
+        self._used = set()
+        for exchange in recording.exchanges:
+            self._by_id[(exchange.method, json.dumps(exchange.msg_id))].append(exchange)
+            self._by_method[exchange.method].append(exchange)
+
+    def _take(self, queue: Deque[Exchange]) -> Optional[Exchange]:
+        while queue:
+            exchange = queue.popleft()
+            if exchange.seq not in self._used:
+                self._used.add(exchange.seq)
+                return exchange
+        return None
+
+    def match(self, message: dict) -> Optional[Exchange]:
+        """Claim the recorded exchange for an incoming message"""
+        method = message.get("method")
+        exchange = self._take(self._by_id[(method, json.dumps(message.get("id")))])
+        if exchange is None:
+            exchange = self._take(self._by_method[method])
+        return exchange
+
+    async def handle(self, request: Request) -> Response:
+        if request.method != "POST":
+            return Response(405, {"Allow": "POST"})
+        try:
+            message = json.loads(request.body)
+        except ValueError:
+            return Response(400, {"Content-Type": "text/plain"}, b"Invalid JSON")
+
+        exchange = self.match(message)
+        if exchange is None:
+            self.unmatched += 1
+            logger.warning("No recorded response for %s (id=%s)", message.get("method"), message.get("id"))
+            if "id" not in message:
+                return Response(202)
+            error = {"jsonrpc": "2.0", "id": message["id"],
+                     "error": {"code": -32603, "message": "No recorded response"}}
+            return Response(200, {"Content-Type": "text/event-stream"},
+                            b"event: message\ndata: " + json.dumps(error).encode() + b"\n\n")
+        self.matched += 1
+
+        if exchange.status is None:
+            # The recorded request never got a response (timeout, connection error)
+            await asyncio.sleep(scaled(exchange.finished - exchange.sent, self.speed))
+            return Response(504, {"Content-Type": "text/plain"},
+                            f"Recorded failure: {exchange.error}".encode())
+
+        await asyncio.sleep(scaled(exchange.responded - exchange.sent, self.speed))
+        headers = dict(exchange.headers)
+        if exchange.status >= 400:
+            return Response(exchange.status, {"Content-Type": "text/plain"},
+                            f"Recorded failure: {exchange.error}".encode())
+        if not exchange.events:
+            return Response(exchange.status, headers)
+
+        async def stream():
+            previous = exchange.responded
+            for t, data in exchange.events:
+                await asyncio.sleep(scaled(t - previous, self.speed))
+                previous = t
+                yield b"event: message\ndata: " + data.encode() + b"\n\n"
+
+        return Response(exchange.status, headers, stream=stream())
+
+
+def bridge_env() -> dict:
+    """Environment that lets a bridge subprocess import this copy of the package"""
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    return env
+
+
+async def replay_through_bridge(
+    recording: Recording,
+    speed: float = 1.0,
+    upstream_speed: Optional[float] = None,
+    bridge_config: Optional[dict] = None,
+    bridge_cmd: Optional[List[str]] = None,
+) -> dict:
+    """
+    Replay recorded stdin traffic through a bridge process against a RecordedUpstream.
+
+    Args:
+        recording: Loaded recording
+        speed: Multiplier for stdin pacing; 0 sends everything at once
+        upstream_speed: Multiplier for upstream delays (default: same as speed)
+        bridge_config: Config settings for the replayed bridge; the url is replaced
+        bridge_cmd: Bridge command (default: this installation)
+
+    Returns:
+        Per-request results and a summary
+    """
+    upstream = RecordedUpstream(recording, speed if upstream_speed is None else upstream_speed)
+    recorded = recording.responses()
+    results = []
+
+    async with HTTPServer(upstream.handle) as server:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = os.path.join(tmp, "replay.json")
+            with open(config_path, "w") as f:
+                json.dump({**(bridge_config or {}), "url": f"{server.url}/mcp"}, f)
+
+            bridge = BridgeProcess(bridge_command(config_path, ["--log-level", "quiet"], bridge_cmd), bridge_env())
+            await bridge.start()
+            try:
+                origin = recording.stdin[0][0] if recording.stdin else 0.0
+                started = time.monotonic()
+                pending = []
+                for t, message in recording.stdin:
+                    delay = started + scaled(t - origin, speed) - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    future = bridge.send(message)
+                    await bridge.process.stdin.drain()
+                    if future is not None:
+                        pending.append((t, time.monotonic(), message, future))
+                    if message.get("method") == "initialize" and future is not None:
+                        # Like a real client, wait for the session before continuing
+                        await future
+
+                for t, sent, message, future in pending:
+                    key = json.dumps(message["id"])
+                    result = {"id": message["id"], "method": message.get("method"),
+                              "recorded_ms": None, "replay_ms": None, "matches": False}
+                    if key in recorded:
+                        result["recorded_ms"] = round((recorded[key][0] - t) * 1000, 3)
+                    try:
+                        received, response = await asyncio.wait_for(future, timeout=60.0)
+                    except (asyncio.TimeoutError, ConnectionError):
+                        results.append(result)
+                        continue
+                    result["replay_ms"] = round((received - sent) * 1000, 3)
+                    result["matches"] = key in recorded and recorded[key][1] == response
+                    results.append(result)
+            finally:
+                await bridge.stop()
+
+    answered = [r for r in results if r["replay_ms"] is not None]
+    # initialize also waits for the bridge process to start, so it is left
+    # out of the latency summaries
+    timed = [r for r in results if r["method"] != "initialize"]
+    return {
+        "requests": results,
+        "summary": {
+            "requests": len(results),
+            "missing": len(results) - len(answered),
+            "mismatched": sum(1 for r in answered if not r["matches"]),
+            "unmatched_upstream": upstream.unmatched,
+            "recorded_ms": latency_summary([r["recorded_ms"] for r in timed if r["recorded_ms"] is not None]),
+            "replay_ms": latency_summary([r["replay_ms"] for r in timed if r["replay_ms"] is not None]),
+        },
+    }
+
+
+def latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    """Mean, median, p95 and max of latencies in milliseconds"""
+    if not values:
+        return {"mean": None, "p50": None, "p95": None, "max": None}
+    values = sorted(values)
+    return {
+        "mean": round(sum(values) / len(values), 3),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "max": values[-1],
+    }
+
+
+async def serve_recording(recording: Recording, host: str = "127.0.0.1", port: int = 0,
+                          unix_socket: Optional[str] = None, speed: float = 1.0):
+    """Serve a recording as the upstream until cancelled"""
+    upstream = RecordedUpstream(recording, speed)
+    async with HTTPServer(upstream.handle, host, port, unix_socket=unix_socket) as server:
+        # The first stdout line tells harnesses where to connect
+        print(f"{server.url}/mcp", flush=True)
+        await asyncio.Event().wait()
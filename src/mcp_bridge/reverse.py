@@ -0,0 +1,501 @@
+"""
+Reverse bridge: serve a stdio MCP server over Streamable HTTP
+
+`mcp-bridge serve -- COMMAND ...` is the bridge turned around. It starts
+a pool of stdio MCP server processes and serves them as one HTTP/SSE
+endpoint that many remote clients share:
+
+- Each worker process is started and initialized once, up front. A
+  client's `initialize` is answered from the worker's cached result, so
+  new sessions cost no process start and no server round trip.
+- Each session is pinned to the worker with the fewest sessions and
+  keeps its `mcp-session-id` until it is deleted or its worker exits.
+- Requests from all sessions on a worker are pipelined over its stdin.
+  Ids (and progress tokens) are rewritten to worker-unique ids on the
+  way in and restored on the way out, so sessions cannot collide.
+- Each request's response streams back as SSE, preceded by its progress
+  notifications. Other server messages (requests such as sampling, log
+  notifications) only go to the session they belong to: the session of
+  the request they refer to, or the worker's only session. With several
+  sessions on the worker and no reference, they are dropped, and server
+  requests are answered with an error. A reply to a server request is
+  only accepted from the session it was sent to.
+
+A worker that exits is replaced. Its requests in flight get a JSON-RPC
+error and its sessions end, so their clients get 404 and re-initialize.
+"""
+
+import json
+import time
+import uuid
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from . import __version__
+from .httpserver import HTTPServer, Request, Response, sse_event
+from .logs import logger
+from .spool import DEFAULT_MAX_MESSAGE_BYTES
+
+PROTOCOL_VERSION = "2024-11-05"
+SESSION_HEADER = "mcp-session-id"
+
+# Seconds to wait for a new worker's initialize response
+INITIALIZE_TIMEOUT = 30.0
+
+# Seconds a request may wait on its worker: to accept it, and between
+# messages on its stream (progress notifications keep a long call alive)
+REQUEST_TIMEOUT = 60.0
+
+# Workers that exit sooner than this after starting are restarted after a
+# pause, so a server that crashes on start-up does not spin
+RESPAWN_DELAY = 1.0
+
+SSE_HEADERS = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+
+
+def _key(msg_id) -> str:
+    """Dictionary key for a JSON-RPC id, keeping 1 and "1" apart"""
+    return json.dumps(msg_id)
+
+
+class Session:
+    """A client session pinned to one worker"""
+
+    def __init__(self, session_id: str, worker: "StdioWorker"):
+        self.id = session_id
+        self.worker = worker
+        # Client request id key -> worker-side id, for cancellations
+        self.requests: Dict[str, int] = {}
+        # Ids (keys) of server requests sent to this session and not yet answered
+        self.server_requests: Set[str] = set()
+
+
+class PendingRequest:
+    """A request waiting for its response from a worker"""
+
+    __slots__ = ("worker_id", "session", "msg_id", "progress_token", "events")
+
+    def __init__(self, worker_id: int, session: Optional[Session], msg_id, progress_token=None):
+        self.worker_id = worker_id
+        self.session = session
+        self.msg_id = msg_id
+        self.progress_token = progress_token
+        # Messages for the client, ending with the response
+        self.events: asyncio.Queue = asyncio.Queue()
+
+
+class StdioWorker:
+    """
+    One stdio MCP server process shared by several sessions.
+
+    Args:
+        command: Server command line
+        index: Position in the pool, used in log messages
+        env: Environment for the process (default: inherited)
+    """
+
+    def __init__(self, command: List[str], index: int = 0, env: Optional[dict] = None):
+        self.command = command
+        self.index = index
+        self.env = env
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.sessions: Dict[str, Session] = {}
+        self.pending: Dict[int, PendingRequest] = {}
+        self.initialize_result: Optional[dict] = None
+        self.started = 0.0
+        self.exited: Optional[asyncio.Future] = None
+        self._next_id = 0
+        self._reader: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.exited is not None and not self.exited.done()
+
+    async def start(self):
+        """Start the process and initialize it; raises RuntimeError if it cannot be"""
+        self.started = time.monotonic()
+        self.exited = asyncio.get_event_loop().create_future()
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=self.env,
+            # Tool results can be very large single lines
+            limit=DEFAULT_MAX_MESSAGE_BYTES,
+        )
+        self._reader = asyncio.ensure_future(self._read())
+
+        pending = await self.submit(None, {"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "mcp-bridge", "version": __version__},
+        }})
+        try:
+            response = await asyncio.wait_for(pending.events.get(), INITIALIZE_TIMEOUT)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise RuntimeError(f"worker {self.index}: no initialize response "
+                               f"within {INITIALIZE_TIMEOUT:.0f}s") from None
+        if "result" not in response:
+            await self.stop()
+            raise RuntimeError(f"worker {self.index}: initialize failed: "
+                               f"{response.get('error', {}).get('message', response)}")
+        self.initialize_result = response["result"]
+        await self.send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        logger.info("Worker %d started (pid %d)", self.index, self.process.pid)
+
+    async def send(self, message: dict):
+        """Write a message to the server's stdin"""
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        await self.process.stdin.drain()
+
+    async def submit(self, session: Optional[Session], message: dict) -> PendingRequest:
+        """
+        Forward a request under a worker-side id.
+
+        The progress token, if any, is replaced with the same id, so
+        progress notifications can be routed back like responses.
+        """
+        self._next_id += 1
+        worker_id = self._next_id
+        message = dict(message)
+        params = message.get("params")
+        progress_token = None
+        if isinstance(params, dict) and isinstance(params.get("_meta"), dict) and "progressToken" in params["_meta"]:
+            progress_token = params["_meta"]["progressToken"]
+            message["params"] = {**params, "_meta": {**params["_meta"], "progressToken": worker_id}}
+
+        pending = PendingRequest(worker_id, session, message.get("id"), progress_token)
+        self.pending[worker_id] = pending
+        if session is not None:
+            session.requests[_key(pending.msg_id)] = worker_id
+        message["id"] = worker_id
+        try:
+            await self.send(message)
+        except ConnectionError:
+            # The reader answers it with an error when it sees the exit
+            pass
+        except asyncio.CancelledError:
+            # Timed out waiting for the server to read its input
+            self.forget(worker_id)
+            raise
+        return pending
+
+    def end_session(self, session: Session):
+        """Drop a session, refusing the server requests it never answered"""
+        self.sessions.pop(session.id, None)
+        for key in session.server_requests:
+            self._refuse(json.loads(key), "The client session ended")
+        session.server_requests.clear()
+
+    def forget(self, worker_id: int):
+        """Stop waiting for a request's response"""
+        pending = self.pending.pop(worker_id, None)
+        if pending is not None and pending.session is not None:
+            pending.session.requests.pop(_key(pending.msg_id), None)
+
+    async def cancel(self, worker_id: int, reason: str):
+        """Tell the server to stop working on a request nobody is waiting for"""
+        if worker_id not in self.pending:
+            return
+        self.forget(worker_id)
+        if self.alive:
+            try:
+                await self.send({"jsonrpc": "2.0", "method": "notifications/cancelled",
+                                 "params": {"requestId": worker_id, "reason": reason}})
+            except ConnectionError:
+                pass
+
+    async def _read(self):
+        stdout = self.process.stdout
+        try:
+            while True:
+                try:
+                    line = await stdout.readline()
+                except ValueError:
+                    logger.warning("Worker %d: message over %d bytes dropped", self.index, DEFAULT_MAX_MESSAGE_BYTES)
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError as e:
+                    logger.warning("Worker %d: invalid JSON: %s", self.index, e)
+                    continue
+                if isinstance(message, dict):
+                    self._route(message)
+        finally:
+            returncode = await self.process.wait()
+            logger.warning("Worker %d exited with code %s", self.index, returncode)
+            pending, self.pending = self.pending, {}
+            for request in pending.values():
+                request.events.put_nowait({"jsonrpc": "2.0", "id": request.msg_id, "error": {
+                    "code": -32603, "message": f"MCP server process exited with code {returncode}"}})
+            if not self.exited.done():
+                self.exited.set_result(returncode)
+
+    def _route(self, message: dict):
+        """Hand a server message to the request it belongs to"""
+        if "method" not in message:
+            pending = self.pending.get(message.get("id"))
+            if pending is None:
+                logger.debug("Worker %d: response to unknown id %s", self.index, message.get("id"))
+                return
+            self.forget(message["id"])
+            pending.events.put_nowait({**message, "id": pending.msg_id})
+            return
+
+        method = message["method"]
+        params = message.get("params")
+        if not isinstance(params, dict):
+            params = {}
+        meta = params.get("_meta") if isinstance(params.get("_meta"), dict) else {}
+        # A progress token or request id naming one of our requests ties
+        # the message to that request's session
+        related = None
+        for reference in (params.get("progressToken"), meta.get("progressToken"), params.get("requestId")):
+            if isinstance(reference, int) and reference in self.pending:
+                related = self.pending[reference]
+                break
+
+        if related is not None and related.session is not None:
+            if method == "notifications/progress":
+                token = related.progress_token if related.progress_token is not None else related.msg_id
+                message = {**message, "params": {**params, "progressToken": token}}
+            elif method == "notifications/cancelled":
+                message = {**message, "params": {**params, "requestId": related.msg_id}}
+            target = related
+        else:
+            # Without a reference, only a worker's only session can be the one
+            session = next(iter(self.sessions.values())) if len(self.sessions) == 1 else None
+            target = next((pending for pending in self.pending.values() if pending.session is session), None)
+            if session is None or target is None:
+                logger.debug("Worker %d: %s dropped, no session to send it to", self.index, method)
+                if "id" in message:
+                    self._refuse(message["id"], "No client session can handle this request")
+                return
+
+        if "id" in message:
+            target.session.server_requests.add(_key(message["id"]))
+        target.events.put_nowait(message)
+
+    def _refuse(self, msg_id, reason: str):
+        """Answer a server request with an error so the server does not wait for it"""
+        if not self.alive:
+            return
+        error = {"jsonrpc": "2.0", "id": msg_id, "error": {"code": -32603, "message": reason}}
+        # Written without draining: _route runs on the reader, which must not block
+        self.process.stdin.write(json.dumps(error).encode() + b"\n")
+
+    async def stop(self, timeout: float = 5.0):
+        """Close stdin and wait for the process to exit, killing it if it does not"""
+        if self.process is None:
+            return
+        if self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                self.process.kill()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class ReverseBridge:
+    """
+    Serve a pool of stdio MCP server processes as one Streamable-HTTP endpoint.
+
+    Args:
+        command: Server command line
+        workers: Number of server processes
+        path: HTTP path of the MCP endpoint
+        env: Environment for the server processes (default: inherited)
+        timeout: Seconds a request may wait on its worker before it fails
+    """
+
+    def __init__(self, command: List[str], workers: int = 1, path: str = "/mcp", env: Optional[dict] = None,
+                 timeout: float = REQUEST_TIMEOUT):
+        if not command:
+            raise ValueError("A server command is required")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.command = list(command)
+        self.path = path
+        self.env = env
+        self.timeout = timeout
+        self.workers = [StdioWorker(self.command, index, env) for index in range(workers)]
+        self.sessions: Dict[str, Session] = {}
+        self._closing = False
+        self._watchers: List[asyncio.Task] = []
+
+    async def start(self):
+        """Start every worker; raises if any fails to start"""
+        try:
+            await asyncio.gather(*(worker.start() for worker in self.workers))
+        except BaseException:
+            await asyncio.gather(*(worker.stop() for worker in self.workers), return_exceptions=True)
+            raise
+        self._watchers = [asyncio.ensure_future(self._watch(index)) for index in range(len(self.workers))]
+
+    async def close(self):
+        self._closing = True
+        for watcher in self._watchers:
+            watcher.cancel()
+        await asyncio.gather(*self._watchers, return_exceptions=True)
+        await asyncio.gather(*(worker.stop() for worker in self.workers), return_exceptions=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _watch(self, index: int):
+        """Replace the worker at `index` whenever it exits"""
+        while True:
+            worker = self.workers[index]
+            await asyncio.shield(worker.exited)
+            for session_id in worker.sessions:
+                self.sessions.pop(session_id, None)
+            if worker.sessions:
+                logger.warning("Worker %d: %d session(s) ended", index, len(worker.sessions))
+            worker.sessions.clear()
+
+            while not self._closing:
+                if time.monotonic() - worker.started < RESPAWN_DELAY:
+                    await asyncio.sleep(RESPAWN_DELAY)
+                worker = StdioWorker(self.command, index, self.env)
+                try:
+                    await worker.start()
+                except asyncio.CancelledError:
+                    await worker.stop()
+                    raise
+                except Exception as e:
+                    logger.error("Worker %d failed to restart: %s", index, e)
+                    continue
+                self.workers[index] = worker
+                break
+
+    async def handle(self, request: Request) -> Response:
+        if request.path != self.path:
+            return Response(404, {"Content-Type": "text/plain"}, b"Not found")
+        if request.method == "DELETE":
+            session = self.sessions.pop(request.headers.get(SESSION_HEADER, ""), None)
+            if session is None:
+                return Response(404, {"Content-Type": "text/plain"}, b"Unknown session")
+            session.worker.end_session(session)
+            return Response(200)
+        if request.method != "POST":
+            return Response(405, {"Allow": "POST, DELETE"})
+
+        try:
+            message = json.loads(request.body)
+        except ValueError:
+            return Response(400, {"Content-Type": "text/plain"}, b"Invalid JSON")
+        if not isinstance(message, dict):
+            return Response(400, {"Content-Type": "text/plain"}, b"Expected a single JSON-RPC message")
+        method = message.get("method")
+
+        if method == "initialize":
+            return self._initialize(message)
+
+        session_id = request.headers.get(SESSION_HEADER)
+        if not session_id:
+            return Response(400, {"Content-Type": "text/plain"}, b"Missing mcp-session-id header")
+        session = self.sessions.get(session_id)
+        if session is None or not session.worker.alive:
+            return Response(404, {"Content-Type": "text/plain"}, b"Unknown session")
+        worker = session.worker
+
+        if method is None:
+            # A reply to a server request: only from the session it was sent to
+            key = _key(message.get("id"))
+            if key not in session.server_requests:
+                return Response(400, {"Content-Type": "text/plain"}, b"No server request with this id in this session")
+            session.server_requests.discard(key)
+            return await self._notify(worker, message)
+
+        if "id" not in message:
+            if method == "notifications/initialized":
+                # The worker was initialized when it started
+                return Response(202)
+            if method == "notifications/cancelled" and isinstance(message.get("params"), dict):
+                worker_id = session.requests.get(_key(message["params"].get("requestId")))
+                if worker_id is None:
+                    return Response(202)
+                worker.forget(worker_id)
+                message = {**message, "params": {**message["params"], "requestId": worker_id}}
+            return await self._notify(worker, message)
+
+        try:
+            pending = await asyncio.wait_for(worker.submit(session, message), self.timeout)
+        except asyncio.TimeoutError:
+            return self._busy(worker)
+        return Response(200, dict(SSE_HEADERS), stream=self._stream(worker, pending))
+
+    async def _notify(self, worker: StdioWorker, message: dict) -> Response:
+        """Forward a message that gets no response"""
+        try:
+            await asyncio.wait_for(worker.send(message), self.timeout)
+        except ConnectionError:
+            return Response(404, {"Content-Type": "text/plain"}, b"Unknown session")
+        except asyncio.TimeoutError:
+            return self._busy(worker)
+        return Response(202)
+
+    def _busy(self, worker: StdioWorker) -> Response:
+        logger.warning("Worker %d has not read its input for %gs", worker.index, self.timeout)
+        return Response(503, {"Content-Type": "text/plain"}, b"MCP server is not reading requests")
+
+    def _initialize(self, message: dict) -> Response:
+        live = [worker for worker in self.workers if worker.alive]
+        if not live:
+            return Response(503, {"Content-Type": "text/plain"}, b"No MCP server process available")
+        worker = min(live, key=lambda candidate: len(candidate.sessions))
+        session = Session(uuid.uuid4().hex, worker)
+        worker.sessions[session.id] = session
+        self.sessions[session.id] = session
+        logger.debug("Session %s on worker %d", session.id, worker.index)
+
+        response = {"jsonrpc": "2.0", "id": message.get("id"), "result": worker.initialize_result}
+
+        async def stream():
+            yield sse_event(response)
+
+        return Response(200, {**SSE_HEADERS, SESSION_HEADER: session.id}, stream=stream())
+
+    async def _stream(self, worker: StdioWorker, pending: PendingRequest):
+        """SSE events for one request, ending with its response"""
+        done = False
+        reason = "HTTP client disconnected"
+        try:
+            while not done:
+                try:
+                    message = await asyncio.wait_for(pending.events.get(), self.timeout)
+                except asyncio.TimeoutError:
+                    reason = f"No response within {self.timeout:g}s"
+                    logger.warning("Worker %d: request %d timed out", worker.index, pending.worker_id)
+                    yield sse_event({"jsonrpc": "2.0", "id": pending.msg_id,
+                                     "error": {"code": -32603, "message": f"{reason} from the MCP server"}})
+                    return
+                done = "method" not in message and message.get("id") == pending.msg_id
+                yield sse_event(message)
+        finally:
+            if not done:
+                # The client went away, or the worker never answered
+                await worker.cancel(pending.worker_id, reason)
+
+
+async def serve_stdio(command: List[str], workers: int = 1, host: str = "127.0.0.1", port: int = 0,
+                      unix_socket: Optional[str] = None, path: str = "/mcp", timeout: float = REQUEST_TIMEOUT,
+                      max_body_bytes: int = DEFAULT_MAX_MESSAGE_BYTES):
+    """Serve a stdio MCP server command over HTTP until cancelled"""
+    async with ReverseBridge(command, workers, path, timeout=timeout) as bridge:
+        async with HTTPServer(bridge.handle, host, port, unix_socket=unix_socket,
+                              max_body_bytes=max_body_bytes) as server:
+            # The first stdout line tells clients where to connect
+            print(f"{server.url}{path}", flush=True)
+            await asyncio.Event().wait()
@@ -0,0 +1,163 @@
+"""
+Bridge run path for MCP Bridge
+
+Config lookup and the code that runs a bridge. Kept free of click so the
+shim entry point can start a bridge without loading the full CLI.
+"""
+
+import sys
+import json
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+from .logs import configure_logging, logger, stop_logging
+
+def find_config_path(config_name: Optional[str] = None) -> Path:
+    """
+    Find configuration file in order of precedence:
+    1. Explicit path (if provided and exists)
+    2. ~/.config/mcp-bridge/<config_name or config.json>
+    3. Current directory config.json (for backward compat)
+    4. Old location: mcp_http_bridge/config.json (deprecated)
+    """
+    
+    # 1. Explicit path provided
+    if config_name:
+        explicit_path = Path(config_name)
+        if explicit_path.is_absolute() and explicit_path.exists():
+            return explicit_path
+    
+    # 2. Check user config directory
+    config_dir = Path.home() / ".config" / "mcp-bridge"
+    if config_name:
+        # Look for named config in config directory
+        config_path = config_dir / config_name
+        if config_path.exists():
+            return config_path
+        # Also try with .json extension if not provided
+        if not config_name.endswith('.json'):
+            config_path = config_dir / f"{config_name}.json"
+            if config_path.exists():
+                return config_path
+    else:
+        # Look for default config.json
+        default_config = config_dir / "config.json"
+        if default_config.exists():
+            return default_config
+    
+    # 3. Check current directory (backward compat)
+    local_config = Path("config.json")
+    if local_config.exists():
+        logger.warning("Warning: Using config.json from current directory (deprecated)")
+        logger.warning("         Please move to %s/config.json", config_dir)
+        return local_config
+    
+    # 4. Check old location (deprecated)
+    old_location = Path("mcp_http_bridge") / "config.json"
+    if old_location.exists():
+        logger.warning("Warning: Using config from mcp_http_bridge/config.json (deprecated)")
+        logger.warning("         Please move to %s/config.json", config_dir)
+        return old_location
+    
+    # Not found - show helpful error
+    search_locations = [
+        str(config_dir),
+        str(local_config.absolute()),
+        str(old_location.absolute())
+    ]
+    raise FileNotFoundError(
+        f"Config file not found. Searched:\n" + 
+        "\n".join(f"  - {loc}" for loc in search_locations) +
+        f"\n\nCreate a config file with:\n  mcp-bridge init"
+    )
+
+def load_config(config_path: Path) -> dict:
+    """Load and validate configuration file"""
+    try:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        
+        if 'url' not in config:
+            logger.error("Error: 'url' is required in config file")
+            sys.exit(1)
+        
+        logger.info("Loaded config from %s", config_path)
+        return config
+    
+    except json.JSONDecodeError as e:
+        logger.error("Error: Invalid JSON in config file: %s", e)
+        sys.exit(1)
+    except Exception as e:
+        logger.error("Error loading config: %s", e)
+        sys.exit(1)
+
+async def run_bridge(
+    config_name: Optional[str],
+    trace_path: Optional[str] = None,
+    trace_format: str = "chrome",
+    record_path: Optional[str] = None
+):
+    """Run the bridge with specified config"""
+    
+    try:
+        config_path = find_config_path(config_name)
+        config = load_config(config_path)
+        
+        tracer = None
+        if trace_path:
+            from .tracing import Tracer
+            tracer = Tracer(trace_path, trace_format)
+            logger.info("Tracing to %s (%s)", trace_path, trace_format)
+        
+        recorder = None
+        if record_path:
+            from .recording import Recorder
+            recorder = Recorder(record_path, config['url'])
+            logger.info("Recording traffic to %s", record_path)
+        
+        from .bridge import MCPHTTPBridge
+        bridge = MCPHTTPBridge(
+            url=config['url'],
+            headers=config.get('headers', {}),
+            lanes=config.get('lanes'),
+            adaptive_concurrency=config.get('adaptive_concurrency'),
+            metrics=config.get('metrics'),
+            tracer=tracer,
+            recorder=recorder,
+            offload=config.get('offload', True),
+            message_limits=config.get('message_limits'),
+            compression=config.get('compression'),
+            http_path=config.get('http_path'),
+            diagnostics=config.get('diagnostics')
+        )
+        
+        try:
+            await bridge.run()
+        finally:
+            await bridge.close()
+            logger.info("Bridge shut down")
+    
+    except FileNotFoundError as e:
+        logger.error("%s", e)
+        sys.exit(1)
+    except ValueError as e:
+        logger.error("Error: Invalid config: %s", e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.info("Interrupted by user")
+
+def run(
+    config_name: Optional[str] = None,
+    trace_path: Optional[str] = None,
+    trace_format: str = "chrome",
+    record_path: Optional[str] = None,
+    log_level: str = "info",
+    log_format: str = "text"
+):
+    """Configure logging and run the bridge until stdin closes"""
+    configure_logging(log_level, log_format)
+    try:
+        asyncio.run(run_bridge(config_name, trace_path, trace_format, record_path))
+    finally:
+        stop_logging()
@@ -0,0 +1,120 @@
+"""
+Priority lanes for scheduling JSON-RPC messages to the upstream server
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+CONTROL = "control"
+DISCOVERY = "discovery"
+TOOLS = "tools"
+
+# Concurrency budget per lane. Each lane also gets its own connection pool
+# of the same size, so control traffic never waits for a connection held
+# by a long-running tool call.
+DEFAULT_LANE_LIMITS = {
+    CONTROL: 4,
+    DISCOVERY: 4,
+    TOOLS: 8,
+}
+
+CONTROL_METHODS = frozenset({"initialize", "ping", "logging/setLevel"})
+
+
+def classify_message(message: dict) -> str:
+    """
+    Pick the lane a JSON-RPC message should travel in.
+
+    - control: initialize, ping, notifications (including cancellations)
+      and responses to server-initiated requests
+    - discovery: the */list methods (tools/list, resources/list, ...)
+    - tools: everything else, mainly tools/call
+
+    Args:
+        message: The JSON-RPC message read from stdin
+
+    Returns:
+        The lane name
+    """
+    method = message.get("method")
+    if not isinstance(method, str):
+        # Responses to server requests carry no method
+        return CONTROL
+    if method in CONTROL_METHODS or method.startswith("notifications/"):
+        return CONTROL
+    if method.endswith("/list"):
+        return DISCOVERY
+    return TOOLS
+
+
+class Lane:
+    """A concurrency budget plus a reserved HTTP connection pool"""
+
+    def __init__(self, name: str, limit: int, client_factory: Callable[[int], "httpx.AsyncClient"]):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self._client_factory = client_factory
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        # Built on first use, so starting the bridge does not wait for httpx
+        if self._client is None:
+            self._client = self._client_factory(self.limit)
+        return self._client
+
+    async def __aenter__(self):
+        # Created lazily so the semaphore binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        await self._semaphore.acquire()
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+class LaneScheduler:
+    """Routes messages into control, discovery and tools lanes"""
+
+    def __init__(
+        self,
+        client_factory: Callable[[int], "httpx.AsyncClient"],
+        limits: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Args:
+            client_factory: Builds an HTTP client whose pool holds the
+                given number of connections; called on a lane's first use
+            limits: Per-lane concurrency overrides, e.g. {"tools": 16}
+        """
+        merged = dict(DEFAULT_LANE_LIMITS)
+        for name, limit in (limits or {}).items():
+            if name not in DEFAULT_LANE_LIMITS:
+                raise ValueError(f"Unknown lane '{name}' (expected one of: "
+                                 f"{', '.join(DEFAULT_LANE_LIMITS)})")
+            if not isinstance(limit, int) or limit < 1:
+                raise ValueError(f"Lane '{name}' limit must be a positive integer")
+            merged[name] = limit
+
+        self.lanes: Dict[str, Lane] = {
+            name: Lane(name, limit, client_factory)
+            for name, limit in merged.items()
+        }
+
+    def lane_for(self, message: dict) -> Lane:
+        """Return the lane a message is scheduled in"""
+        return self.lanes[classify_message(message)]
+
+    async def aclose(self):
+        """Close every lane's connection pool"""
+        for lane in self.lanes.values():
+            if lane._client is not None:
+                await lane._client.aclose()
@@ -0,0 +1,69 @@
+"""
+Minimal entry point for mcp-bridge
+
+Desktop clients start one bridge per configured server, so the plain run
+(`mcp-bridge [--config NAME] [--log-level ...] ...`) is parsed here and
+started without importing click. Everything else (subcommands, --help,
+--version, unusual option spellings and invalid values) goes to the full
+click CLI, which also produces the usual error messages.
+"""
+
+import sys
+from typing import List, Optional
+
+# Options accepted on the fast path, mapped to runner.run() arguments
+RUN_OPTIONS = {
+    "--config": "config_name",
+    "-c": "config_name",
+    "--trace": "trace_path",
+    "--trace-format": "trace_format",
+    "--record": "record_path",
+    "--log-level": "log_level",
+    "--log-format": "log_format",
+}
+
+# Must match the click.Choice values in cli.py
+CHOICES = {
+    "trace_format": ("chrome", "otlp"),
+    "log_level": ("quiet", "info", "debug"),
+    "log_format": ("text", "json"),
+}
+
+
+def parse_run_args(argv: List[str]) -> Optional[dict]:
+    """
+    Parse the arguments of a plain bridge run.
+
+    Returns:
+        Keyword arguments for runner.run(), or None if the full CLI is needed
+    """
+    options = {}
+    args = iter(argv)
+    for arg in args:
+        name, equals, value = arg.partition("=")
+        if name not in RUN_OPTIONS or (equals and not name.startswith("--")):
+            return None
+        if not equals:
+            value = next(args, None)
+            if value is None or value.startswith("-"):
+                return None
+        key = RUN_OPTIONS[name]
+        if key in CHOICES and value not in CHOICES[key]:
+            return None
+        options[key] = value
+    return options
+
+
+def main(argv: Optional[List[str]] = None):
+    """Entry point for the mcp-bridge console script"""
+    options = parse_run_args(sys.argv[1:] if argv is None else argv)
+    if options is None:
+        from .cli import cli
+        return cli(args=argv)
+
+    from .runner import run
+    run(**options)
+
+
+if __name__ == "__main__":
+    main()
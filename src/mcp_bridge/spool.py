@@ -0,0 +1,450 @@
+"""
+Bounded memory for oversized messages
+
+Lines from stdin and from upstream SSE streams are read with a per-message
+memory cap. A line up to `spill_threshold` bytes is returned as bytes and
+handled as usual. A longer line is written to a temporary file as it
+arrives and handed on as a SpooledLine, which the bridge streams upstream
+or to stdout without ever holding the whole message. A line longer than
+`max_message_bytes` is discarded and reported as MessageTooLargeError, so
+the bridge can answer with a JSON-RPC error.
+
+Spooled messages are never decoded. EnvelopeScanner picks the JSON-RPC
+envelope (jsonrpc, id, method and the tool name) out of the stream as it
+goes by, which is all the bridge needs to route a message. It also checks
+that the message is a well-formed JSON object, so a malformed stdin line
+is rejected like a small one rather than sent upstream.
+"""
+
+import re
+from typing import IO, AsyncIterator, Dict, Optional, Union
+
+DEFAULT_SPILL_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_MAX_MESSAGE_BYTES = 256 * 1024 * 1024
+
+# Read and copy size for spooled messages
+CHUNK_SIZE = 1024 * 1024
+
+# Envelope values longer than this are not captured
+_MAX_CAPTURE = 64 * 1024
+
+# Outside strings: the characters that change the scanner's state
+_STRUCTURAL = re.compile(rb'[\\"{}\[\]:,]')
+# Inside strings: everything up to the closing quote, escapes included
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+_ENVELOPE_KEYS = (b"jsonrpc", b"id", b"method")
+
+_WHITESPACE = b" \t\r\n"
+# What may appear outside strings between structural characters
+_LITERAL = re.compile(rb'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null')
+# Longest number or literal kept while checking it
+_MAX_TOKEN = 1024
+
+
+class MessageTooLargeError(ValueError):
+    """A message exceeded the hard per-message size limit"""
+
+    def __init__(self, size: int, limit: int, envelope: Optional[dict] = None):
+        super().__init__(f"Message of {size} bytes exceeds the {limit} byte limit (max_message_bytes)")
+        self.size = size
+        self.limit = limit
+        self.envelope = envelope or {}
+
+
+class MessageLimits:
+    """
+    Per-message memory limits from the `message_limits` config option.
+
+    Args:
+        spill_threshold: Lines longer than this go through a temporary file
+        max_message_bytes: Lines longer than this are rejected (None for no limit)
+    """
+
+    CONFIG_KEYS = frozenset({"spill_threshold", "max_message_bytes"})
+
+    def __init__(self, spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+                 max_message_bytes: Optional[int] = DEFAULT_MAX_MESSAGE_BYTES):
+        if not isinstance(spill_threshold, int) or spill_threshold < 1:
+            raise ValueError("spill_threshold must be a positive integer")
+        if max_message_bytes is not None:
+            if not isinstance(max_message_bytes, int) or max_message_bytes < spill_threshold:
+                raise ValueError("max_message_bytes must be an integer of at least spill_threshold")
+        self.spill_threshold = spill_threshold
+        self.max_message_bytes = max_message_bytes
+
+    @classmethod
+    def from_config(cls, config) -> "MessageLimits":
+        if config is None:
+            return cls()
+        if not isinstance(config, dict):
+            raise ValueError("message_limits must be an object")
+        unknown = set(config) - cls.CONFIG_KEYS
+        if unknown:
+            raise ValueError(f"Unknown message_limits option(s): {', '.join(sorted(unknown))}")
+        return cls(**config)
+
+    def check(self, size: int, envelope: Optional[dict] = None):
+        if self.max_message_bytes is not None and size > self.max_message_bytes:
+            raise MessageTooLargeError(size, self.max_message_bytes, envelope)
+
+
+class EnvelopeScanner:
+    """
+    Incrementally scans a JSON-RPC message for its envelope fields.
+
+    Feed the message in chunks of any size; `envelope()` returns the
+    top-level jsonrpc, id and method and, for tools/call, params.name.
+    Member order does not matter. String contents are skipped with a
+    regular expression, so large string values cost little to scan.
+
+    `error` says why the message is not a well-formed JSON object. The
+    check covers brackets, strings, numbers and literals, not every rule
+    of the grammar (a missing colon goes unnoticed).
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, object] = {}
+        # One [is_object, member_key, expecting_key] per open container
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[bytearray] = None
+        self._capture = None  # [name, depth, bytearray]
+        # Text since the last structural character, outside strings
+        self._token = bytearray()
+        self._closed = False
+        self._error: Optional[str] = None
+
+    @property
+    def error(self) -> Optional[str]:
+        """Why the input so far is not a complete JSON object, or None"""
+        if self._error is not None:
+            return self._error
+        if not self._closed:
+            return "message is not a complete JSON object"
+        if self._token.strip(_WHITESPACE):
+            return "unexpected data after the JSON object"
+        return None
+
+    def _fail(self, reason: str):
+        if self._error is None:
+            self._error = reason
+
+    def _gap(self, data: bytes):
+        if self._error is not None:
+            return
+        self._token += data
+        if len(self._token) > _MAX_TOKEN:
+            # Keep one space of a long whitespace run so "1   2" stays invalid
+            compact = self._token.rstrip(_WHITESPACE)
+            if len(compact) < len(self._token):
+                compact += b" "
+            if len(compact) > _MAX_TOKEN:
+                self._fail("unexpected data outside strings")
+            self._token = compact
+
+    def _check_token(self, gap: Optional[bytes] = None):
+        """Check the text before a structural character is whitespace, a number or a literal"""
+        if gap is None:
+            gap = bytes(self._token)
+            self._token.clear()
+        token = gap.strip(_WHITESPACE)
+        if token and (not self._stack or not _LITERAL.fullmatch(token)):
+            self._fail(f"unexpected {token[:20]!r} outside strings")
+
+    def _target(self, key: bytes) -> Optional[str]:
+        depth = len(self._stack)
+        if depth == 1 and key in _ENVELOPE_KEYS:
+            return key.decode()
+        if depth == 2 and key == b"name" and self._stack[0][1] == b"params":
+            return "params.name"
+        return None
+
+    def _take(self, data: bytes):
+        capture = self._capture
+        if capture is not None and data:
+            capture[2] += data
+            if len(capture[2]) > _MAX_CAPTURE:
+                self._capture = None
+
+    def _finish_capture(self):
+        import json
+        name, _, data = self._capture
+        self._capture = None
+        try:
+            self.fields[name] = json.loads(bytes(data))
+        except ValueError:
+            pass
+
+    def feed(self, chunk: bytes):
+        pos, end = 0, len(chunk)
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._take(chunk[pos:pos + 1])
+                    if self._key is not None:
+                        self._key += chunk[pos:pos + 1]
+                    pos += 1
+                    continue
+                stop = _STRING_BODY.match(chunk, pos).end()
+                self._take(chunk[pos:stop])
+                if self._key is not None:
+                    self._key += chunk[pos:stop]
+                if stop == end:
+                    break
+                char = chunk[stop:stop + 1]
+                self._take(char)
+                pos = stop + 1
+                if char == b"\\":
+                    # Escape split across chunks: the escaped byte comes next
+                    if self._key is not None:
+                        self._key += char
+                    self._escape = True
+                    continue
+                self._in_string = False
+                if self._key is not None:
+                    self._stack[-1][1] = bytes(self._key)
+                    self._stack[-1][2] = False
+                    self._key = None
+                continue
+
+            match = _STRUCTURAL.search(chunk, pos)
+            if match is None:
+                self._take(chunk[pos:])
+                self._gap(chunk[pos:])
+                break
+            start = match.start()
+            if self._token:
+                self._gap(chunk[pos:start])
+                self._check_token()
+            elif start > pos:
+                self._check_token(chunk[pos:start])
+            self._take(chunk[pos:start])
+            char = chunk[start:start + 1]
+            pos = start + 1
+            frame = self._stack[-1] if self._stack else None
+            depth = len(self._stack)
+            if frame is None:
+                if self._closed:
+                    self._fail("unexpected data after the JSON object")
+                elif char != b"{":
+                    self._fail("message is not a JSON object")
+
+            if char == b'"':
+                self._take(char)
+                self._in_string = True
+                if frame is not None and frame[0] and frame[2]:
+                    self._key = bytearray()
+            elif char in (b"{", b"["):
+                self._take(char)
+                self._stack.append([char == b"{", None, char == b"{"])
+            elif char in (b"}", b"]"):
+                if self._capture is not None and self._capture[1] == depth:
+                    self._finish_capture()
+                else:
+                    self._take(char)
+                if frame is not None and frame[0] != (char == b"}"):
+                    self._fail("mismatched brackets")
+                if self._stack:
+                    self._stack.pop()
+                    if not self._stack:
+                        self._closed = True
+            elif char == b":":
+                target = self._target(frame[1]) if frame is not None and frame[0] and frame[1] else None
+                if target and self._capture is None:
+                    self._capture = [target, depth, bytearray()]
+                else:
+                    self._take(char)
+            elif char == b",":
+                if self._capture is not None and self._capture[1] == depth:
+                    self._finish_capture()
+                else:
+                    self._take(char)
+                if frame is not None and frame[0]:
+                    frame[2] = True
+            else:
+                # A backslash outside a string is invalid JSON; keep going
+                self._take(char)
+                self._fail("backslash outside a string")
+
+    def envelope(self) -> dict:
+        """The envelope as a message dict, for routing and error responses"""
+        envelope = {key: self.fields[key] for key in ("jsonrpc", "id", "method") if key in self.fields}
+        if "params.name" in self.fields:
+            envelope["params"] = {"name": self.fields["params.name"]}
+        return envelope
+
+
+class SpooledLine:
+    """A line held in a temporary file instead of memory"""
+
+    def __init__(self, file: IO[bytes], size: int, envelope: Optional[dict] = None):
+        self.file = file
+        self.size = size
+        self.envelope = envelope or {}
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        self.file.seek(offset)
+        return self.file.read(size)
+
+    def chunks(self, offset: int = 0):
+        """Yield the contents from `offset` in CHUNK_SIZE pieces"""
+        self.file.seek(offset)
+        while True:
+            chunk = self.file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    async def aiter_chunks(self):
+        """Async version of chunks(), for streaming a request body"""
+        for chunk in self.chunks():
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+
+class SpooledMessage(dict):
+    """
+    A stdin message too large to hold in memory.
+
+    Holds only the envelope scanned from the message; `line` is the
+    complete message in its temporary file, sent upstream as is.
+    """
+
+    def __init__(self, line: SpooledLine):
+        super().__init__(line.envelope)
+        self.line = line
+
+
+def _spool() -> IO[bytes]:
+    # tempfile is only needed once a message is large enough to spill
+    import tempfile
+    return tempfile.TemporaryFile(prefix="mcp-bridge-")
+
+
+def read_line(stream, limits: MessageLimits) -> Union[bytes, str, SpooledLine]:
+    """
+    Read one line from a blocking stream (stdin) within the memory limits.
+
+    Returns:
+        The line (empty at EOF), or a SpooledLine with the line ending
+        removed and the envelope scanned
+
+    Raises:
+        ValueError: A spooled line was not a well-formed JSON object; it
+            has been consumed like an over-limit line
+        MessageTooLargeError: The line was longer than max_message_bytes;
+            it has been consumed, so the next call reads the next line
+    """
+    line = stream.readline(limits.spill_threshold + 1)
+    if len(line) <= limits.spill_threshold or line[-1:] in ("\n", b"\n"):
+        return line
+
+    scanner = EnvelopeScanner()
+    spool = _spool()
+    size = 0
+    too_large = False
+    piece = line
+    try:
+        while True:
+            if isinstance(piece, str):
+                piece = piece.encode()
+            done = not piece or piece.endswith(b"\n")
+            piece = piece.rstrip(b"\r\n") if done else piece
+            size += len(piece)
+            scanner.feed(piece)
+            if not too_large:
+                if limits.max_message_bytes is not None and size > limits.max_message_bytes:
+                    too_large = True
+                    spool.close()
+                else:
+                    spool.write(piece)
+            if done:
+                break
+            piece = stream.readline(CHUNK_SIZE)
+
+        if too_large:
+            raise MessageTooLargeError(size, limits.max_message_bytes, scanner.envelope())
+        if scanner.error is not None:
+            raise ValueError(f"Invalid JSON in {size} byte line: {scanner.error}")
+        spool.seek(0)
+    except BaseException:
+        # The line is not handed on, so nothing else will close its spool
+        spool.close()
+        raise
+    return SpooledLine(spool, size, scanner.envelope())
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], limits: MessageLimits) -> AsyncIterator[Union[bytes, SpooledLine]]:
+    """
+    Split a byte stream (an SSE response body) into lines within the memory limits.
+
+    Yields bytes for ordinary lines and SpooledLine for lines over the
+    spill threshold; raises MessageTooLargeError for a line over the hard
+    limit. Line endings (LF or CRLF) are removed.
+    """
+    buffer = bytearray()
+    spool = None
+    size = 0
+
+    def finish():
+        nonlocal buffer, spool, size
+        if spool is not None:
+            line = SpooledLine(spool, size)
+            if size and line.read_at(size - 1, 1) == b"\r":
+                spool.truncate(size - 1)
+                line.size -= 1
+            spool.seek(0)
+        else:
+            line = bytes(buffer[:-1] if buffer.endswith(b"\r") else buffer)
+        buffer = bytearray()
+        spool = None
+        size = 0
+        return line
+
+    try:
+        async for chunk in chunks:
+            pos = 0
+            while pos < len(chunk):
+                newline = chunk.find(b"\n", pos)
+                if newline >= 0 and spool is None and not buffer:
+                    # Common case: a whole line inside one chunk
+                    line = chunk[pos:newline]
+                    if len(line) > limits.spill_threshold:
+                        limits.check(len(line))
+                        spool = _spool()
+                        spool.write(line)
+                        size = len(line)
+                        yield finish()
+                    else:
+                        yield line[:-1] if line.endswith(b"\r") else line
+                    pos = newline + 1
+                    continue
+
+                piece = chunk[pos:] if newline < 0 else chunk[pos:newline]
+                size += len(piece)
+                limits.check(size)
+                if spool is not None:
+                    spool.write(piece)
+                else:
+                    buffer += piece
+                    if len(buffer) > limits.spill_threshold:
+                        spool = _spool()
+                        spool.write(buffer)
+                        buffer = bytearray()
+                if newline < 0:
+                    break
+                yield finish()
+                pos = newline + 1
+
+        if buffer or spool is not None:
+            yield finish()
+    finally:
+        # A line over the limit, or a consumer that stopped early, leaves
+        # a spool that was never handed on as a SpooledLine
+        if spool is not None:
+            spool.close()
@@ -0,0 +1,27 @@
+"""
+Latency statistics shared by the bench, replay and end-to-end benchmark reports
+"""
+
+import math
+from typing import List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    The smallest value with at least a fraction q of all values at or
+    below it, so p50 of 1..100 is 50 and p99 is 99.
+
+    Args:
+        sorted_values: Samples in ascending order
+        q: Fraction between 0 and 1
+
+    Returns:
+        The percentile, or None for an empty list
+    """
+    if not sorted_values:
+        return None
+    # Rounded first so 0.95 * 100 counts as rank 95, not 96
+    rank = math.ceil(round(q * len(sorted_values), 9))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
@@ -0,0 +1,155 @@
+"""
+Per-message timeline tracing for MCP Bridge
+
+Records a span tree for each JSON-RPC message that passes through the
+bridge and writes it as Chrome trace-event JSON (open in chrome://tracing
+or https://ui.perfetto.dev) or as OTLP/JSON lines.
+"""
+
+import os
+import json
+import time
+import secrets
+from typing import Any, Dict, List, Optional, Tuple
+
+FORMATS = ("chrome", "otlp")
+
+
+def _otlp_value(value: Any) -> dict:
+    """Encode an attribute value as an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class MessageTrace:
+    """Spans recorded for one JSON-RPC message"""
+
+    def __init__(self, tracer: "Tracer", tid: int, message: dict, start: float):
+        self.tracer = tracer
+        self.tid = tid
+        self.start = start
+        self.method = message.get("method", "response")
+        self.msg_id = message.get("id")
+        self.trace_id = secrets.token_hex(16)
+        self.root_span_id = secrets.token_hex(8)
+        self.spans: List[Tuple[str, float, float, Dict[str, Any]]] = []
+        self._open: Dict[str, float] = {}
+        self._request_start: Optional[float] = None
+        self.finished = False
+
+    def add(self, name: str, start: float, end: float, **attrs):
+        """Record a completed span with monotonic start and end times"""
+        self.spans.append((name, start, end, attrs))
+
+    def request_started(self, start: float):
+        """Mark when the upstream request was handed to httpx"""
+        self._request_start = start
+
+    async def httpx_trace(self, event_name: str, info: dict):
+        """httpx 'trace' extension hook for connection and HTTP phases"""
+        now = time.monotonic()
+        phase, _, state = event_name.rpartition(".")
+        if state == "started" and phase.endswith("send_request_headers") and self._request_start is not None:
+            # Everything before the first header byte is pool wait and connect
+            self.add("connection.acquire", self._request_start, now)
+            self._request_start = None
+        if state == "started":
+            self._open[phase] = now
+        elif phase in self._open:
+            self.add(phase, self._open.pop(phase), now, failed=state == "failed")
+
+    def finish(self, **attrs):
+        """Close the root span and hand the trace to the writer"""
+        if not self.finished:
+            self.finished = True
+            self.tracer.write(self, time.monotonic(), attrs)
+
+
+class Tracer:
+    """Collects message traces and writes them to a file"""
+
+    def __init__(self, path: str, format: str = "chrome"):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown trace format '{format}' (expected one of: {', '.join(FORMATS)})")
+        self.path = path
+        self.format = format
+        self.pid = os.getpid()
+        self._file = open(path, "w")
+        self._next_tid = 0
+        self._written = 0
+        # Offset from the monotonic clock to Unix time, for OTLP timestamps
+        self._epoch_offset = time.time() - time.monotonic()
+        if format == "chrome":
+            self._file.write("[\n")
+
+    def begin(self, message: dict, start: Optional[float] = None) -> MessageTrace:
+        """Start tracing a message"""
+        self._next_tid += 1
+        return MessageTrace(self, self._next_tid, message, time.monotonic() if start is None else start)
+
+    def write(self, trace: MessageTrace, end: float, attrs: dict):
+        if self._file.closed:
+            return
+        root_name = f"{trace.method} (id={trace.msg_id})" if trace.msg_id is not None else trace.method
+        root_attrs = {"method": trace.method, "id": trace.msg_id, **attrs}
+        if self.format == "chrome":
+            self._write_chrome(trace, root_name, end, root_attrs)
+        else:
+            self._write_otlp(trace, root_name, end, root_attrs)
+
+    def _write_chrome(self, trace: MessageTrace, root_name: str, end: float, root_attrs: dict):
+        events = [{
+            "name": "thread_name", "ph": "M", "pid": self.pid, "tid": trace.tid,
+            "args": {"name": root_name},
+        }]
+        for name, start, span_end, attrs in [(root_name, trace.start, end, root_attrs)] + trace.spans:
+            events.append({
+                "name": name, "cat": "bridge", "ph": "X",
+                "ts": round(start * 1e6, 3), "dur": round((span_end - start) * 1e6, 3),
+                "pid": self.pid, "tid": trace.tid, "args": attrs,
+            })
+        for event in events:
+            self._file.write((",\n" if self._written else "") + json.dumps(event))
+            self._written += 1
+
+    def _write_otlp(self, trace: MessageTrace, root_name: str, end: float, root_attrs: dict):
+        def span(name, start, span_end, attrs, span_id, parent_id):
+            encoded = {
+                "traceId": trace.trace_id,
+                "spanId": span_id,
+                "name": name,
+                "kind": 1,
+                "startTimeUnixNano": str(int((start + self._epoch_offset) * 1e9)),
+                "endTimeUnixNano": str(int((span_end + self._epoch_offset) * 1e9)),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)}
+                    for key, value in attrs.items() if value is not None
+                ],
+            }
+            if parent_id:
+                encoded["parentSpanId"] = parent_id
+            return encoded
+
+        spans = [span(root_name, trace.start, end, root_attrs, trace.root_span_id, None)]
+        for name, start, span_end, attrs in trace.spans:
+            spans.append(span(name, start, span_end, attrs, secrets.token_hex(8), trace.root_span_id))
+
+        record = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "mcp-bridge"}}]},
+            "scopeSpans": [{"scope": {"name": "mcp_bridge"}, "spans": spans}],
+        }]}
+        self._file.write(json.dumps(record) + "\n")
+        self._written += 1
+
+    def close(self):
+        """Finish the file so it is valid JSON"""
+        if self._file.closed:
+            return
+        if self.format == "chrome":
+            self._file.write("\n]\n")
+        self._file.close()
@@ -0,0 +1,324 @@
+"""
+Upstream transports for MCP Bridge
+
+The bridge reads stdin, schedules each message in its priority lane and
+under the adaptive limiter, then hands it to a transport, which carries
+it to the server and writes whatever comes back to stdout. The transport
+is chosen by the URL scheme:
+
+    http://, https://, unix://   HTTPTransport: one POST per message,
+                                 responses streamed back as SSE
+    ws://, wss://                WebSocketTransport: one full-duplex
+                                 connection for the session
+
+A transport implements `send()` and `aclose()`. `send()` returns once
+the message has been answered (for requests) or delivered (for
+notifications and responses), so lane and limiter slots are held for as
+long as the upstream is working on the message.
+"""
+
+import json
+import time
+import asyncio
+import codecs
+from typing import TYPE_CHECKING, Dict, Optional, Set
+
+from .logs import logger
+from .offload import EncodedMessage
+from .spool import SpooledMessage
+
+if TYPE_CHECKING:
+    from .bridge import MCPHTTPBridge
+    from .tracing import MessageTrace
+
+# Seconds to wait for the upstream, shared by every transport
+CONNECT_TIMEOUT = 10.0
+REQUEST_TIMEOUT = 60.0
+
+
+class Transport:
+    """Carries messages between the bridge and the upstream server"""
+
+    name = "transport"
+
+    def __init__(self, bridge: "MCPHTTPBridge"):
+        self.bridge = bridge
+
+    async def send(self, message: dict, lane, trace: Optional["MessageTrace"] = None) -> Optional[Exception]:
+        """
+        Send a message and relay its response to stdout.
+
+        Returns:
+            The exception that failed the message, or None on success
+        """
+        raise NotImplementedError
+
+    async def aclose(self):
+        """Release connections"""
+
+
+class HTTPTransport(Transport):
+    """Streamable HTTP: POST each message, read the response as JSON or SSE"""
+
+    name = "http"
+
+    async def send(self, message: dict, lane, trace: Optional["MessageTrace"] = None) -> Optional[Exception]:
+        return await self.bridge.send_message(message, client=lane.client, trace=trace)
+
+
+class WebSocketTransport(Transport):
+    """
+    One WebSocket connection per session, carrying JSON-RPC messages as text frames.
+
+    The connection opens with the first message and uses the "mcp"
+    subprotocol; config headers are sent with the handshake. Responses
+    are matched to requests by id. Everything else the server sends
+    (notifications, server-initiated requests) goes straight to stdout.
+    A request without a response within REQUEST_TIMEOUT fails, and the
+    server is told to cancel it.
+
+    If the connection drops, requests waiting for a response fail and
+    the next message reconnects. A new connection starts a new MCP
+    session, so the client's initialize handshake is repeated on it
+    before anything else is sent.
+
+    Needs the `websockets` package (`pip install 'mcp-bridge[websocket]'`).
+    """
+
+    name = "websocket"
+    SUBPROTOCOL = "mcp"
+
+    def __init__(self, bridge: "MCPHTTPBridge"):
+        super().__init__(bridge)
+        self._connection = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        # The client's initialize request (without its id), replayed on reconnect
+        self._handshake: Optional[dict] = None
+        self._replays = 0
+        # Responses the bridge consumes itself, and late ones for timed out requests
+        self._internal: Set[str] = set()
+        self._abandoned: Set[str] = set()
+
+    async def _connect(self, replay: bool = True):
+        if self._lock is None:
+            # Created here so it belongs to the running event loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._connection is None:
+                try:
+                    from websockets.asyncio.client import connect
+                except ImportError:
+                    raise RuntimeError("WebSocket upstreams need the 'websockets' package "
+                                       "(pip install 'mcp-bridge[websocket]')") from None
+                bridge = self.bridge
+                connection = await connect(
+                    bridge.url,
+                    additional_headers=bridge.headers,
+                    subprotocols=[self.SUBPROTOCOL],
+                    max_size=bridge.limits.max_message_bytes,
+                    open_timeout=CONNECT_TIMEOUT,
+                )
+                logger.info("WebSocket connected to %s", bridge.url)
+                self._connection = connection
+                self._abandoned.clear()
+                self._reader = asyncio.ensure_future(self._read(connection))
+                if replay and self._handshake is not None:
+                    await self._reinitialize(connection)
+            return self._connection
+
+    async def _reinitialize(self, connection):
+        """Repeat the client's initialize handshake on a new connection"""
+        self._replays += 1
+        msg_id = f"mcp-bridge-reinitialize-{self._replays}"
+        key = json.dumps(msg_id)
+        waiter = self._pending[key] = asyncio.get_event_loop().create_future()
+        self._internal.add(key)
+        try:
+            await connection.send(json.dumps({**self._handshake, "id": msg_id}))
+            response = await asyncio.wait_for(waiter, REQUEST_TIMEOUT)
+            if isinstance(response, dict) and "error" in response:
+                raise RuntimeError(response["error"].get("message", "initialize failed"))
+            await connection.send(json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}))
+        except Exception as e:
+            if self._connection is connection:
+                self._connection = None
+            await connection.close()
+            raise ConnectionError(f"WebSocket reconnected, but re-initializing the MCP session failed: "
+                                  f"{e or type(e).__name__}") from e
+        finally:
+            self._pending.pop(key, None)
+            self._internal.discard(key)
+        logger.info("Re-initialized the MCP session after reconnecting")
+
+    async def _response(self, key: str, msg_id):
+        """Wait for the response to a request for at most REQUEST_TIMEOUT"""
+        try:
+            return await asyncio.wait_for(self._pending[key], REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        # Drop the response if it turns up later, and stop the server working on it
+        self._abandoned.add(key)
+        connection = self._connection
+        if connection is not None:
+            cancel = {"jsonrpc": "2.0", "method": "notifications/cancelled",
+                      "params": {"requestId": msg_id, "reason": "Timed out in mcp-bridge"}}
+            try:
+                await connection.send(json.dumps(cancel))
+            except Exception as e:
+                logger.debug("Cannot send cancellation: %s", e)
+        raise asyncio.TimeoutError(f"No response from the WebSocket upstream within {REQUEST_TIMEOUT:.0f}s")
+
+    async def send(self, message: dict, lane, trace: Optional["MessageTrace"] = None) -> Optional[Exception]:
+        bridge = self.bridge
+        metrics = bridge.metrics
+        accounting = bridge.start_request(message)
+        method = accounting.method
+        msg_id = message.get('id')
+
+        # Only requests get a response to wait for
+        key = json.dumps(msg_id) if "id" in message and "method" in message else None
+        try:
+            # A client initialize starts a new session instead of replaying the old one
+            connection = await self._connect(replay=method != "initialize")
+            if key is not None:
+                self._pending[key] = asyncio.get_event_loop().create_future()
+
+            send_start = time.monotonic()
+            if isinstance(message, SpooledMessage):
+                size = message.line.size
+                await connection.send(_decoded_chunks(message.line))
+            else:
+                if isinstance(message, EncodedMessage):
+                    payload = message.body.decode()
+                else:
+                    bridge.repair_params(message, trace)
+                    payload = json.dumps(message)
+                size = len(payload)
+                await connection.send(payload)
+            metrics.bytes_sent.inc(amount=size)
+            if trace:
+                trace.add("upstream.send", send_start, time.monotonic(), bytes=size)
+            logger.debug("Sent: %s (id=%s)", method, msg_id, extra={"request_id": msg_id, "method": method})
+
+            if key is not None:
+                response = await self._response(key, msg_id)
+                accounting.first_byte(time.monotonic())
+                if method == "initialize" and isinstance(response, dict) and "result" in response:
+                    handshake = json.loads(message.body) if isinstance(message, EncodedMessage) else dict(message)
+                    handshake.pop("id", None)
+                    self._handshake = handshake
+
+        except Exception as e:
+            accounting.failed(e)
+            if key is not None:
+                bridge.write_error(message, -32603, str(e), trace)
+            return e
+
+        finally:
+            waiter = self._pending.pop(key, None) if key is not None else None
+            if waiter is not None and waiter.done() and not waiter.cancelled():
+                # Mark a failure nobody awaited as retrieved
+                waiter.exception()
+            accounting.finish()
+
+    async def _read(self, connection):
+        """Relay everything the server sends until the connection closes"""
+        from websockets.exceptions import ConnectionClosed
+
+        bridge = self.bridge
+        reason = "WebSocket connection closed"
+        try:
+            async for data in connection:
+                bridge.metrics.bytes_received.inc(amount=len(data))
+                # Counted with SSE events: both are messages relayed to stdout
+                bridge.metrics.sse_events.inc()
+                if not await self._relay(data):
+                    break
+        except ConnectionClosed as e:
+            reason = f"WebSocket connection closed: {e}"
+        except Exception as e:
+            reason = f"WebSocket read failed: {e}"
+            logger.error("%s", reason)
+            logger.debug("Traceback:", exc_info=True)
+        finally:
+            if self._connection is connection:
+                self._connection = None
+            error = ConnectionError(reason)
+            for waiter in self._pending.values():
+                if not waiter.done():
+                    waiter.set_exception(error)
+            if self._pending:
+                logger.warning("%s with %d request(s) in flight", reason, len(self._pending))
+
+    async def _relay(self, data) -> bool:
+        """Write one message to stdout and wake the request it answers"""
+        bridge = self.bridge
+        message = line = None
+        if bridge.offloader and bridge.offloader.should_offload(len(data)):
+            try:
+                msg_id, is_response, line = await bridge.offloader.relay_message(data)
+            except ValueError as e:
+                logger.warning("Invalid JSON from WebSocket: %s", e)
+                return True
+            bridge.metrics.offloaded.inc("websocket")
+        else:
+            try:
+                message = json.loads(data)
+            except ValueError as e:
+                logger.warning("Invalid JSON from WebSocket: %s", e)
+                return True
+            if not isinstance(message, dict):
+                return bridge.write_message(message)
+            msg_id = message.get('id')
+            is_response = "method" not in message
+
+        key = json.dumps(msg_id) if is_response else None
+        if key in self._abandoned:
+            self._abandoned.discard(key)
+            logger.debug("Dropped late response (id=%s)", msg_id, extra={"request_id": msg_id})
+            return True
+        if key not in self._internal:
+            if not (bridge.write_line(line) if message is None else bridge.write_message(message)):
+                return False
+        waiter = self._pending.get(key) if key is not None else None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(message)
+        return True
+
+    async def aclose(self):
+        if self._connection is not None:
+            await self._connection.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+async def _decoded_chunks(line):
+    """A spooled message as text fragments, for a fragmented text frame"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in line.aiter_chunks():
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+TRANSPORTS = {
+    "http": HTTPTransport,
+    "https": HTTPTransport,
+    "unix": HTTPTransport,
+    "ws": WebSocketTransport,
+    "wss": WebSocketTransport,
+}
+
+
+def transport_for_url(url: str) -> type:
+    """The transport class for an upstream URL's scheme"""
+    scheme = url.split("://", 1)[0].lower() if "://" in url else ""
+    if scheme not in TRANSPORTS:
+        raise ValueError(f"Unsupported upstream URL scheme '{scheme}' "
+                         f"(expected one of: {', '.join(sorted(TRANSPORTS))})")
+    return TRANSPORTS[scheme]
@@ -0,0 +1,67 @@
+"""
+Upstream URL handling
+
+Besides http:// and https:// URLs, the bridge accepts unix:// URLs for
+servers on the same host or in a sidecar container, so requests skip
+the TCP stack:
+
+    unix:///run/mcp/weather.sock/mcp   socket /run/mcp/weather.sock, path /mcp
+    unix:///run/mcp/weather.sock       socket /run/mcp/weather.sock, path /
+
+The socket path ends at the first path component ending in ".sock". For
+sockets named differently, give the whole socket path in the URL and the
+HTTP path separately with the `http_path` config option.
+"""
+
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+
+UNIX_SCHEME = "unix://"
+
+# Host header for requests over a Unix socket
+UNIX_HOST = "localhost"
+
+
+def parse_upstream_url(url: str, http_path: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    Split an upstream URL into the URL to request and a Unix socket path.
+
+    Args:
+        url: The configured upstream URL
+        http_path: HTTP path for unix:// URLs whose socket is not named *.sock
+
+    Returns:
+        The HTTP URL for requests, and the socket path (None for TCP)
+    """
+    if not url.startswith(UNIX_SCHEME):
+        if http_path is not None:
+            raise ValueError("http_path only applies to unix:// URLs")
+        return url, None
+
+    path, question, query = url[len(UNIX_SCHEME):].partition("?")
+    if not path.startswith("/"):
+        raise ValueError(f"Unix socket URL must have an absolute path: {url}")
+
+    if http_path is not None:
+        socket_path, request_path = path, http_path
+    else:
+        socket_path, request_path = path, "/"
+        parts = path.split("/")
+        for index, part in enumerate(parts):
+            if part.endswith(".sock"):
+                socket_path = "/".join(parts[:index + 1])
+                request_path = "/" + "/".join(parts[index + 1:])
+                break
+    if not request_path.startswith("/"):
+        request_path = "/" + request_path
+    return f"http://{UNIX_HOST}{request_path}{question}{query}", socket_path
+
+
+def make_transport(uds: Optional[str], limits: "httpx.Limits") -> Optional["httpx.AsyncHTTPTransport"]:
+    """An httpx transport for a Unix socket, or None to use TCP"""
+    if uds is None:
+        return None
+    import httpx
+    return httpx.AsyncHTTPTransport(uds=uds, limits=limits)
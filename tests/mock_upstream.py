@@ -0,0 +1,67 @@
+"""
+In-process upstream helpers shared by the bridge tests
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from mcp_bridge.bridge import MCPHTTPBridge
+
+
+def tool_call(msg_id, tool: str = "payload", **arguments) -> dict:
+    """Build a tools/call request (the mock server's tools are payload and echo)"""
+    return {"jsonrpc": "2.0", "id": msg_id, "method": "tools/call",
+            "params": {"name": tool, "arguments": arguments}}
+
+
+def big_result(msg_id, size: int) -> dict:
+    """Build a tools/call result carrying `size` characters of text"""
+    return {"jsonrpc": "2.0", "id": msg_id, "result": {"content": [{"type": "text", "text": "x" * size}]}}
+
+
+def sse_response(message: dict) -> httpx.Response:
+    """Build an SSE response carrying one JSON-RPC message"""
+    body = f"event: message\ndata: {json.dumps(message)}\n\n".encode()
+    # Streamed rather than preloaded so byte counters see it like a real response
+    return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                          stream=httpx.ByteStream(body))
+
+
+class MockBridge(MCPHTTPBridge):
+    """Bridge whose lanes talk to an in-process handler"""
+
+    def __init__(self, handler, **kwargs):
+        self._handler = handler
+        super().__init__("http://upstream.test/mcp", **kwargs)
+
+    def _make_client(self, pool_size):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self._handler))
+
+
+def relay(size: int, capsys, **options):
+    """
+    Relay one tools/call result of `size` characters through a MockBridge.
+
+    Args:
+        options: MCPHTTPBridge options, e.g. offload or message_limits
+
+    Returns:
+        The closed bridge (for its metrics) and the frames it wrote to stdout
+    """
+
+    async def scenario():
+        bridge = MockBridge(lambda request: sse_response(big_result(json.loads(request.content)["id"], size)),
+                            **options)
+        await bridge.send_message(tool_call(1))
+        await bridge.close()
+        return bridge
+
+    bridge = asyncio.run(scenario())
+    return bridge, [json.loads(line) for line in capsys.readouterr().out.splitlines()]
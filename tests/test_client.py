@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the async MCP client library.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+import mcp_bridge
+from mcp_bridge.client import MCPError, MCPSession, SessionPool, run_bounded
+from mcp_bridge.httpserver import HTTPServer, Response, sse_event
+from mcp_bridge.mock_server import MockMCPServer
+
+
+def against(mock, scenario, handler=None):
+    """Run scenario(url) against an in-process mock server"""
+
+    async def run():
+        async with HTTPServer(handler or mock.handle) as server:
+            return await scenario(f"{server.url}/mcp")
+
+    return asyncio.run(run())
+
+
+class TestMCPSession:
+    """Test cases for a single client session"""
+
+    def test_session(self):
+        """Test initialize, tool listing and a tool call"""
+        mock = MockMCPServer()
+
+        async def scenario(url):
+            async with MCPSession(url) as session:
+                tools = await session.list_tools()
+                result = await session.call_tool("echo", {"city": "Boston"})
+                return session.server_info, tools, result
+
+        server_info, tools, result = against(mock, scenario)
+        assert server_info["name"] == "mcp-bridge-mock"
+        assert [tool["name"] for tool in tools] == ["echo", "payload"]
+        assert json.loads(result["content"][0]["text"]) == {"city": "Boston"}
+        assert mock.requests["notifications/initialized"] == 1
+
+    def test_progress_streamed(self):
+        """Test progress notifications reach the callback while the call is running"""
+        mock = MockMCPServer()
+        # Created in the scenario, on the event loop that will wait on it
+        seen = {}
+
+        async def handler(request):
+            message = json.loads(request.body)
+            if message.get("method") != "tools/call":
+                return await mock.handle(request)
+
+            async def stream():
+                progress = {"jsonrpc": "2.0", "method": "notifications/progress",
+                            "params": {"progressToken": message["params"]["_meta"]["progressToken"],
+                                       "progress": 1}}
+                yield sse_event(progress)
+                # The result is only sent once the client has seen the progress
+                try:
+                    await asyncio.wait_for(seen["event"].wait(), 5)
+                    reply = {"jsonrpc": "2.0", "id": message["id"], "result": {"isError": False}}
+                except asyncio.TimeoutError:
+                    reply = {"jsonrpc": "2.0", "id": message["id"], "error": {"code": -1, "message": "not streamed"}}
+                yield sse_event(reply)
+
+            return Response(200, {"Content-Type": "text/event-stream"}, stream=stream())
+
+        async def scenario(url):
+            progress = []
+            seen["event"] = asyncio.Event()
+
+            def on_progress(params):
+                progress.append(params["progress"])
+                seen["event"].set()
+
+            async with MCPSession(url) as session:
+                result = await session.call_tool("payload", {}, on_progress=on_progress)
+                return progress, result
+
+        progress, result = against(mock, scenario, handler)
+        assert progress == [1]
+        assert result["isError"] is False
+
+    def test_concurrent_calls(self):
+        """Test many calls in flight on one session, bounded by call_many's concurrency"""
+        mock = MockMCPServer(latency=0.1)
+        in_flight = {"now": 0, "max": 0}
+
+        async def handler(request):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            try:
+                response = await mock.handle(request)
+            finally:
+                in_flight["now"] -= 1
+            return response
+
+        async def scenario(url):
+            async with MCPSession(url) as session:
+                return await session.call_many([("echo", {"n": i}) for i in range(40)], concurrency=20)
+
+        results = against(mock, scenario, handler)
+        assert [json.loads(result["content"][0]["text"])["n"] for result in results] == list(range(40))
+        assert in_flight["max"] == 20
+        assert len(mock.sessions) == 1
+
+    def test_errors(self):
+        """Test JSON-RPC errors raise MCPError and call_many can collect failures"""
+        mock = MockMCPServer()
+
+        async def scenario(url):
+            async with MCPSession(url) as session:
+                with pytest.raises(MCPError) as error:
+                    await session.request("resources/list")
+                assert error.value.code == -32601
+                results = await session.call_many([("echo", {}), ("payload", {"fail": 500})],
+                                                  return_exceptions=True)
+                with pytest.raises(httpx.HTTPStatusError):
+                    await session.call_many([("payload", {"fail": 503})])
+                return results
+
+        results = against(mock, scenario)
+        assert results[0]["isError"] is False
+        assert isinstance(results[1], httpx.HTTPStatusError)
+
+    def test_expired_session(self):
+        """Test a request on a session the server forgot starts a new session and retries"""
+        mock = MockMCPServer()
+
+        async def handler(request):
+            if request.headers.get("mcp-session-id") in expired:
+                return Response(404)
+            return await mock.handle(request)
+
+        async def scenario(url):
+            async with MCPSession(url) as session:
+                expired.add(session.session_id)
+                results = await session.call_many([("echo", {"n": i}) for i in range(5)], concurrency=5)
+                return results, session.session_id
+
+        expired = set()
+        results, session_id = against(mock, scenario, handler)
+        assert len(results) == 5 and session_id not in expired
+        assert mock.requests["initialize"] == 2
+
+    def test_empty_sse_data(self):
+        """Test empty keep-alive data lines are skipped and invalid JSON raises MCPError"""
+        mock = MockMCPServer()
+        bodies = {
+            "keep-alive": b"data:\n\ndata: \n\nevent: message\ndata: %s\n\n",
+            "broken": b"data: {not json\n\n",
+        }
+
+        async def handler(request):
+            message = json.loads(request.body)
+            if message.get("method") != "tools/call":
+                return await mock.handle(request)
+            name = message["params"]["name"]
+            reply = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": {"ok": name}}).encode()
+            body = bodies[name] % reply if b"%s" in bodies[name] else bodies[name]
+            return Response(200, {"Content-Type": "text/event-stream"}, body)
+
+        async def scenario(url):
+            async with MCPSession(url) as session:
+                result = await session.call_tool("keep-alive")
+                with pytest.raises(MCPError, match="Invalid JSON"):
+                    await session.call_tool("broken")
+                return result
+
+        assert against(mock, scenario, handler) == {"ok": "keep-alive"}
+
+    def test_expired_session_not_retried(self):
+        """Test retry_expired=False raises the 404 instead of starting a new session"""
+        mock = MockMCPServer()
+
+        async def handler(request):
+            if request.headers.get("mcp-session-id") and request.method == "POST" and b"tools/call" in request.body:
+                return Response(404)
+            return await mock.handle(request)
+
+        async def scenario(url):
+            async with MCPSession(url, retry_expired=False) as session:
+                with pytest.raises(httpx.HTTPStatusError) as raised:
+                    await session.call_tool("echo", {})
+                return raised.value.response.status_code
+
+        assert against(mock, scenario, handler) == 404
+        assert mock.requests["initialize"] == 1
+
+
+class TestSessionPool:
+    """Test cases for pooled sessions across servers"""
+
+    def test_call_many_across_servers(self):
+        """Test calls are spread over each server's sessions and returned in order"""
+        mocks = {"a": MockMCPServer(latency=0.05), "b": MockMCPServer(latency=0.05)}
+
+        async def scenario():
+            async with HTTPServer(mocks["a"].handle) as a, HTTPServer(mocks["b"].handle) as b:
+                async with SessionPool({"a": f"{a.url}/mcp", "b": {"url": f"{b.url}/mcp"}},
+                                       sessions_per_server=2) as pool:
+                    calls = [("ab"[i % 2], "echo", {"n": i}) for i in range(20)]
+                    results = await pool.call_many(calls, concurrency=8)
+                    with pytest.raises(KeyError):
+                        await pool.session("c")
+                    return results
+
+        results = asyncio.run(scenario())
+        assert [json.loads(result["content"][0]["text"])["n"] for result in results] == list(range(20))
+        for mock in mocks.values():
+            assert mock.requests["initialize"] == 2
+            assert mock.requests["tools/call"] == 10
+
+    def test_failed_start_closes_sessions(self):
+        """Test sessions that started are ended when another fails, and a later call starts afresh"""
+        mock = MockMCPServer()
+        initializes = []
+        deleted = []
+
+        async def handler(request):
+            if request.method == "DELETE":
+                deleted.append(request.headers.get("mcp-session-id"))
+            elif b'"initialize"' in request.body:
+                initializes.append(request)
+                if len(initializes) == 2:
+                    return Response(503)
+            return await mock.handle(request)
+
+        async def scenario():
+            async with HTTPServer(handler) as server:
+                async with SessionPool({"a": f"{server.url}/mcp"}, sessions_per_server=2) as pool:
+                    with pytest.raises(httpx.HTTPStatusError):
+                        await pool.call_tool("a", "echo", {})
+                    leftover = (list(pool._sessions), len(pool._clients), len(deleted))
+                    await pool.call_tool("a", "echo", {})
+                    return leftover, len(pool._clients)
+
+        (sessions, clients, closed), started = asyncio.run(scenario())
+        assert (sessions, clients, closed) == ([], 0, 1)
+        assert started == 1 and len(initializes) == 4
+
+    def test_run_bounded_stops_on_failure(self):
+        """Test the first failure stops new jobs from starting"""
+        started = []
+
+        def job(index):
+            async def run():
+                started.append(index)
+                await asyncio.sleep(0.01)
+                if index == 1:
+                    raise ValueError("boom")
+                return index
+            return run
+
+        with pytest.raises(ValueError):
+            asyncio.run(run_bounded([job(i) for i in range(10)], concurrency=2))
+        assert len(started) < 10
+
+    def test_package_exports(self):
+        """Test the client is importable from the package"""
+        assert mcp_bridge.MCPSession is MCPSession
+        assert mcp_bridge.SessionPool is SessionPool
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Unit tests for compressed upstream requests and responses.
+"""
+
+import asyncio
+import gzip
+import io
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from mcp_bridge import compression
+from mcp_bridge.bridge import MCPHTTPBridge
+from mcp_bridge.compression import Compression
+from mcp_bridge.httpserver import HTTPServer, Response
+from mcp_bridge.mock_server import MockMCPServer
+from tests.mock_upstream import MockBridge, sse_response
+
+
+def upload(msg_id, size: int) -> dict:
+    return {"jsonrpc": "2.0", "id": msg_id, "method": "tools/call",
+            "params": {"name": "upload", "arguments": {"text": "lorem ipsum " * (size // 12)}}}
+
+
+class TestCompressionConfig:
+    """Test cases for the compression config option"""
+
+    def test_defaults(self):
+        """Test responses accept what can be decoded and requests stay uncompressed"""
+        settings = Compression.from_config(None)
+        assert {"gzip", "deflate"} <= set(settings.accept)
+        assert not settings.should_compress(10 ** 9)
+        assert Compression.from_config(False).accept_encoding == "identity"
+
+    def test_options(self):
+        """Test config keys are applied"""
+        settings = Compression.from_config({"accept": ["gzip"], "request_threshold": 1024, "level": 1})
+        assert settings.accept_encoding == "gzip"
+        assert settings.should_compress(1024) and not settings.should_compress(1023)
+
+    def test_invalid_options(self, monkeypatch):
+        """Test bad config and missing decoder packages are rejected with ValueError"""
+        monkeypatch.setattr(compression, "find_spec", lambda name: None)
+        for config in ({"accept": ["lzma"]}, {"accept": ["br"]}, {"accept": "gzip"},
+                       {"request_threshold": 0}, {"level": 10}, {"ratio": 2}, "yes"):
+            with pytest.raises(ValueError):
+                Compression.from_config(config)
+
+
+def exchange(message, handler, **kwargs):
+    """Send one message through a mock bridge; returns the bridge's metrics"""
+
+    async def scenario():
+        bridge = MockBridge(handler, **kwargs)
+        await bridge.send_message(message)
+        await bridge.close()
+        return bridge.metrics
+
+    return asyncio.run(scenario())
+
+
+class TestBridgeCompression:
+    """Test cases for the bridge's compressed traffic"""
+
+    def test_large_request_gzipped(self, capsys):
+        """Test request bodies over the threshold are gzipped and the saving counted"""
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return sse_response({"jsonrpc": "2.0", "id": 1, "result": {}})
+
+        metrics = exchange(upload(1, 10000), handler, compression={"request_threshold": 4096})
+        assert sent[0].headers["content-encoding"] == "gzip"
+        assert json.loads(gzip.decompress(sent[0].content)) == upload(1, 10000)
+        saved = metrics.compression_saved.get("request")
+        assert saved > 0 and metrics.bytes_sent.total() == len(sent[0].content)
+
+    def test_small_request_plain(self, capsys):
+        """Test request bodies under the threshold are sent as is"""
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return sse_response({"jsonrpc": "2.0", "id": 1, "result": {}})
+
+        exchange(upload(1, 100), handler, compression={"request_threshold": 4096})
+        assert "content-encoding" not in sent[0].headers
+        assert "gzip" in sent[0].headers["accept-encoding"]
+
+    def test_compressed_sse_response(self, capsys):
+        """Test gzip SSE responses are decoded and the saving counted"""
+        result = {"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": "abc " * 5000}]}}
+        body = gzip.compress(f"event: message\ndata: {json.dumps(result)}\n\n".encode())
+
+        def handler(request):
+            return httpx.Response(200, headers={"content-type": "text/event-stream", "content-encoding": "gzip"},
+                                  stream=httpx.ByteStream(body))
+
+        metrics = exchange(upload(1, 10), handler)
+        assert json.loads(capsys.readouterr().out) == result
+        assert metrics.compression_saved.get("response") > 0
+        assert metrics.bytes_received.total() == len(body)
+
+    def test_spooled_request_gzipped(self, monkeypatch, capsys):
+        """Test a spooled stdin message is gzipped as it streams"""
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return sse_response({"jsonrpc": "2.0", "id": 2, "result": {}})
+
+        line = json.dumps(upload(2, 20000))
+        monkeypatch.setattr(sys, "stdin", io.StringIO(line + "\n"))
+
+        async def scenario():
+            bridge = MockBridge(handler, message_limits={"spill_threshold": 1000},
+                                compression={"request_threshold": 1000})
+            await bridge.read_stdin()
+            await bridge.drain()
+            await bridge.close()
+            return bridge.metrics
+
+        metrics = asyncio.run(scenario())
+        assert sent[0].headers["content-encoding"] == "gzip"
+        assert "content-length" not in sent[0].headers
+        assert gzip.decompress(sent[0].content) == line.encode()
+        assert metrics.compression_saved.get("request") == len(line) - len(sent[0].content)
+
+
+async def echo_length(request):
+    return Response(200, {"Content-Type": "text/plain"}, str(len(request.body)).encode())
+
+
+class TestCompressedServer:
+    """Test cases for the local HTTP server's compression support"""
+
+    def test_round_trip(self, capsys):
+        """Test a compressing mock server and a compressing bridge understand each other"""
+        mock = MockMCPServer(response_bytes=50000)
+
+        async def scenario():
+            async with HTTPServer(mock.handle, compress=True) as server:
+                bridge = MCPHTTPBridge(f"{server.url}/mcp", compression={"request_threshold": 1000})
+                try:
+                    await bridge.dispatch(upload(3, 5000))
+                    await bridge.dispatch({"jsonrpc": "2.0", "id": 4, "method": "tools/call",
+                                           "params": {"name": "payload", "arguments": {"events": 3}}})
+                finally:
+                    await bridge.close()
+                return bridge.metrics
+
+        metrics = asyncio.run(scenario())
+        frames = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert frames[0]["id"] == 3 and "error" not in frames[0]
+        assert len(frames[-1]["result"]["content"][0]["text"]) == 50000
+        assert mock.requests["tools/call"] == 2
+        assert metrics.compression_saved.get("request") > 0
+        assert metrics.compression_saved.get("response") > 40000
+
+    def test_body_limits(self):
+        """Test bodies over max_body_bytes are refused, declared, chunked or decompressed"""
+
+        async def scenario():
+            async with HTTPServer(echo_length, max_body_bytes=1000) as server:
+                async with httpx.AsyncClient() as client:
+                    async def chunked(size):
+                        for _ in range(size // 100):
+                            yield b"x" * 100
+
+                    gzipped = {"Content-Encoding": "gzip"}
+                    responses = [
+                        await client.post(server.url, content=b"x" * 1000),
+                        await client.post(server.url, content=b"x" * 1001),
+                        await client.post(server.url, content=chunked(2000)),
+                        await client.post(server.url, content=gzip.compress(b"x" * 1000), headers=gzipped),
+                        await client.post(server.url, content=gzip.compress(b"\0" * 10 ** 6), headers=gzipped),
+                    ]
+                    return [(response.status_code, response.text) for response in responses]
+
+        results = asyncio.run(scenario())
+        assert [status for status, _ in results] == [200, 413, 413, 200, 413]
+        assert results[0][1] == results[3][1] == "1000"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Unit tests for signal-triggered diagnostics.
+"""
+
+import asyncio
+import io
+import signal
+import threading
+import time
+import tracemalloc
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge.bridge import MCPHTTPBridge
+from mcp_bridge.diagnostics import Diagnostics
+from mcp_bridge.httpserver import HTTPServer
+from mcp_bridge.mock_server import MockMCPServer
+from tests.mock_upstream import tool_call
+
+
+def spin(seconds: float):
+    """Busy loop for the profiler to find"""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+class TestDiagnosticsConfig:
+    """Test cases for the diagnostics config option"""
+
+    def test_config(self):
+        """Test diagnostics are opt-in, and options are validated"""
+        bridge = MCPHTTPBridge("http://localhost/mcp")
+        assert bridge.diagnostics is None
+        assert MCPHTTPBridge("http://localhost/mcp", diagnostics=False).diagnostics is None
+        assert isinstance(MCPHTTPBridge("http://localhost/mcp", diagnostics=True).diagnostics, Diagnostics)
+        settings = Diagnostics.from_config(bridge, {"profile_seconds": 5, "top": 10})
+        assert settings.profile_seconds == 5 and settings.top == 10
+        for config in ({"profile_seconds": 0}, {"sample_interval": 2}, {"top": "all"}, {"signal": 1}, "yes"):
+            with pytest.raises(ValueError):
+                Diagnostics.from_config(bridge, config)
+
+
+class TestDiagnostics:
+    """Test cases for task dumps, memory snapshots and profiles"""
+
+    def test_task_dump_shows_requests(self, capsys):
+        """Test the task dump lists in-flight requests and labels their tasks"""
+        out = io.StringIO()
+
+        async def scenario():
+            async with HTTPServer(MockMCPServer().handle) as server:
+                bridge = MCPHTTPBridge(f"{server.url}/mcp", diagnostics=True)
+                try:
+                    calls = [asyncio.ensure_future(bridge.dispatch(tool_call(i, latency=0.5))) for i in (7, 8)]
+                    await asyncio.sleep(0.2)
+                    bridge.diagnostics.write_tasks(out)
+                    await asyncio.gather(*calls)
+                finally:
+                    await bridge.close()
+                return bridge
+
+        bridge = asyncio.run(scenario())
+        dump = out.getvalue()
+        assert "2 request(s) in flight" in dump
+        assert "id=7 tools/call running" in dump
+        assert "[id=8 tools/call" in dump
+        assert "send_message" in dump
+        assert not bridge.in_flight
+
+    def test_memory_snapshots(self, tmp_path):
+        """Test the first snapshot starts tracing and later ones report allocations"""
+        diagnostics = Diagnostics(MCPHTTPBridge("http://localhost/mcp"), directory=str(tmp_path))
+        was_tracing = tracemalloc.is_tracing()
+
+        async def scenario():
+            first = await diagnostics.dump()
+            kept = [bytearray(1024) for _ in range(2000)]
+            second = await diagnostics.dump()
+            del kept
+            return first, second
+
+        try:
+            first, second = asyncio.run(scenario())
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        assert [os.path.basename(path).split("-")[-1] for path in first] == ["tasks.txt", "memory.txt"]
+        if not was_tracing:
+            assert "baseline" in open(first[1]).read()
+        report = open(second[1]).read()
+        assert "Top 25 allocation sites" in report and "test_diagnostics.py" in report
+        assert "changes since the previous snapshot" in report
+
+    def test_private_files(self, tmp_path, monkeypatch):
+        """Test the default directory is private to the user and files are created mode 0600"""
+        monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+        diagnostics = Diagnostics(MCPHTTPBridge("http://localhost/mcp"), profile_seconds=0.05)
+
+        async def scenario():
+            diagnostics.start_profile()
+            await asyncio.sleep(0.2)
+
+        asyncio.run(scenario())
+        directory = tmp_path / "mcp-bridge" / "diagnostics"
+        assert diagnostics.directory == str(directory)
+        assert directory.stat().st_mode & 0o777 == 0o700
+        [path] = directory.iterdir()
+        assert path.stat().st_mode & 0o777 == 0o600
+
+    def test_snapshot_off_loop(self, tmp_path, monkeypatch):
+        """Test the memory snapshot is taken on a worker thread, not the event loop"""
+        diagnostics = Diagnostics(MCPHTTPBridge("http://localhost/mcp"), directory=str(tmp_path))
+        threads = []
+        take_snapshot = tracemalloc.take_snapshot
+        was_tracing = tracemalloc.is_tracing()
+
+        def recording_snapshot():
+            threads.append(threading.get_ident())
+            return take_snapshot()
+
+        monkeypatch.setattr(tracemalloc, "take_snapshot", recording_snapshot)
+
+        async def scenario():
+            await diagnostics.dump()
+            return threading.get_ident()
+
+        try:
+            loop_thread = asyncio.run(scenario())
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        assert threads and loop_thread not in threads
+
+    def test_profile(self, tmp_path):
+        """Test a profile samples the event loop thread and writes collapsed stacks"""
+        diagnostics = Diagnostics(MCPHTTPBridge("http://localhost/mcp"), directory=str(tmp_path),
+                                  sample_interval=0.001)
+
+        async def scenario():
+            diagnostics.toggle_profile()
+            spin(0.2)
+            await asyncio.sleep(0.05)
+            diagnostics.toggle_profile()
+
+        asyncio.run(scenario())
+        assert diagnostics.sampler is None
+        [path] = tmp_path.glob("*-profile.folded")
+        lines = path.read_text().splitlines()
+        assert any(line.split(";")[-1].startswith("spin (") for line in lines)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    def test_profile_stops_on_its_own(self, tmp_path):
+        """Test a profile ends after profile_seconds"""
+        diagnostics = Diagnostics(MCPHTTPBridge("http://localhost/mcp"), directory=str(tmp_path),
+                                  profile_seconds=0.1)
+
+        async def scenario():
+            diagnostics.start_profile()
+            await asyncio.sleep(0.3)
+
+        asyncio.run(scenario())
+        assert diagnostics.sampler is None
+        assert len(list(tmp_path.glob("*-profile.folded"))) == 1
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="no SIGUSR1 on this platform")
+    def test_signals(self, tmp_path):
+        """Test SIGUSR1 writes a dump and SIGUSR2 toggles a profile"""
+        diagnostics = Diagnostics(MCPHTTPBridge("http://localhost/mcp"), directory=str(tmp_path))
+        was_tracing = tracemalloc.is_tracing()
+
+        async def scenario():
+            assert diagnostics.install()
+            try:
+                os.kill(os.getpid(), signal.SIGUSR1)
+                os.kill(os.getpid(), signal.SIGUSR2)
+                await asyncio.sleep(0.1)
+                await diagnostics.dumping
+                profiling = diagnostics.sampler is not None
+                os.kill(os.getpid(), signal.SIGUSR2)
+                await asyncio.sleep(0.1)
+            finally:
+                diagnostics.uninstall()
+            return profiling
+
+        try:
+            assert asyncio.run(scenario())
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        names = sorted(path.name.rsplit("-", 1)[1] for path in tmp_path.iterdir())
+        assert names == ["memory.txt", "profile.folded", "tasks.txt"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
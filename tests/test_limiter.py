@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the adaptive (AIMD) concurrency limiter.
+"""
+
+import asyncio
+import json
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from mcp_bridge import limiter as limiter_module
+from mcp_bridge.limiter import AdaptiveLimiter, QueueFullError, is_overload
+from tests.mock_upstream import MockBridge, sse_response
+
+
+class TestAdaptiveLimiter:
+    """Test cases for limit adjustment and queueing"""
+
+    def test_additive_increase_with_flat_latency(self):
+        """Test the limit grows while latency stays at the baseline"""
+        limiter = AdaptiveLimiter(initial=2, max_limit=8)
+
+        async def scenario():
+            for _ in range(20):
+                await limiter.acquire()
+                limiter.release(latency=0.05)
+
+        asyncio.run(scenario())
+        assert limiter.current_limit > 2
+        assert limiter.current_limit <= 8
+
+    def test_multiplicative_decrease_on_overload(self):
+        """Test the limit halves when the upstream signals overload"""
+        limiter = AdaptiveLimiter(initial=16, max_limit=32)
+
+        async def scenario():
+            await limiter.acquire()
+            limiter.release(overloaded=True)
+
+        asyncio.run(scenario())
+        assert limiter.current_limit == 8
+
+    def test_decrease_on_rising_latency(self):
+        """Test the limit drops when latency climbs well above baseline"""
+        limiter = AdaptiveLimiter(initial=16, max_limit=32, latency_tolerance=1.5)
+
+        async def scenario():
+            await limiter.acquire()
+            limiter.release(latency=0.01)
+            await limiter.acquire()
+            limiter.release(latency=1.0)
+
+        asyncio.run(scenario())
+        assert limiter.current_limit < 16
+
+    def test_mixed_latencies(self, monkeypatch):
+        """Test fast list calls among slow tool calls do not drive the limit down"""
+        now = [1000.0]
+        monkeypatch.setattr(limiter_module, "time", type("Clock", (), {"monotonic": staticmethod(lambda: now[0])}))
+        limiter = AdaptiveLimiter(initial=4, max_limit=8)
+
+        async def scenario():
+            for i in range(400):
+                await limiter.acquire()
+                key, latency = (("tools/list", ""), 0.01) if i % 20 == 0 else (("tools/call", "slow"), 0.4)
+                now[0] += latency
+                limiter.release(latency=latency, key=key)
+
+        asyncio.run(scenario())
+        assert limiter.current_limit == 8
+
+    def test_never_below_minimum(self):
+        """Test repeated overload stops at the minimum limit"""
+        limiter = AdaptiveLimiter(initial=4, min_limit=2)
+
+        async def scenario():
+            for _ in range(10):
+                await limiter.acquire()
+                limiter._last_decrease = 0.0
+                limiter.release(overloaded=True)
+
+        asyncio.run(scenario())
+        assert limiter.current_limit == 2
+
+    def test_queue_overflow_raises(self):
+        """Test requests beyond the queue size are rejected"""
+        limiter = AdaptiveLimiter(initial=1, queue_size=1)
+
+        async def scenario():
+            await limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            assert limiter.queued == 1
+            with pytest.raises(QueueFullError):
+                await limiter.acquire()
+            limiter.release(latency=0.01)
+            await waiter
+            assert limiter.in_flight == 1
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Test a cancelled queued request does not keep its place"""
+        limiter = AdaptiveLimiter(initial=1)
+
+        async def scenario():
+            await limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            assert limiter.queued == 0
+            limiter.release(latency=0.01)
+            assert limiter.in_flight == 0
+
+        asyncio.run(scenario())
+
+    def test_from_config(self):
+        """Test building from the adaptive_concurrency config option"""
+        limiter = AdaptiveLimiter.from_config({"initial": 8, "max": 32, "queue_size": 10})
+        assert limiter.current_limit == 8
+        assert limiter.max_limit == 32
+        assert limiter.queue_size == 10
+        assert AdaptiveLimiter.from_config(True).current_limit == 4
+
+    def test_capacity_caps_max(self):
+        """Test max and initial are capped to what the lanes can admit"""
+        assert AdaptiveLimiter.from_config(True, capacity=12).max_limit == 12
+        limiter = AdaptiveLimiter.from_config({"initial": 8, "max": 32}, capacity=6)
+        assert limiter.max_limit == 6 and limiter.current_limit == 6
+        with pytest.raises(ValueError):
+            AdaptiveLimiter.from_config({"min": 8}, capacity=4)
+
+    def test_invalid_config_rejected(self):
+        """Test unknown keys and inconsistent bounds are rejected"""
+        with pytest.raises(ValueError):
+            AdaptiveLimiter.from_config({"ceiling": 10})
+        with pytest.raises(ValueError):
+            AdaptiveLimiter.from_config({"initial": 100, "max": 10})
+
+
+class TestIsOverload:
+    """Test cases for overload detection"""
+
+    def test_overload_signals(self):
+        """Test timeouts, 429 and 503 count as overload"""
+        request = httpx.Request("POST", "http://upstream.test/mcp")
+        assert is_overload(httpx.ReadTimeout("slow", request=request))
+        for status in (429, 503):
+            response = httpx.Response(status, request=request)
+            assert is_overload(httpx.HTTPStatusError("busy", request=request, response=response))
+
+    def test_other_errors_are_not_overload(self):
+        """Test client errors and success give no overload signal"""
+        request = httpx.Request("POST", "http://upstream.test/mcp")
+        response = httpx.Response(400, request=request)
+        assert not is_overload(httpx.HTTPStatusError("bad", request=request, response=response))
+        assert not is_overload(None)
+
+
+class TestBridgeIntegration:
+    """Test cases for the limiter inside the bridge"""
+
+    def test_max_capped_to_lanes(self):
+        """Test the limit cannot exceed the discovery and tools lane budgets"""
+        bridge = MockBridge(lambda request: None, adaptive_concurrency=True, lanes={"tools": 6})
+        assert bridge.limiter.max_limit == 10
+
+    def test_429_backs_off(self, capsys):
+        """Test that a 429 from the upstream lowers the limit"""
+
+        async def scenario():
+            async def handler(request):
+                return httpx.Response(429)
+
+            bridge = MockBridge(handler, adaptive_concurrency={"initial": 8, "max": 16})
+            await bridge.dispatch({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                                   "params": {"name": "t", "arguments": {}}})
+            await bridge.close()
+            return bridge.limiter.current_limit
+
+        assert asyncio.run(scenario()) == 4
+        assert json.loads(capsys.readouterr().out)["error"]["code"] == -32603
+
+    def test_lane_wait_not_counted_as_latency(self, capsys):
+        """Test time queued for a lane slot is not fed to the limiter as latency"""
+        latencies = []
+        totals = []
+
+        async def scenario():
+            async def handler(request):
+                message = json.loads(request.content)
+                await asyncio.sleep(0.1)
+                return sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+            bridge = MockBridge(handler, adaptive_concurrency={"initial": 4}, lanes={"tools": 1})
+            release = bridge.limiter.release
+            bridge.limiter.release = lambda latency=None, **kwargs: (latencies.append(latency),
+                                                                      release(latency, **kwargs))
+            started = time.monotonic()
+
+            async def call(msg_id):
+                await bridge.dispatch({"jsonrpc": "2.0", "id": msg_id, "method": "tools/call",
+                                       "params": {"name": "t", "arguments": {}}})
+                totals.append(time.monotonic() - started)
+
+            await asyncio.gather(*(call(i) for i in range(3)))
+            await bridge.close()
+
+        asyncio.run(scenario())
+        # The lane runs one call at a time, so they finish (and release) in
+        # order, and call k queued behind k earlier 0.1 s calls. However
+        # slow the machine, only that queueing separates latency and total.
+        assert len(latencies) == 3
+        assert all(latency >= 0.09 for latency in latencies)
+        queued = [total - latency for total, latency in zip(totals, latencies)]
+        assert queued[1] >= 0.09 and queued[2] >= 0.18
+
+    def test_overflow_returns_error(self, capsys):
+        """Test that overflowing the queue produces a JSON-RPC error"""
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def handler(request):
+                message = json.loads(request.content)
+                await release.wait()
+                return sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+            bridge = MockBridge(handler, adaptive_concurrency={"initial": 1, "queue_size": 1})
+            for i in range(3):
+                bridge._spawn(bridge.dispatch({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                                               "params": {"name": "t", "arguments": {}}}))
+            await asyncio.sleep(0.05)
+            release.set()
+            await bridge.drain()
+            await bridge.close()
+
+        asyncio.run(scenario())
+        responses = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        errors = [r for r in responses if "error" in r]
+        assert len(errors) == 1
+        assert errors[0]["error"]["code"] == -32000
+        assert "queue is full" in errors[0]["error"]["message"]
+        assert len(responses) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bench load generator.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from click.testing import CliRunner
+
+from mcp_bridge.cli import cli
+from mcp_bridge.httpserver import HTTPServer, Response
+from mcp_bridge.loadgen import Workload, format_report, latency_stats, run_bench
+from mcp_bridge.mock_server import MockMCPServer
+
+
+def bench(mock: MockMCPServer, handler=None, **kwargs) -> dict:
+    """Run run_bench against an in-process mock server"""
+
+    async def scenario():
+        async with HTTPServer(handler or mock.handle) as server:
+            return await run_bench(f"{server.url}/mcp", **kwargs)
+
+    return asyncio.run(scenario())
+
+
+class TestWorkload:
+    """Test cases for request mixes"""
+
+    def test_list_only_without_tool(self):
+        """Test the default mix is tools/list only"""
+        workload = Workload.from_options()
+        assert {workload.choose()["method"] for _ in range(20)} == {"tools/list"}
+
+    def test_weights(self):
+        """Test steps are chosen in proportion to their weights"""
+        workload = Workload.from_options("echo", {"x": 1}, list_weight=1, call_weight=9, seed=1)
+        calls = sum(workload.choose()["method"] == "tools/call" for _ in range(1000))
+        assert 850 < calls < 950
+
+    def test_script_file(self, tmp_path):
+        """Test a workload loaded from a JSON script"""
+        path = tmp_path / "mix.json"
+        path.write_text(json.dumps([{"method": "ping"}, {"method": "tools/list", "weight": 0}]))
+        workload = Workload.from_file(str(path))
+        assert workload.choose()["method"] == "ping"
+
+    def test_invalid_steps(self, tmp_path):
+        """Test malformed workloads are rejected"""
+        with pytest.raises(ValueError):
+            Workload([])
+        with pytest.raises(ValueError):
+            Workload([{"params": {}}])
+        with pytest.raises(ValueError):
+            Workload([{"method": "ping", "weight": 0}])
+
+
+class TestRunBench:
+    """Test cases for running a load test"""
+
+    def test_closed_loop(self):
+        """Test a closed-loop run over several sessions"""
+        mock = MockMCPServer()
+        report = bench(mock, workload=Workload.from_options("echo", {}, seed=3),
+                       sessions=3, concurrency=6, duration=None, requests=60)
+
+        assert report["mode"] == "closed"
+        assert report["requests"] == 60
+        assert report["errors"] == 0
+        assert len(mock.sessions) == 3
+        assert mock.requests["tools/list"] + mock.requests["tools/call"] == 60
+        assert set(report["by_request"]) == {"tools/list", "tools/call echo"}
+        assert report["latency_ms"]["count"] == 60
+
+    def test_open_loop_rate(self):
+        """Test an open-loop run is paced at the target rate"""
+        report = bench(MockMCPServer(), rate=200, duration=None, requests=40)
+        assert report["mode"] == "open"
+        assert report["requests"] == 40
+        # 40 requests at 200/s take at least 195 ms to issue
+        assert report["duration_s"] >= 0.19
+
+    def test_duration_limit(self):
+        """Test the run stops at the deadline"""
+        start = time.monotonic()
+        report = bench(MockMCPServer(latency=0.01), duration=0.3)
+        assert report["requests"] > 0
+        assert time.monotonic() - start < 2
+
+    def test_error_breakdown(self):
+        """Test errors are grouped by request and category"""
+        workload = Workload([
+            {"method": "tools/call", "params": {"name": "payload", "arguments": {"fail": 503}}},
+            {"method": "tools/call", "params": {"name": "missing"}},
+            {"method": "resources/list"},
+        ], seed=0)
+        report = bench(MockMCPServer(), workload=workload, duration=None, requests=30)
+
+        assert report["errors"] == 30
+        assert set(report["by_request"]["tools/call payload"]["errors"]) == {"http 503"}
+        assert set(report["by_request"]["tools/call missing"]["errors"]) == {"tool error"}
+        assert set(report["by_request"]["resources/list"]["errors"]) == {"jsonrpc -32601"}
+        assert "http 503" in format_report(report)
+
+    def test_expired_session_not_retried(self):
+        """Test a session the server forgot counts as an error instead of being restarted"""
+        mock = MockMCPServer()
+
+        async def handler(request):
+            if json.loads(request.body or b"{}").get("method") == "tools/list":
+                return Response(404)
+            return await mock.handle(request)
+
+        report = bench(mock, handler, duration=None, requests=10)
+        assert report["errors"] == 10
+        assert set(report["by_request"]["tools/list"]["errors"]) == {"http 404"}
+        assert mock.requests["initialize"] == 1
+
+    def test_latency_stats(self):
+        """Test percentile summary in milliseconds"""
+        stats = latency_stats([i / 1000 for i in range(1, 101)])
+        assert stats["count"] == 100
+        assert stats["p50"] == 50.0
+        assert stats["p90"] == 90.0
+        assert stats["p99"] == 99.0
+        assert stats["max"] == 100.0
+        assert latency_stats([])["p50"] is None
+
+
+class TestBenchCommand:
+    """Test cases for the mcp-bridge bench command"""
+
+    def test_bench_named_config(self, tmp_path):
+        """Test bench reads the server from a config and writes a report"""
+        loop = asyncio.new_event_loop()
+        server = HTTPServer(MockMCPServer().handle)
+        loop.run_until_complete(server.start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            config = tmp_path / "bench.json"
+            config.write_text(json.dumps({"url": f"{server.url}/mcp"}))
+            output = tmp_path / "report.json"
+            result = CliRunner().invoke(cli, ["bench", str(config), "--requests", "20", "-s", "2",
+                                              "-t", "echo", "-o", str(output)])
+        finally:
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+        assert result.exit_code == 0, result.output
+        assert "req/s" in result.output
+        assert json.loads(output.read_text())["requests"] == 20
+
+    def test_bench_missing_config(self, tmp_path, monkeypatch):
+        """Test bench fails cleanly without a config"""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.chdir(tmp_path)
+        result = CliRunner().invoke(cli, ["bench", str(tmp_path / "nope.json"), "--requests", "1"])
+        assert result.exit_code == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
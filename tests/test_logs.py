@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for leveled, queue-backed logging.
+"""
+
+import io
+import json
+import logging
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge.logs import (
+    DeferredQueueHandler, JSONFormatter, configure_logging, logger, stop_logging
+)
+
+
+@pytest.fixture
+def log_stream():
+    """Configure bridge logging into a buffer, restoring defaults afterwards"""
+    stream = io.StringIO()
+    yield stream
+    stop_logging()
+    logger.handlers[:] = []
+    logger.setLevel(logging.NOTSET)
+    logger.propagate = True
+
+
+class TestConfigureLogging:
+    """Test cases for levels and formats"""
+
+    def test_info_hides_debug(self, log_stream):
+        """Test the info level drops per-message debug lines"""
+        configure_logging("info", "text", log_stream)
+        logger.debug("Sending: %s", "ping")
+        logger.info("Bridge ready")
+        stop_logging()
+        assert log_stream.getvalue() == "[Bridge] Bridge ready\n"
+
+    def test_quiet_keeps_warnings(self, log_stream):
+        """Test the quiet level only lets warnings and errors through"""
+        configure_logging("quiet", "text", log_stream)
+        logger.info("Session ID: %s", "abc")
+        logger.warning("Stdout broken")
+        stop_logging()
+        assert log_stream.getvalue() == "[Bridge] Stdout broken\n"
+
+    def test_json_format(self, log_stream):
+        """Test JSON lines carry request ids and durations"""
+        configure_logging("debug", "json", log_stream)
+        logger.debug("Completed %s in %.1fms", "tools/call", 12.5,
+                     extra={"request_id": 7, "method": "tools/call", "duration_ms": 12.5})
+        stop_logging()
+        entry = json.loads(log_stream.getvalue())
+        assert entry["level"] == "debug"
+        assert entry["msg"] == "Completed tools/call in 12.5ms"
+        assert entry["request_id"] == 7
+        assert entry["duration_ms"] == 12.5
+
+    def test_invalid_level_rejected(self):
+        """Test that unknown levels are rejected"""
+        with pytest.raises(ValueError):
+            configure_logging("verbose")
+
+
+class TestCLILogging:
+    """Test cases for logging in CLI subcommands"""
+
+    def test_subcommands_use_bridge_logging(self, log_stream, tmp_path, monkeypatch):
+        """Test subcommand log messages get the bridge format and level"""
+        from click.testing import CliRunner
+        from mcp_bridge.cli import cli
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "config.json").write_text(json.dumps({"url": "http://127.0.0.1:1/mcp"}))
+        result = CliRunner().invoke(cli, ["--log-format", "json", "bench", "--requests", "1", "--timeout", "1"])
+        entries = [json.loads(line) for line in result.output.splitlines() if line.startswith("{")]
+        assert any("deprecated" in entry["msg"] and entry["level"] == "warning" for entry in entries)
+
+        result = CliRunner().invoke(cli, ["--log-level", "quiet", "bench", "--requests", "1", "--timeout", "1"])
+        assert "[Bridge] Warning: Using config.json" in result.output
+        assert "Loaded config" not in result.output
+
+
+class TestDeferredFormatting:
+    """Test cases for keeping formatting off the caller's thread"""
+
+    def test_record_is_not_formatted_when_queued(self):
+        """Test queued records keep their unmerged message and args"""
+        queued = []
+
+        class ListQueue:
+            def put_nowait(self, record):
+                queued.append(record)
+
+        handler = DeferredQueueHandler(ListQueue())
+        record = logging.LogRecord("mcp_bridge", logging.INFO, __file__, 1,
+                                   "Received SSE: id=%s", (3,), None)
+        handler.emit(record)
+        assert queued[0].msg == "Received SSE: id=%s"
+        assert queued[0].args == (3,)
+
+    def test_exception_in_json(self):
+        """Test exceptions are rendered into the exc field"""
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            record = logging.LogRecord("mcp_bridge", logging.ERROR, __file__, 1,
+                                       "Error: %s", ("boom",), sys.exc_info())
+        entry = json.loads(JSONFormatter().format(record))
+        assert "RuntimeError: boom" in entry["exc"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the metrics registry and exporters.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from mcp_bridge.metrics import Counter, Histogram, MetricsExporter, MetricsRegistry
+from tests.mock_upstream import MockBridge, sse_response
+
+
+class TestMetricTypes:
+    """Test cases for counters and histograms"""
+
+    def test_counter_render(self):
+        """Test counters render one sample per label set"""
+        counter = Counter("requests_total", "Requests", ("method",))
+        counter.inc("ping")
+        counter.inc("ping")
+        counter.inc("tools/call", amount=3)
+
+        rendered = counter.render()
+        assert "# TYPE requests_total counter" in rendered
+        assert 'requests_total{method="ping"} 2' in rendered
+        assert 'requests_total{method="tools/call"} 3' in rendered
+
+    def test_label_escaping(self):
+        """Test quotes in label values are escaped"""
+        counter = Counter("calls_total", "Calls", ("tool",))
+        counter.inc('say "hi"')
+        assert 'calls_total{tool="say \\"hi\\""} 1' in counter.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count"""
+        histogram = Histogram("latency_seconds", "Latency", (), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value=value)
+
+        rendered = histogram.render()
+        assert 'latency_seconds_bucket{le="0.1"} 1' in rendered
+        assert 'latency_seconds_bucket{le="1"} 3' in rendered
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in rendered
+        assert "latency_seconds_count 4" in rendered
+        assert "latency_seconds_sum 6.05" in rendered
+
+    def test_histogram_quantile(self):
+        """Test quantile estimates fall in the right bucket"""
+        histogram = Histogram("latency_seconds", "Latency", (), buckets=(0.1, 1.0, 10.0))
+        for _ in range(90):
+            histogram.observe(value=0.05)
+        for _ in range(10):
+            histogram.observe(value=5.0)
+
+        assert histogram.quantile(0.5) <= 0.1
+        assert 1.0 < histogram.quantile(0.99) <= 10.0
+        assert Histogram("empty", "Empty").quantile(0.5) is None
+
+
+class TestBridgeMetrics:
+    """Test cases for metrics recorded by the bridge"""
+
+    def test_request_metrics(self, capsys):
+        """Test counts, latency, bytes and SSE events are recorded"""
+
+        async def scenario():
+            async def handler(request):
+                message = json.loads(request.content)
+                if message["params"]["name"] == "broken":
+                    return httpx.Response(500)
+                return sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+            bridge = MockBridge(handler)
+            for i, name in enumerate(["weather", "weather", "broken"]):
+                await bridge.dispatch({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                                       "params": {"name": name, "arguments": {}}})
+            await bridge.close()
+            return bridge.metrics
+
+        metrics = asyncio.run(scenario())
+        capsys.readouterr()
+
+        assert metrics.requests.get("tools/call", "weather") == 2
+        assert metrics.errors.get("tools/call", "broken") == 1
+        assert metrics.errors.get("tools/call", "weather") == 0
+        assert metrics.latency.count("tools/call", "weather") == 2
+        assert metrics.ttfb.count("tools/call", "weather") == 2
+        assert metrics.sse_events.total() == 2
+        assert metrics.bytes_sent.total() > 0
+        assert metrics.bytes_received.total() > 0
+        assert metrics.in_flight.total() == 0
+
+    def test_summary(self):
+        """Test the stderr summary lists each method"""
+        registry = MetricsRegistry()
+        registry.requests.inc("tools/list", "")
+        registry.latency.observe("tools/list", "", value=0.02)
+        summary = registry.summary()
+        assert "tools/list: n=1 err=0" in summary
+        assert "sse_events=0" in summary
+
+
+class TestMetricsExporter:
+    """Test cases for the metrics exporters"""
+
+    def test_unknown_option_rejected(self):
+        """Test that misspelled options are rejected"""
+        with pytest.raises(ValueError):
+            MetricsExporter(MetricsRegistry(), {"prometheus": 9464})
+
+    def test_prometheus_endpoint(self):
+        """Test the HTTP endpoint serves the exposition format"""
+
+        async def scenario():
+            registry = MetricsRegistry()
+            registry.requests.inc("ping", "")
+            exporter = MetricsExporter(
+                registry, {"prometheus_port": 0, "summary_interval": 0})
+            await exporter.start()
+            port = exporter._servers[0].sockets[0].getsockname()[1]
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"http://127.0.0.1:{port}/metrics")
+            await exporter.stop()
+            return response
+
+        response = asyncio.run(scenario())
+        assert response.status_code == 200
+        assert 'mcp_bridge_requests_total{method="ping",tool=""} 1' in response.text
+
+    def test_textfile(self, tmp_path):
+        """Test the textfile exporter writes on shutdown"""
+        path = tmp_path / "mcp_bridge.prom"
+
+        async def scenario():
+            registry = MetricsRegistry()
+            registry.sse_events.inc()
+            exporter = MetricsExporter(
+                registry, {"textfile": str(path), "summary_interval": 0})
+            await exporter.start()
+            await exporter.stop()
+
+        asyncio.run(scenario())
+        assert "mcp_bridge_sse_events_total 1" in path.read_text()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
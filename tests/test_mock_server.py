@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the local stand-in MCP server and the bridge's real HTTP path.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from mcp_bridge.bridge import MCPHTTPBridge
+from mcp_bridge.httpserver import HTTPServer
+from mcp_bridge.mock_server import MockMCPServer, make_text
+from tests.mock_upstream import tool_call
+
+
+async def run_bridge_session(mock: MockMCPServer, messages):
+    """Send messages through a real bridge to a mock server on loopback"""
+    async with HTTPServer(mock.handle) as server:
+        bridge = MCPHTTPBridge(f"{server.url}/mcp")
+        try:
+            for message in messages:
+                await bridge.dispatch(message)
+        finally:
+            await bridge.close()
+        return bridge
+
+
+class TestMockServer:
+    """Test cases for the stand-in server through the bridge"""
+
+    def test_session_established(self, capsys):
+        """Test initialize returns a session ID the bridge keeps"""
+        mock = MockMCPServer()
+        bridge = asyncio.run(run_bridge_session(mock, [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        ]))
+        response = json.loads(capsys.readouterr().out)
+        assert response["result"]["serverInfo"]["name"] == "mcp-bridge-mock"
+        assert bridge.session_id in mock.sessions
+        assert mock.requests["notifications/initialized"] == 1
+
+    def test_result_size_and_events(self, capsys):
+        """Test per-call overrides for result size and SSE event count"""
+        mock = MockMCPServer()
+        asyncio.run(run_bridge_session(mock, [tool_call(5, size=10000, events=4)]))
+
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [line.get("method") for line in lines[:3]] == ["notifications/progress"] * 3
+        assert lines[3]["id"] == 5
+        assert len(lines[3]["result"]["content"][0]["text"]) == 10000
+
+    def test_failure_injection(self, capsys):
+        """Test injected HTTP failures surface as JSON-RPC errors"""
+        mock = MockMCPServer(failure_rate=1.0, failure_status=503, seed=1)
+        asyncio.run(run_bridge_session(mock, [tool_call(9)]))
+
+        response = json.loads(capsys.readouterr().out)
+        assert response["id"] == 9
+        assert "503" in response["error"]["message"]
+
+    def test_make_text_is_deterministic(self):
+        """Test generated payloads have the exact size and are repeatable"""
+        assert len(make_text(12345)) == 12345
+        assert make_text(500) == make_text(500)
+
+
+class TestHTTPServer:
+    """Test cases for the minimal HTTP server"""
+
+    def test_chunked_request_body(self):
+        """Test chunked request bodies are reassembled"""
+
+        async def scenario():
+            async def handler(request):
+                from mcp_bridge.httpserver import Response
+                return Response(200, {"Content-Type": "text/plain"}, request.body[::-1])
+
+            async with HTTPServer(handler) as server:
+                async def body():
+                    yield b"hello "
+                    yield b"world"
+
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(server.url, content=body())
+                    again = await client.post(server.url, content=b"abc")
+                return response.text, again.text
+
+        assert asyncio.run(scenario()) == ("dlrow olleh", "cba")
+
+    def test_handler_error_returns_500(self):
+        """Test exceptions in handlers become 500 responses"""
+
+        async def scenario():
+            async def handler(request):
+                raise RuntimeError("broken handler")
+
+            async with HTTPServer(handler) as server:
+                async with httpx.AsyncClient() as client:
+                    return await client.get(server.url)
+
+        response = asyncio.run(scenario())
+        assert response.status_code == 500
+        assert "broken handler" in response.text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
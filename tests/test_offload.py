@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for offloading large JSON messages off the event loop.
+"""
+
+import asyncio
+import io
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge.offload import EncodedMessage, Offloader, prepare_request, relay_event
+from tests.mock_upstream import MockBridge, big_result, relay, sse_response
+
+
+class TestWorkerFunctions:
+    """Test cases for the functions that run in the pool"""
+
+    def test_relay_event(self):
+        """Test an SSE event is re-encoded exactly as the inline path would"""
+        message = big_result(3, 10)
+        data = json.dumps(message, separators=(",", ":"))
+        assert relay_event(data) == (3, json.dumps(message))
+
+    def test_relay_invalid_event(self):
+        """Test invalid JSON raises a plain ValueError"""
+        with pytest.raises(ValueError) as exc_info:
+            relay_event("{not json")
+        assert type(exc_info.value) is ValueError
+
+    def test_prepare_request_repairs_params(self):
+        """Test tools/call arguments are repaired and only the envelope comes back"""
+        line = json.dumps({"jsonrpc": "2.0", "id": 4, "method": "tools/call",
+                           "params": {"name": "search", "arguments": {"filter": '{"a": 1}', "blob": "y" * 100}}})
+        envelope, body, fixed = prepare_request(line)
+        assert envelope == {"jsonrpc": "2.0", "id": 4, "method": "tools/call", "params": {"name": "search"}}
+        assert json.loads(body)["params"]["arguments"]["filter"] == {"a": 1}
+        assert fixed == ["filter:dict"]
+
+
+class TestOffloaderConfig:
+    """Test cases for the offload config option"""
+
+    def test_defaults(self):
+        """Test offloading is on by default and can be disabled"""
+        assert Offloader.from_config(None).threshold == 1024 * 1024
+        assert Offloader.from_config(True).executor == "process"
+        assert Offloader.from_config(False) is None
+
+    def test_options(self):
+        """Test config keys are applied"""
+        offloader = Offloader.from_config({"threshold": 4096, "executor": "thread", "workers": 4})
+        assert (offloader.threshold, offloader.executor, offloader.workers) == (4096, "thread", 4)
+        assert offloader.should_offload(4096) and not offloader.should_offload(4095)
+
+    def test_invalid_options(self):
+        """Test bad config is rejected with ValueError"""
+        for config in ({"threshold": 0}, {"executor": "gpu"}, {"workers": 0}, {"size": 1}, "yes"):
+            with pytest.raises(ValueError):
+                Offloader.from_config(config)
+
+
+class TestBridgeOffload:
+    """Test cases for the bridge's use of the offload pool"""
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_large_event_offloaded(self, executor, capsys):
+        """Test events over the threshold go through the pool and arrive intact"""
+        bridge, frames = relay(5000, capsys, offload={"threshold": 1000, "executor": executor, "workers": 1})
+        assert bridge.metrics.offloaded.get("sse") == 1
+        assert frames == [big_result(1, 5000)]
+
+    def test_small_event_inline(self, capsys):
+        """Test events under the threshold stay on the event loop"""
+        bridge, frames = relay(100, capsys, offload={"threshold": 1000, "executor": "thread"})
+        assert bridge.metrics.offloaded.get("sse") == 0
+        assert frames == [big_result(1, 100)]
+
+    def test_large_stdin_message(self, monkeypatch, capsys):
+        """Test a large tools/call from stdin is repaired in the pool and sent as encoded"""
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content))
+            return sse_response({"jsonrpc": "2.0", "id": sent[-1]["id"], "result": {}})
+
+        message = {"jsonrpc": "2.0", "id": 8, "method": "tools/call",
+                   "params": {"name": "upload", "arguments": {"meta": '{"k": [1, 2]}', "data": "z" * 5000}}}
+        monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps(message) + "\n"))
+
+        async def scenario():
+            bridge = MockBridge(handler, offload={"threshold": 1000, "executor": "thread"})
+            await bridge.read_stdin()
+            await bridge.drain()
+            offloaded = bridge.metrics.offloaded.get("stdin")
+            requests = bridge.metrics.requests.get("tools/call", "upload")
+            await bridge.close()
+            return offloaded, requests
+
+        assert asyncio.run(scenario()) == (1, 1)
+        assert sent[0]["params"]["arguments"]["meta"] == {"k": [1, 2]}
+        assert sent[0]["params"]["arguments"]["data"] == "z" * 5000
+        assert json.loads(capsys.readouterr().out) == {"jsonrpc": "2.0", "id": 8, "result": {}}
+
+    def test_encoded_message_is_a_dict(self):
+        """Test the envelope behaves like the message for routing and errors"""
+        message = EncodedMessage({"jsonrpc": "2.0", "id": 2, "method": "tools/call"}, b"{}")
+        assert message.get("id") == 2 and message.body == b"{}"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
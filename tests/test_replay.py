@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Unit tests for traffic recording and replay.
+"""
+
+import asyncio
+import io
+import json
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from mcp_bridge import replay as replay_module
+from mcp_bridge.bridge import MCPHTTPBridge
+from mcp_bridge.httpserver import HTTPServer
+from mcp_bridge.recording import Recorder, Recording
+from mcp_bridge.replay import RecordedUpstream, latency_summary, replay_through_bridge
+from tests.mock_upstream import MockBridge, sse_response
+
+STDIN = [
+    {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+     "params": {"protocolVersion": "2024-11-05", "capabilities": {}}},
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    {"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+     "params": {"name": "search", "arguments": {"filter": '{"a": 1}'}}},
+]
+
+
+async def handler(request):
+    message = json.loads(request.content)
+    if "id" not in message:
+        return httpx.Response(202)
+    if message["method"] == "initialize":
+        response = sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {"serverInfo": {}}})
+        response.headers["mcp-session-id"] = "session-1"
+        return response
+    body = b"".join(
+        f"event: message\ndata: {json.dumps(event)}\n\n".encode() for event in [
+            {"jsonrpc": "2.0", "method": "notifications/progress", "params": {"progress": 1}},
+            {"jsonrpc": "2.0", "id": message["id"],
+             "result": {"content": [{"type": "text", "text": json.dumps(message["params"]["arguments"])}]}},
+        ])
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=httpx.ByteStream(body))
+
+
+def run_session(bridge, monkeypatch, capsys):
+    """Feed STDIN through a bridge and return the stdout frames"""
+    monkeypatch.setattr(sys, "stdin", io.StringIO("".join(json.dumps(m) + "\n" for m in STDIN)))
+
+    async def scenario():
+        await bridge.read_stdin()
+        await bridge.drain()
+        await bridge.close()
+
+    asyncio.run(scenario())
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def record_session(path, monkeypatch, capsys):
+    bridge = MockBridge(handler, recorder=Recorder(str(path), "http://upstream.test/mcp"))
+    return run_session(bridge, monkeypatch, capsys)
+
+
+class TestRecorder:
+    """Test cases for capturing traffic"""
+
+    def test_records_full_session(self, tmp_path, monkeypatch, capsys):
+        """Test stdin, upstream exchanges, SSE events and stdout are all captured"""
+        path = tmp_path / "capture.jsonl"
+        frames = record_session(path, monkeypatch, capsys)
+        recording = Recording.load(str(path))
+
+        assert recording.header["url"] == "http://upstream.test/mcp"
+        assert [message for _, message in recording.stdin] == STDIN
+        assert [message for _, message in recording.stdout] == frames
+
+        initialize, initialized, call = recording.exchanges
+        assert initialize.headers["mcp-session-id"] == "session-1"
+        assert initialized.msg_id is None and initialized.status == 202
+        # The body is recorded as sent upstream, after parameter repair
+        assert call.body["params"]["arguments"] == {"filter": {"a": 1}}
+        assert len(call.events) == 2
+        assert call.sent <= call.responded <= call.events[0][0] <= call.ended
+
+    def test_records_upstream_error(self, tmp_path, capsys):
+        """Test a failed exchange keeps its status and error"""
+        path = tmp_path / "capture.jsonl"
+
+        async def scenario():
+            bridge = MockBridge(lambda request: httpx.Response(503), recorder=Recorder(str(path)))
+            await bridge.send_message({"jsonrpc": "2.0", "id": 5, "method": "tools/list"})
+            await bridge.close()
+
+        asyncio.run(scenario())
+        capsys.readouterr()
+        exchange = Recording.load(str(path)).exchanges[0]
+        assert exchange.status == 503
+        assert "503" in exchange.error
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test loading something that is not a recording"""
+        path = tmp_path / "other.jsonl"
+        path.write_text('{"hello": "world"}\n')
+        with pytest.raises(ValueError):
+            Recording.load(str(path))
+
+
+class TestRecordedUpstream:
+    """Test cases for serving a recording as the upstream"""
+
+    def test_bridge_output_is_reproduced(self, tmp_path, monkeypatch, capsys):
+        """Test a bridge against the recorded upstream writes the recorded frames"""
+        path = tmp_path / "capture.jsonl"
+        frames = record_session(path, monkeypatch, capsys)
+        upstream = RecordedUpstream(Recording.load(str(path)), speed=0)
+
+        async def scenario():
+            async with HTTPServer(upstream.handle) as server:
+                bridge = MCPHTTPBridge(f"{server.url}/mcp")
+                monkeypatch.setattr(sys, "stdin", io.StringIO("".join(json.dumps(m) + "\n" for m in STDIN)))
+                await bridge.read_stdin()
+                await bridge.drain()
+                await bridge.close()
+                return bridge.session_id
+
+        assert asyncio.run(scenario()) == "session-1"
+        replayed = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert replayed == frames
+        assert upstream.matched == 3 and upstream.unmatched == 0
+
+    def test_unknown_request_gets_error(self, tmp_path, monkeypatch, capsys):
+        """Test requests with no recorded exchange are answered with a JSON-RPC error"""
+        path = tmp_path / "capture.jsonl"
+        record_session(path, monkeypatch, capsys)
+        upstream = RecordedUpstream(Recording.load(str(path)), speed=0)
+
+        async def scenario():
+            async with HTTPServer(upstream.handle) as server:
+                async with httpx.AsyncClient() as client:
+                    return await client.post(f"{server.url}/mcp", json={"jsonrpc": "2.0", "id": 9,
+                                                                         "method": "resources/list"})
+
+        response = asyncio.run(scenario())
+        assert json.loads(response.text.split("data: ", 1)[1])["error"]["code"] == -32603
+        assert upstream.unmatched == 1
+
+    def test_recorded_latency_is_scaled(self, tmp_path, monkeypatch):
+        """Test the recorded time to first byte is replayed and divided by speed"""
+        path = tmp_path / "capture.jsonl"
+        path.write_text("\n".join(json.dumps(event) for event in [
+            {"t": 0.0, "kind": "start", "version": 1, "url": None, "started": 0},
+            {"t": 1.0, "kind": "request", "seq": 1, "method": "ping", "id": 1, "body": {}},
+            {"t": 1.2, "kind": "response", "seq": 1, "status": 200,
+             "headers": {"content-type": "text/event-stream"}},
+            {"t": 1.2, "kind": "sse", "seq": 1, "data": '{"jsonrpc": "2.0", "id": 1, "result": {}}'},
+            {"t": 1.2, "kind": "end", "seq": 1},
+        ]) + "\n")
+        recording = Recording.load(str(path))
+        delays = []
+
+        scaled = replay_module.scaled
+
+        def recorded_scaled(delay, speed):
+            delays.append(scaled(delay, speed))
+            return delays[-1]
+
+        monkeypatch.setattr(replay_module, "scaled", recorded_scaled)
+
+        async def timed(speed):
+            async with HTTPServer(RecordedUpstream(recording, speed).handle) as server:
+                async with httpx.AsyncClient() as client:
+                    start = time.monotonic()
+                    await client.post(server.url, json={"jsonrpc": "2.0", "id": 1, "method": "ping"})
+                    return time.monotonic() - start
+
+        assert asyncio.run(timed(1.0)) >= 0.2
+        assert asyncio.run(timed(4.0)) >= 0.05
+        # The time to first byte (0.2 s) was waited for, divided by speed
+        assert [round(delay, 3) for delay in delays if delay] == [0.2, 0.05]
+
+
+class TestReplayThroughBridge:
+    """Test cases for replaying a capture through a bridge process"""
+
+    def test_replay_matches_recording(self, tmp_path, monkeypatch, capsys):
+        """Test an accelerated replay answers every request with the recorded response"""
+        path = tmp_path / "capture.jsonl"
+        record_session(path, monkeypatch, capsys)
+
+        results = asyncio.run(replay_through_bridge(Recording.load(str(path)), speed=0))
+        summary = results["summary"]
+        assert summary["requests"] == 2
+        assert summary["missing"] == 0
+        assert summary["mismatched"] == 0
+        assert summary["unmatched_upstream"] == 0
+        assert all(r["replay_ms"] is not None for r in results["requests"])
+
+    def test_latency_summary(self):
+        """Test the summary uses the same nearest-rank percentiles as bench"""
+        summary = latency_summary([float(i) for i in range(100, 0, -1)])
+        assert (summary["p50"], summary["p95"], summary["max"]) == (50.0, 95.0, 100.0)
+        assert latency_summary([])["p50"] is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the reverse bridge (mcp-bridge serve).
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from mcp_bridge import reverse
+from mcp_bridge.bridge import MCPHTTPBridge
+from mcp_bridge.httpserver import HTTPServer
+from mcp_bridge.reverse import ReverseBridge
+from tests.mock_upstream import tool_call
+
+SRC = os.path.join(os.path.dirname(__file__), '..', 'src')
+ENV = {**os.environ, "PYTHONPATH": os.path.abspath(SRC)}
+MOCK = [sys.executable, "-m", "mcp_bridge.mock_server", "--stdio"]
+
+# A stdio server whose tool asks the client a question (a server request) first
+ASKER = [sys.executable, "-c", """
+import json, sys
+def send(message):
+    sys.stdout.write(json.dumps(message) + "\\n")
+    sys.stdout.flush()
+for line in sys.stdin:
+    message = json.loads(line)
+    if message.get("method") == "initialize":
+        send({"jsonrpc": "2.0", "id": message["id"], "result": {"serverInfo": {"name": "asker", "version": "1"}}})
+    elif message.get("method") == "tools/call":
+        call = message["id"]
+        send({"jsonrpc": "2.0", "method": "notifications/message", "params": {"level": "info", "data": "asking"}})
+        send({"jsonrpc": "2.0", "id": "q", "method": "sampling/createMessage", "params": {}})
+    elif "method" not in message and message.get("id") == "q":
+        send({"jsonrpc": "2.0", "id": call, "result": {"reply": message}})
+"""]
+
+
+def data_events(response: httpx.Response) -> list:
+    return [json.loads(line[6:]) for line in response.text.splitlines() if line.startswith("data: ")]
+
+
+def serving(scenario, workers: int = 1, command=MOCK, **options):
+    """Run scenario(reverse_bridge, url, client) against a served worker pool"""
+
+    async def run():
+        async with ReverseBridge(command, workers, env=ENV, **options) as bridge:
+            async with HTTPServer(bridge.handle) as server:
+                async with httpx.AsyncClient() as client:
+                    return await scenario(bridge, f"{server.url}/mcp", client)
+
+    return asyncio.run(run())
+
+
+async def initialize(client: httpx.AsyncClient, url: str) -> str:
+    response = await client.post(url, json={"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}})
+    assert data_events(response)[0]["result"]["serverInfo"]["name"] == "mcp-bridge-mock"
+    return response.headers["mcp-session-id"]
+
+
+async def initialize_asker(client: httpx.AsyncClient, url: str) -> str:
+    response = await client.post(url, json={"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}})
+    return response.headers["mcp-session-id"]
+
+
+class TestReverseBridge:
+    """Test cases for serving stdio servers over HTTP"""
+
+    def test_sessions_share_workers(self):
+        """Test sessions are spread over workers and answered from the cached initialize"""
+
+        async def scenario(bridge, url, client):
+            sessions = [await initialize(client, url) for _ in range(4)]
+            assert sorted(len(worker.sessions) for worker in bridge.workers) == [2, 2]
+            # Requests with the same ids from every session, all in flight at once
+            responses = await asyncio.gather(*(
+                client.post(url, json=tool_call(msg_id, "echo", session=index), headers={"mcp-session-id": session})
+                for index, session in enumerate(sessions) for msg_id in (1, 2, 3)))
+            return [data_events(response)[-1] for response in responses]
+
+        results = serving(scenario, workers=2)
+        for position, result in enumerate(results):
+            assert result["id"] == position % 3 + 1
+            assert json.loads(result["result"]["content"][0]["text"]) == {"session": position // 3}
+
+    def test_progress_token_restored(self):
+        """Test progress notifications arrive on the request's stream with the client's token"""
+
+        async def scenario(bridge, url, client):
+            session = await initialize(client, url)
+            message = {"jsonrpc": "2.0", "id": "x", "method": "tools/call",
+                       "params": {"name": "payload", "arguments": {"events": 3}, "_meta": {"progressToken": "t"}}}
+            response = await client.post(url, json=message, headers={"mcp-session-id": session})
+            return data_events(response)
+
+        events = serving(scenario)
+        assert [event["params"]["progressToken"] for event in events[:-1]] == ["t", "t"]
+        assert events[-1]["id"] == "x"
+
+    def test_session_errors(self):
+        """Test missing, unknown and deleted sessions"""
+
+        async def scenario(bridge, url, client):
+            statuses = [(await client.post(url, json=tool_call(1, "echo"))).status_code]
+            statuses.append((await client.post(url, json=tool_call(1, "echo"), headers={"mcp-session-id": "nope"})).status_code)
+            session = await initialize(client, url)
+            notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+            statuses.append((await client.post(url, json=notification, headers={"mcp-session-id": session})).status_code)
+            statuses.append((await client.delete(url, headers={"mcp-session-id": session})).status_code)
+            statuses.append((await client.post(url, json=tool_call(1, "echo"), headers={"mcp-session-id": session})).status_code)
+            statuses.append((await client.get(url)).status_code)
+            return statuses
+
+        assert serving(scenario) == [400, 404, 202, 200, 404, 405]
+
+    def test_worker_exit(self, monkeypatch):
+        """Test a worker that exits fails its requests, ends its sessions and is replaced"""
+        monkeypatch.setattr(reverse, "RESPAWN_DELAY", 0.01)
+
+        async def scenario(bridge, url, client):
+            session = await initialize(client, url)
+            slow = {"jsonrpc": "2.0", "id": 5, "method": "tools/call",
+                    "params": {"name": "payload", "arguments": {"latency": 10}}}
+            request = asyncio.ensure_future(client.post(url, json=slow, headers={"mcp-session-id": session}))
+            await asyncio.sleep(0.2)
+            old = bridge.workers[0]
+            old.process.kill()
+            error = data_events(await request)[-1]
+            status = (await client.post(url, json=tool_call(1, "echo"), headers={"mcp-session-id": session})).status_code
+            while bridge.workers[0] is old or not bridge.workers[0].alive:
+                await asyncio.sleep(0.05)
+            await initialize(client, url)
+            return error, status
+
+        error, status = serving(scenario)
+        assert error["id"] == 5 and error["error"]["code"] == -32603
+        assert status == 404
+
+    def test_through_bridge(self, capsys):
+        """Test the forward bridge talking to a served stdio server"""
+
+        async def scenario(bridge, url, client):
+            forward = MCPHTTPBridge(url)
+            try:
+                await forward.dispatch({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}})
+                await forward.dispatch({"jsonrpc": "2.0", "method": "notifications/initialized"})
+                await asyncio.gather(*(forward.dispatch(tool_call(i, "echo", n=i)) for i in range(2, 12)))
+            finally:
+                await forward.close()
+
+        serving(scenario)
+        frames = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert sorted(frame["id"] for frame in frames) == list(range(1, 12))
+        assert all("error" not in frame for frame in frames)
+
+    def test_server_requests_stay_in_session(self):
+        """Test server requests reach only their own session and replies only come from it"""
+
+        async def scenario(bridge, url, client):
+            first = await initialize_asker(client, url)
+            events = []
+            async with client.stream("POST", url, json=tool_call(7, "ask"), headers={"mcp-session-id": first}) as response:
+                lines = response.aiter_lines()
+                async for line in lines:
+                    if line.startswith("data: "):
+                        events.append(json.loads(line[6:]))
+                        if events[-1].get("method") == "sampling/createMessage":
+                            break
+                # A second session on the same worker cannot answer for the first
+                second = await initialize_asker(client, url)
+                reply = {"jsonrpc": "2.0", "id": "q", "result": {"text": "yes"}}
+                statuses = [(await client.post(url, json=reply, headers={"mcp-session-id": second})).status_code]
+                statuses.append((await client.post(url, json=reply, headers={"mcp-session-id": first})).status_code)
+                statuses.append((await client.post(url, json=reply, headers={"mcp-session-id": first})).status_code)
+                async for line in lines:
+                    if line.startswith("data: "):
+                        events.append(json.loads(line[6:]))
+            # With two sessions on the worker, unowned messages are dropped
+            # and the server request is refused
+            later = data_events(await client.post(url, json=tool_call(8, "ask"), headers={"mcp-session-id": second}))
+            return events, statuses, later
+
+        events, statuses, later = serving(scenario, command=ASKER)
+        assert [event.get("method") for event in events] == ["notifications/message", "sampling/createMessage", None]
+        assert statuses == [400, 202, 400]
+        assert events[-1]["id"] == 7 and events[-1]["result"]["reply"]["result"] == {"text": "yes"}
+        assert len(later) == 1 and later[0]["id"] == 8
+        assert later[0]["result"]["reply"]["error"]["code"] == -32603
+
+    def test_request_timeout(self):
+        """Test a request its worker never answers fails after the timeout and is cancelled"""
+
+        async def scenario(bridge, url, client):
+            session = await initialize_asker(client, url)
+            # The server waits for a reply to its question that never comes
+            events = data_events(await client.post(url, json=tool_call(4, "ask"), headers={"mcp-session-id": session}))
+            return events, dict(bridge.workers[0].pending)
+
+        events, pending = serving(scenario, command=ASKER, timeout=0.3)
+        assert events[-1]["id"] == 4
+        assert events[-1]["error"]["message"] == "No response within 0.3s from the MCP server"
+        assert pending == {}
+
+    def test_bad_command(self):
+        """Test a server that cannot start or initialize fails start-up"""
+
+        async def start(command):
+            async with ReverseBridge(command, env=ENV):
+                pass
+
+        with pytest.raises(OSError):
+            asyncio.run(start(["/nonexistent/mcp-server"]))
+        with pytest.raises(RuntimeError):
+            asyncio.run(start([sys.executable, "-c", "pass"]))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Unit tests for priority lane scheduling.
+
+Checks message classification, lane limits and that control traffic is
+not held up by tool calls occupying the tools lane.
+"""
+
+import asyncio
+import io
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import httpx
+
+from mcp_bridge.scheduler import (
+    CONTROL, DISCOVERY, TOOLS, LaneScheduler, classify_message
+)
+from tests.mock_upstream import MockBridge, sse_response
+
+
+class TestClassifyMessage:
+    """Test cases for lane classification"""
+
+    def test_control_methods(self):
+        """Test initialize, ping and notifications go to the control lane"""
+        assert classify_message({"method": "initialize"}) == CONTROL
+        assert classify_message({"method": "ping"}) == CONTROL
+        assert classify_message({"method": "notifications/cancelled"}) == CONTROL
+        assert classify_message({"method": "notifications/initialized"}) == CONTROL
+
+    def test_responses_are_control(self):
+        """Test client responses to server requests go to the control lane"""
+        assert classify_message({"jsonrpc": "2.0", "id": 3, "result": {}}) == CONTROL
+
+    def test_discovery_methods(self):
+        """Test list methods go to the discovery lane"""
+        assert classify_message({"method": "tools/list"}) == DISCOVERY
+        assert classify_message({"method": "resources/templates/list"}) == DISCOVERY
+
+    def test_tool_calls(self):
+        """Test tool calls and other work go to the tools lane"""
+        assert classify_message({"method": "tools/call"}) == TOOLS
+        assert classify_message({"method": "resources/read"}) == TOOLS
+
+
+class TestLaneScheduler:
+    """Test cases for lane configuration"""
+
+    def test_limit_overrides(self):
+        """Test per-lane limits override the defaults"""
+        sizes = []
+
+        def factory(pool_size):
+            sizes.append(pool_size)
+            return httpx.AsyncClient()
+
+        scheduler = LaneScheduler(factory, {"tools": 16})
+        assert scheduler.lanes[TOOLS].limit == 16
+        # Clients are only built when a lane is first used
+        assert sizes == []
+        assert scheduler.lanes[TOOLS].client is scheduler.lanes[TOOLS].client
+        assert sizes == [16]
+        asyncio.run(scheduler.aclose())
+
+    def test_unknown_lane_rejected(self):
+        """Test that unknown lane names are rejected"""
+        with pytest.raises(ValueError):
+            LaneScheduler(lambda size: httpx.AsyncClient(), {"bulk": 2})
+
+    def test_invalid_limit_rejected(self):
+        """Test that non-positive limits are rejected"""
+        with pytest.raises(ValueError):
+            LaneScheduler(lambda size: httpx.AsyncClient(), {"tools": 0})
+
+
+class TestLaneIsolation:
+    """Test cases for control traffic bypassing busy lanes"""
+
+    def test_ping_not_blocked_by_tool_calls(self, capsys):
+        """Test that ping completes while the tools lane is saturated"""
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def handler(request):
+                message = json.loads(request.content)
+                if message["method"] == "tools/call":
+                    await release.wait()
+                return sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+            bridge = MockBridge(handler, lanes={"tools": 1})
+            calls = [
+                bridge._spawn(bridge.dispatch(
+                    {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                     "params": {"name": "slow", "arguments": {}}}))
+                for i in range(3)
+            ]
+            await asyncio.wait_for(
+                bridge.dispatch({"jsonrpc": "2.0", "id": 99, "method": "ping"}), timeout=1.0)
+            assert not any(call.done() for call in calls)
+
+            release.set()
+            await bridge.drain()
+            await bridge.close()
+
+        asyncio.run(scenario())
+
+        ids = [json.loads(line)["id"] for line in capsys.readouterr().out.splitlines()]
+        assert ids[0] == 99
+        assert sorted(ids[1:]) == [0, 1, 2]
+
+    def test_lane_limit_bounds_concurrency(self, capsys):
+        """Test that a lane never runs more requests than its budget"""
+
+        async def scenario():
+            active = 0
+            peak = 0
+
+            async def handler(request):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                message = json.loads(request.content)
+                return sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+            bridge = MockBridge(handler, lanes={"tools": 2})
+            for i in range(6):
+                bridge._spawn(bridge.dispatch(
+                    {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                     "params": {"name": "t", "arguments": {}}}))
+            await bridge.drain()
+            await bridge.close()
+            return peak
+
+        assert asyncio.run(scenario()) == 2
+        assert len(capsys.readouterr().out.splitlines()) == 6
+
+
+class TestStdinOrder:
+    """Test cases for messages whose order on stdin must be kept"""
+
+    def test_handshake_before_requests(self, monkeypatch, capsys):
+        """Test notifications/initialized reaches the server before the requests after it"""
+        lines = [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+        ]
+        monkeypatch.setattr(sys, "stdin", io.StringIO("".join(json.dumps(line) + "\n" for line in lines)))
+        seen = []
+
+        async def handler(request):
+            message = json.loads(request.content)
+            if message["method"] == "notifications/initialized":
+                # A slow control lane must not let tools/list overtake it
+                await asyncio.sleep(0.05)
+            seen.append(message["method"])
+            if "id" not in message:
+                return httpx.Response(202)
+            return sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+        async def scenario():
+            bridge = MockBridge(handler)
+            await bridge.read_stdin()
+            await bridge.drain()
+            await bridge.close()
+
+        asyncio.run(scenario())
+        assert seen == ["initialize", "notifications/initialized", "tools/list"]
+
+    def test_cancel_queued_request(self, monkeypatch, capsys):
+        """Test a request cancelled while queued for its lane is never sent"""
+        lines = [
+            {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "slow", "arguments": {}}},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": "slow", "arguments": {}}},
+            {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 2}},
+        ]
+        monkeypatch.setattr(sys, "stdin", io.StringIO("".join(json.dumps(line) + "\n" for line in lines)))
+        seen = []
+
+        async def handler(request):
+            message = json.loads(request.content)
+            seen.append(message)
+            # Holds the only tools slot until stdin has been read
+            while not bridge.queued.get("2"):
+                await asyncio.sleep(0.01)
+            return sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+        async def scenario():
+            await bridge.read_stdin()
+            await bridge.drain()
+            await bridge.close()
+
+        bridge = MockBridge(handler, lanes={"tools": 1})
+        asyncio.run(scenario())
+        assert [message.get("id") for message in seen] == [1]
+        assert [json.loads(line)["id"] for line in capsys.readouterr().out.splitlines()] == [1]
+        assert bridge.queued == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
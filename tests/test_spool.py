@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-message memory limits and spooling oversized messages.
+"""
+
+import asyncio
+import io
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge import spool as spool_module
+from mcp_bridge.recording import Recorder, Recording
+from mcp_bridge.spool import (EnvelopeScanner, MessageLimits, MessageTooLargeError, SpooledLine,
+                              iter_lines, read_line)
+from tests.mock_upstream import MockBridge, big_result, relay, sse_response
+
+LIMITS = {"spill_threshold": 1000, "max_message_bytes": 100000}
+
+
+def track_spools(monkeypatch) -> list:
+    """Record every spool file opened from now on"""
+    opened = []
+    make_spool = spool_module._spool
+
+    def tracked():
+        opened.append(make_spool())
+        return opened[-1]
+
+    monkeypatch.setattr(spool_module, "_spool", tracked)
+    return opened
+
+
+def scan(data: bytes, chunk_size: int) -> dict:
+    scanner = EnvelopeScanner()
+    for i in range(0, len(data), chunk_size):
+        scanner.feed(data[i:i + chunk_size])
+    return scanner.envelope()
+
+
+async def collect_lines(chunks, limits):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    lines = []
+    async for line in iter_lines(stream(), limits):
+        lines.append(line.read_at(0, line.size) if isinstance(line, SpooledLine) else line)
+    return lines
+
+
+class TestEnvelopeScanner:
+    """Test cases for finding the envelope without decoding the message"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    def test_any_member_order(self, chunk_size):
+        """Test the envelope is found before or after a large params value, across chunk boundaries"""
+        params = {"arguments": {"text": 'quote " backslash \\ brace } ' * 20, "id": "inner"}, "name": "upload"}
+        message = {"method": "tools/call", "params": params, "jsonrpc": "2.0", "id": 12}
+        assert scan(json.dumps(message).encode(), chunk_size) == {
+            "jsonrpc": "2.0", "id": 12, "method": "tools/call", "params": {"name": "upload"}}
+
+    def test_nested_keys_ignored(self):
+        """Test keys inside results and arrays are not taken for the envelope"""
+        message = {"result": {"id": 99, "method": "nope", "items": [{"id": 1}]}, "jsonrpc": "2.0", "id": "abc"}
+        assert scan(json.dumps(message).encode(), 5) == {"jsonrpc": "2.0", "id": "abc"}
+
+    @pytest.mark.parametrize("chunk_size", [1, 4096])
+    def test_well_formed(self, chunk_size):
+        """Test valid objects pass the check and malformed messages are caught"""
+        valid = [json.dumps({"id": -1.5e3, "ok": [True, False, None, {}], "s": "}\\\""}), '  {"a": 1}  ']
+        invalid = ['{"id": 1', '{"id": 1}}', '{"id": 1} {}', '[1, 2]', 'not json', '{"a": nope}',
+                   '{"a": [1}', '{"a": 1 2}', '{"a": "open}', '{"a": \\1}', '{"a": 1} x']
+        for text in valid + invalid:
+            scanner = EnvelopeScanner()
+            data = text.encode()
+            for i in range(0, len(data), chunk_size):
+                scanner.feed(data[i:i + chunk_size])
+            assert (scanner.error is None) == (text in valid), text
+
+
+class TestMessageLimits:
+    """Test cases for the message_limits config option"""
+
+    def test_defaults_and_options(self):
+        """Test defaults and config keys"""
+        assert MessageLimits.from_config(None).spill_threshold == 8 * 1024 * 1024
+        limits = MessageLimits.from_config({"spill_threshold": 10, "max_message_bytes": None})
+        assert (limits.spill_threshold, limits.max_message_bytes) == (10, None)
+
+    def test_invalid_options(self):
+        """Test bad config is rejected with ValueError"""
+        for config in ({"spill_threshold": 0}, {"spill_threshold": 100, "max_message_bytes": 10},
+                       {"cap": 1}, True):
+            with pytest.raises(ValueError):
+                MessageLimits.from_config(config)
+
+
+class TestReadLine:
+    """Test cases for reading stdin within the limits"""
+
+    def test_spills_and_recovers(self):
+        """Test a long line is spooled with its envelope and the next line is read normally"""
+        message = json.dumps({"jsonrpc": "2.0", "id": 3, "method": "tools/call",
+                              "params": {"name": "upload", "arguments": {"data": "z" * 5000}}}).encode()
+        stream = io.BytesIO(message + b"\r\n" + b'{"small": 1}\n')
+        limits = MessageLimits(**LIMITS)
+
+        line = read_line(stream, limits)
+        assert isinstance(line, SpooledLine)
+        assert line.envelope == {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": "upload"}}
+        assert line.read_at(0, line.size) == message
+        line.close()
+        assert read_line(stream, limits) == b'{"small": 1}\n'
+
+    def test_hard_limit(self):
+        """Test a line over max_message_bytes is consumed and reported with its envelope"""
+        message = json.dumps({"method": "tools/call", "params": {"data": "z" * 200000}, "id": 5}).encode()
+        stream = io.BytesIO(message + b"\n" + b"next\n")
+        with pytest.raises(MessageTooLargeError) as exc_info:
+            read_line(stream, MessageLimits(**LIMITS))
+        assert exc_info.value.envelope == {"id": 5, "method": "tools/call"}
+        assert "exceeds the 100000 byte limit" in str(exc_info.value)
+        assert stream.readline() == b"next\n"
+
+    def test_malformed_line(self):
+        """Test a spooled line that is not a JSON object is consumed and rejected"""
+        stream = io.BytesIO(b'{"id": 4, "method": "tools/call", "data": "' + b"z" * 5000 + b"\n" + b"next\n")
+        with pytest.raises(ValueError) as exc_info:
+            read_line(stream, MessageLimits(**LIMITS))
+        assert not isinstance(exc_info.value, MessageTooLargeError)
+        assert "Invalid JSON" in str(exc_info.value)
+        assert stream.readline() == b"next\n"
+
+    def test_over_limit_spool_closed(self, monkeypatch):
+        """Test a line that goes over the limit after spilling leaves no spool open"""
+        opened = track_spools(monkeypatch)
+        stream = io.BytesIO(b"z" * 200000 + b"\n")
+        with pytest.raises(MessageTooLargeError):
+            read_line(stream, MessageLimits(**LIMITS))
+        assert len(opened) == 1 and opened[0].closed
+
+
+class TestIterLines:
+    """Test cases for splitting SSE bodies within the limits"""
+
+    def test_lines_across_chunks(self):
+        """Test lines split across chunks and CRLF endings, spilling only the long one"""
+        long_line = b"data: " + b"y" * 3000
+        body = b"event: message\r\n" + long_line + b"\r\n\r\ndata: end"
+        chunks = [body[i:i + 700] for i in range(0, len(body), 700)]
+        lines = asyncio.run(collect_lines(chunks, MessageLimits(**LIMITS)))
+        assert lines == [b"event: message", long_line, b"", b"data: end"]
+
+    def test_hard_limit(self, monkeypatch):
+        """Test a line over max_message_bytes stops the stream and leaves no spool open"""
+        opened = track_spools(monkeypatch)
+        with pytest.raises(MessageTooLargeError):
+            asyncio.run(collect_lines([b"data: " + b"y" * 60000] * 3, MessageLimits(**LIMITS)))
+        # It went over the limit after spilling
+        assert len(opened) == 1 and opened[0].closed
+
+
+def relay_recorded(size: int, tmp_path, capsys):
+    """Relay one tools/call result through a bridge with small limits, recording traffic"""
+    path = str(tmp_path / "capture.jsonl")
+    bridge, frames = relay(size, capsys, message_limits=LIMITS, offload=False, recorder=Recorder(path))
+    return bridge.metrics.spilled.get("sse"), frames, Recording.load(path)
+
+
+class TestBridgeLimits:
+    """Test cases for the bridge's handling of oversized messages"""
+
+    def test_large_event_spooled(self, tmp_path, capsys):
+        """Test an SSE event over the spill threshold is relayed verbatim and recorded"""
+        spilled, frames, recording = relay_recorded(5000, tmp_path, capsys)
+        assert spilled == 1
+        assert frames == [big_result(1, 5000)]
+        assert json.loads(recording.exchanges[0].events[0][1]) == big_result(1, 5000)
+        assert recording.stdout[0][1] == big_result(1, 5000)
+
+    def test_event_over_limit(self, tmp_path, capsys):
+        """Test an SSE event over max_message_bytes becomes a JSON-RPC error"""
+        _, frames, _ = relay_recorded(200000, tmp_path, capsys)
+        assert frames[0]["id"] == 1
+        assert frames[0]["error"]["code"] == -32603
+        assert "max_message_bytes" in frames[0]["error"]["message"]
+
+    def test_large_stdin_message_streamed(self, monkeypatch, capsys):
+        """Test a stdin message over the spill threshold is streamed upstream unchanged"""
+        sent = []
+
+        def handler(request):
+            sent.append((request.headers.get("content-length"), request.content))
+            return sse_response({"jsonrpc": "2.0", "id": 8, "result": {}})
+
+        # Client SDKs may put the id after params
+        line = json.dumps({"method": "tools/call", "params": {"name": "upload", "arguments": {"data": "z" * 5000}},
+                           "jsonrpc": "2.0", "id": 8})
+        stdin = io.TextIOWrapper(io.BytesIO((line + "\n").encode()))
+        monkeypatch.setattr(sys, "stdin", stdin)
+
+        async def scenario():
+            bridge = MockBridge(handler, message_limits=LIMITS)
+            await bridge.read_stdin()
+            await bridge.drain()
+            result = (bridge.metrics.spilled.get("stdin"), bridge.metrics.requests.get("tools/call", "upload"))
+            await bridge.close()
+            return result
+
+        assert asyncio.run(scenario()) == (1, 1)
+        assert sent == [(str(len(line)), line.encode())]
+        assert json.loads(capsys.readouterr().out) == {"jsonrpc": "2.0", "id": 8, "result": {}}
+
+    def test_stdin_message_over_limit(self, monkeypatch, capsys):
+        """Test a stdin request over max_message_bytes is answered with an error and skipped"""
+        line = json.dumps({"jsonrpc": "2.0", "id": 9, "method": "tools/call",
+                           "params": {"name": "upload", "arguments": {"data": "z" * 200000}}})
+        ping = json.dumps({"jsonrpc": "2.0", "id": 10, "method": "ping"})
+        monkeypatch.setattr(sys, "stdin", io.StringIO(line + "\n" + ping + "\n"))
+
+        async def scenario():
+            bridge = MockBridge(lambda request: sse_response({"jsonrpc": "2.0", "id": 10, "result": {}}),
+                                message_limits=LIMITS)
+            await bridge.read_stdin()
+            await bridge.drain()
+            await bridge.close()
+
+        asyncio.run(scenario())
+        frames = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert frames[0]["id"] == 9 and frames[0]["error"]["code"] == -32600
+        assert frames[1] == {"jsonrpc": "2.0", "id": 10, "result": {}}
+
+    def test_malformed_stdin_message_dropped(self, monkeypatch, capsys):
+        """Test a spooled stdin line that is not JSON is dropped like a small malformed line"""
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content))
+            return sse_response({"jsonrpc": "2.0", "id": 10, "result": {}})
+
+        truncated = '{"jsonrpc": "2.0", "id": 9, "method": "tools/call", "params": {"data": "' + "z" * 5000
+        ping = json.dumps({"jsonrpc": "2.0", "id": 10, "method": "ping"})
+        monkeypatch.setattr(sys, "stdin", io.StringIO(truncated + "\n" + ping + "\n"))
+
+        async def scenario():
+            bridge = MockBridge(handler, message_limits=LIMITS)
+            await bridge.read_stdin()
+            await bridge.drain()
+            await bridge.close()
+            return bridge.metrics.spilled.get("stdin")
+
+        assert asyncio.run(scenario()) == 0
+        assert [message["id"] for message in sent] == [10]
+        assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == [
+            {"jsonrpc": "2.0", "id": 10, "result": {}}]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
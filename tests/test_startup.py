@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Startup regression tests: what the bridge's run path imports and how long it takes.
+"""
+
+import json
+import subprocess
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge.shim import main, parse_run_args
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# What a plain `mcp-bridge --config NAME` run imports before reading stdin
+RUN_PATH = ("import mcp_bridge.shim, mcp_bridge.runner, mcp_bridge.bridge; "
+            "mcp_bridge.bridge.MCPHTTPBridge('http://localhost/mcp')")
+
+# Budget, in milliseconds, from starting `python -m mcp_bridge` to its first
+# stdin read. Wall-clock timing depends on the machine and its load, so the
+# check only runs when a budget is set: MCP_BRIDGE_STARTUP_BUDGET_MS=300
+STARTUP_BUDGET_MS = os.environ.get("MCP_BRIDGE_STARTUP_BUDGET_MS")
+
+
+def python_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC, env.get("PYTHONPATH")]))
+    return env
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=python_env(), check=True)
+
+
+def imported_after(code: str) -> set:
+    """Modules loaded by running `code` in a fresh interpreter"""
+    result = run_python("-c", code + "; import sys, json; print(json.dumps(sorted(sys.modules)))")
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def time_to_stdin_ms(config_path: str) -> float:
+    """Milliseconds from starting a bridge process to it waiting on stdin"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "mcp_bridge", "--config", config_path, "--log-level", "info"],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=python_env())
+    try:
+        for line in process.stderr:
+            # Logged just before the bridge starts reading stdin
+            if b"Bridge ready" in line:
+                return (time.perf_counter() - start) * 1000
+        raise AssertionError("the bridge exited before reading stdin")
+    finally:
+        process.stdin.close()
+        process.wait(timeout=10)
+        process.stderr.close()
+
+
+class TestLazyImports:
+    """Test cases for keeping heavy modules off the run path"""
+
+    def test_run_path_skips_heavy_modules(self):
+        """Test a bridge can be built without importing httpx, click or optional subsystems"""
+        modules = imported_after(RUN_PATH)
+        for heavy in ("httpx", "click", "mcp_bridge.cli", "mcp_bridge.tracing", "mcp_bridge.limiter",
+                      "mcp_bridge.diagnostics", "concurrent.futures.process", "multiprocessing"):
+            assert heavy not in modules
+
+    def test_package_import_is_lazy(self):
+        """Test `import mcp_bridge` does not load the bridge until it is used"""
+        assert "mcp_bridge.bridge" not in imported_after("import mcp_bridge")
+        modules = imported_after("import mcp_bridge; mcp_bridge.MCPHTTPBridge")
+        assert "mcp_bridge.bridge" in modules
+
+    @pytest.mark.skipif(STARTUP_BUDGET_MS is None, reason="set MCP_BRIDGE_STARTUP_BUDGET_MS to check start-up time")
+    def test_startup_budget(self, tmp_path):
+        """Test a bridge process reads stdin within budget (best of three runs)"""
+        config = tmp_path / "config.json"
+        config.write_text(json.dumps({"url": "http://127.0.0.1:9/mcp"}))
+        best = min(time_to_stdin_ms(str(config)) for _ in range(3))
+        budget = float(STARTUP_BUDGET_MS)
+        assert best < budget, f"first stdin read after {best:.1f}ms (budget {budget}ms)"
+
+
+class TestShim:
+    """Test cases for the fast-path argument parser"""
+
+    def test_plain_run(self):
+        """Test run options are parsed without click"""
+        assert parse_run_args([]) == {}
+        assert parse_run_args(["--config", "weather.json", "--log-level=debug", "-c", "other"]) == {
+            "config_name": "other", "log_level": "debug"}
+        assert parse_run_args(["--trace", "t.json", "--trace-format", "otlp", "--record", "r.jsonl"]) == {
+            "trace_path": "t.json", "trace_format": "otlp", "record_path": "r.jsonl"}
+
+    def test_everything_else_goes_to_click(self):
+        """Test subcommands, flags and invalid values fall back to the full CLI"""
+        for argv in (["init"], ["--version"], ["--help"], ["--log-level", "loud"],
+                     ["--config"], ["--config", "--trace"], ["-c=x"], ["bench", "weather"]):
+            assert parse_run_args(argv) is None
+
+    def test_fallback_runs_cli(self, capsys):
+        """Test the shim hands non-run invocations to click"""
+        with pytest.raises(SystemExit) as exc_info:
+            main(["--version"])
+        assert exc_info.value.code == 0
+        assert "mcp-bridge version" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared latency statistics.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge.stats import percentile
+
+
+class TestPercentile:
+    """Test cases for the nearest-rank percentile"""
+
+    def test_nearest_rank(self):
+        """Test percentiles of 1..100 land on the matching rank"""
+        values = list(range(1, 101))
+        assert [percentile(values, q) for q in (0.5, 0.9, 0.95, 0.99, 1.0)] == [50, 90, 95, 99, 100]
+        assert percentile(values, 0) == 1
+
+    def test_small_samples(self):
+        """Test short lists and the empty list"""
+        assert percentile([7], 0.99) == 7
+        assert percentile([1, 2, 3], 0.5) == 2
+        assert percentile([], 0.5) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-message timeline tracing.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge.tracing import Tracer
+from tests.mock_upstream import MockBridge, sse_response
+
+
+def traced_call(tracer, capsys):
+    """Send one tools/call with stringified arguments through a traced bridge"""
+
+    async def scenario():
+        async def handler(request):
+            message = json.loads(request.content)
+            return sse_response({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+        bridge = MockBridge(handler, tracer=tracer)
+        await bridge.dispatch({"jsonrpc": "2.0", "id": 7, "method": "tools/call",
+                               "params": {"name": "search", "arguments": {"filter": '{"a": 1}'}}})
+        await bridge.close()
+
+    asyncio.run(scenario())
+    capsys.readouterr()
+
+
+class TestChromeTrace:
+    """Test cases for Chrome trace-event output"""
+
+    def test_spans_for_message(self, tmp_path, capsys):
+        """Test that one message produces its pipeline spans"""
+        path = tmp_path / "trace.json"
+        traced_call(Tracer(str(path), "chrome"), capsys)
+
+        events = json.loads(path.read_text())
+        names = [event["name"] for event in events if event["ph"] == "X"]
+        assert "tools/call (id=7)" in names
+        for span in ("lane.wait", "param_repair", "upstream.ttfb", "sse.event",
+                     "stdout.write", "upstream.stream"):
+            assert span in names
+
+        tids = {event["tid"] for event in events}
+        assert len(tids) == 1
+
+    def test_empty_trace_is_valid(self, tmp_path):
+        """Test a trace with no messages is still valid JSON"""
+        path = tmp_path / "trace.json"
+        Tracer(str(path)).close()
+        assert json.loads(path.read_text()) == []
+
+
+class TestOtlpTrace:
+    """Test cases for OTLP/JSON lines output"""
+
+    def test_span_tree(self, tmp_path, capsys):
+        """Test spans share a trace ID and hang off the root span"""
+        path = tmp_path / "trace.jsonl"
+        traced_call(Tracer(str(path), "otlp"), capsys)
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root = spans[0]
+        assert root["name"] == "tools/call (id=7)"
+        assert "parentSpanId" not in root
+        for span in spans[1:]:
+            assert span["traceId"] == root["traceId"]
+            assert span["parentSpanId"] == root["spanId"]
+            assert int(span["startTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+
+    def test_unknown_format_rejected(self, tmp_path):
+        """Test that unknown formats are rejected"""
+        with pytest.raises(ValueError):
+            Tracer(str(tmp_path / "trace"), "zipkin")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the upstream transports, including WebSocket.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+from importlib.util import find_spec
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge.bridge import MCPHTTPBridge
+from mcp_bridge.mock_server import MockMCPServer
+from mcp_bridge import transports
+from mcp_bridge.transports import HTTPTransport, WebSocketTransport, transport_for_url
+from tests.mock_upstream import tool_call
+
+requires_websockets = pytest.mark.skipif(find_spec("websockets") is None, reason="websockets not installed")
+
+
+async def websocket_session(handler, messages, concurrent: bool = False):
+    """Dispatch messages through a bridge to a WebSocket server running `handler`"""
+    from websockets.asyncio.server import serve
+
+    async with serve(handler, "127.0.0.1", 0, subprotocols=["mcp"]) as server:
+        port = server.sockets[0].getsockname()[1]
+        bridge = MCPHTTPBridge(f"ws://127.0.0.1:{port}/mcp", headers={"Authorization": "Bearer t"})
+        try:
+            if concurrent:
+                await asyncio.gather(*(bridge.dispatch(message) for message in messages))
+            else:
+                for message in messages:
+                    await bridge.dispatch(message)
+        finally:
+            await bridge.close()
+        return bridge
+
+
+class TestTransportSelection:
+    """Test cases for choosing a transport from the URL"""
+
+    def test_by_scheme(self):
+        """Test URL schemes map to transports"""
+        assert transport_for_url("https://example.com/mcp") is HTTPTransport
+        assert transport_for_url("unix:///run/mcp.sock") is HTTPTransport
+        assert transport_for_url("wss://example.com/mcp") is WebSocketTransport
+        assert isinstance(MCPHTTPBridge("http://localhost/mcp").transport, HTTPTransport)
+
+    def test_unknown_scheme(self):
+        """Test unsupported schemes are rejected with ValueError"""
+        with pytest.raises(ValueError):
+            transport_for_url("grpc://example.com")
+
+    def test_missing_package(self, monkeypatch, capsys):
+        """Test a clear error when websockets is not installed"""
+        monkeypatch.setitem(sys.modules, "websockets.asyncio.client", None)
+
+        async def scenario():
+            bridge = MCPHTTPBridge("ws://127.0.0.1:9/mcp")
+            await bridge.dispatch({"jsonrpc": "2.0", "id": 1, "method": "ping"})
+            await bridge.close()
+
+        asyncio.run(scenario())
+        error = json.loads(capsys.readouterr().out)["error"]
+        assert "pip install 'mcp-bridge[websocket]'" in error["message"]
+
+
+@requires_websockets
+class TestWebSocketTransport:
+    """Test cases for the WebSocket transport against local stand-ins"""
+
+    def test_session(self, capsys):
+        """Test a session over one connection, with progress events and concurrent calls"""
+        mock = MockMCPServer(latency=0.01)
+        bridge = asyncio.run(websocket_session(mock.handle_websocket, [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        ]))
+        assert json.loads(capsys.readouterr().out)["result"]["serverInfo"]["name"] == "mcp-bridge-mock"
+        assert bridge.metrics.requests.get("initialize", "") == 1
+
+        bridge = asyncio.run(websocket_session(
+            mock.handle_websocket, [tool_call(i, size=100, events=3) for i in range(2, 10)], concurrent=True))
+        frames = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        results = [frame for frame in frames if "result" in frame]
+        assert sorted(frame["id"] for frame in results) == list(range(2, 10))
+        assert len(frames) - len(results) == 16  # two progress notifications per call
+        metrics = bridge.metrics
+        assert metrics.errors.total() == 0
+        # The same per-request accounting, and labels, as the HTTP transport
+        assert metrics.requests.get("tools/call", "payload") == 8
+        assert metrics.ttfb.count("tools/call", "payload") == metrics.latency.count("tools/call", "payload") == 8
+        assert metrics.in_flight.get("tools/call") == 0
+
+    def test_server_initiated_messages(self, capsys):
+        """Test messages the server sends on its own are relayed, and handshake headers are sent"""
+        seen = {}
+
+        async def handler(connection):
+            seen["authorization"] = connection.request.headers.get("Authorization")
+            await connection.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "sampling/createMessage"}))
+            async for data in connection:
+                message = json.loads(data)
+                if "method" in message:
+                    await connection.send(json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": {}}))
+
+        asyncio.run(websocket_session(handler, [{"jsonrpc": "2.0", "id": 1, "method": "ping"}]))
+        frames = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        # The server's request with the same id does not answer the client's ping
+        assert frames == [{"jsonrpc": "2.0", "id": 1, "method": "sampling/createMessage"},
+                          {"jsonrpc": "2.0", "id": 1, "result": {}}]
+        assert seen["authorization"] == "Bearer t"
+
+    def test_connection_drop(self, capsys):
+        """Test requests in flight when the connection drops get an error"""
+
+        async def handler(connection):
+            await connection.recv()
+            await connection.close()
+
+        bridge = asyncio.run(websocket_session(handler, [{"jsonrpc": "2.0", "id": 7, "method": "ping"}]))
+        frame = json.loads(capsys.readouterr().out)
+        assert frame["id"] == 7 and frame["error"]["code"] == -32603
+        assert bridge.metrics.errors.get("ping", "") == 1
+
+    def test_request_timeout(self, monkeypatch, capsys):
+        """Test a request the server never answers fails, is cancelled upstream and its late answer is dropped"""
+        monkeypatch.setattr(transports, "REQUEST_TIMEOUT", 0.2)
+        received = []
+
+        async def handler(connection):
+            async for data in connection:
+                message = json.loads(data)
+                received.append(message)
+                if message.get("method") == "notifications/cancelled":
+                    # Answer the cancelled request late, then the next one on time
+                    await connection.send(json.dumps({"jsonrpc": "2.0", "id": 1, "result": {}}))
+                elif message.get("id") == 2:
+                    await connection.send(json.dumps({"jsonrpc": "2.0", "id": 2, "result": {}}))
+
+        bridge = asyncio.run(websocket_session(handler, [{"jsonrpc": "2.0", "id": 1, "method": "ping"},
+                                                         {"jsonrpc": "2.0", "id": 2, "method": "ping"}]))
+        frames = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert frames[0]["id"] == 1 and "No response" in frames[0]["error"]["message"]
+        assert frames[1:] == [{"jsonrpc": "2.0", "id": 2, "result": {}}]
+        assert received[1] == {"jsonrpc": "2.0", "method": "notifications/cancelled",
+                               "params": {"requestId": 1, "reason": "Timed out in mcp-bridge"}}
+        assert not bridge.transport._pending
+
+    def test_reconnect_reinitializes(self, capsys):
+        """Test a new connection repeats the initialize handshake before the next request"""
+        mock = MockMCPServer()
+        connections = []
+
+        async def handler(connection):
+            received = []
+            connections.append(received)
+            async for data in connection:
+                method = json.loads(data).get("method")
+                received.append(method)
+                if len(connections) == 1 and method == "tools/call":
+                    await connection.close()
+                    return
+                await mock.answer(data, connection.send)
+
+        bridge = asyncio.run(websocket_session(handler, [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"clientInfo": {"name": "t"}}},
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            tool_call(2, "echo"),
+            tool_call(3, "echo"),
+        ]))
+        frames = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [frame["id"] for frame in frames] == [1, 2, 3]
+        assert "error" in frames[1] and "result" in frames[2]
+        assert connections[1] == ["initialize", "notifications/initialized", "tools/call"]
+        assert mock.requests["initialize"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for upstream URLs, including Unix domain sockets.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mcp_bridge.bridge import MCPHTTPBridge
+from mcp_bridge.httpserver import HTTPServer
+from mcp_bridge.loadgen import run_bench
+from mcp_bridge.mock_server import MockMCPServer
+from mcp_bridge.upstream import parse_upstream_url
+
+
+class TestParseUpstreamURL:
+    """Test cases for splitting unix:// URLs"""
+
+    def test_http_urls_unchanged(self):
+        """Test TCP URLs pass through"""
+        assert parse_upstream_url("https://example.com/mcp") == ("https://example.com/mcp", None)
+
+    def test_socket_and_path(self):
+        """Test the socket path ends at the *.sock component"""
+        assert parse_upstream_url("unix:///run/mcp/weather.sock/mcp") == (
+            "http://localhost/mcp", "/run/mcp/weather.sock")
+        assert parse_upstream_url("unix:///run/weather.sock") == ("http://localhost/", "/run/weather.sock")
+        assert parse_upstream_url("unix:///run/weather.sock/mcp?debug=1") == (
+            "http://localhost/mcp?debug=1", "/run/weather.sock")
+
+    def test_explicit_http_path(self):
+        """Test http_path for sockets not named *.sock"""
+        assert parse_upstream_url("unix:///run/weather", "mcp") == ("http://localhost/mcp", "/run/weather")
+        assert parse_upstream_url("unix:///run/weather") == ("http://localhost/", "/run/weather")
+
+    def test_invalid(self):
+        """Test relative socket paths and http_path on TCP URLs are rejected"""
+        with pytest.raises(ValueError):
+            parse_upstream_url("unix://weather.sock")
+        with pytest.raises(ValueError):
+            parse_upstream_url("http://example.com", "/mcp")
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    # Unix socket paths are limited to about 100 bytes
+    path = tmp_path / "mock.sock"
+    if len(str(path)) > 100:
+        pytest.skip("temporary directory path too long for a Unix socket")
+    return str(path)
+
+
+class TestUnixSocketUpstream:
+    """Test cases for talking to an upstream over a Unix domain socket"""
+
+    def test_bridge_over_socket(self, socket_path, capsys):
+        """Test a bridge session against a mock server listening on a socket"""
+        mock = MockMCPServer()
+
+        async def scenario():
+            async with HTTPServer(mock.handle, unix_socket=socket_path) as server:
+                bridge = MCPHTTPBridge(f"{server.url}/mcp")
+                try:
+                    await bridge.dispatch({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}})
+                    await bridge.dispatch({"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                                           "params": {"name": "payload", "arguments": {"size": 100}}})
+                finally:
+                    await bridge.close()
+                return bridge
+
+        bridge = asyncio.run(scenario())
+        frames = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert bridge.session_id in mock.sessions
+        assert frames[1]["id"] == 2 and frames[1]["result"]["content"][0]["text"]
+
+    def test_bench_over_socket(self, socket_path):
+        """Test the load generator accepts unix:// URLs"""
+        mock = MockMCPServer()
+
+        async def scenario():
+            async with HTTPServer(mock.handle, unix_socket=socket_path) as server:
+                return await run_bench(f"{server.url}/mcp", requests=10, duration=None)
+
+        report = asyncio.run(scenario())
+        assert report["requests"] == 10 and report["errors"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -8,138 +8,19 @@ through the HTTP/SSE bridge.
 
 import json
 import asyncio
-import httpx
-from typing import Dict, Any
-
-
-class MCPClient:
-    """Simple MCP client that communicates via HTTP/SSE"""
-
-    def __init__(self, url: str, headers: Dict[str, str]):
-        self.url = url
-        self.headers = headers
-        self.session_id = None
-        self.client = httpx.AsyncClient(timeout=30.0)
-        self.request_id = 0
-
-    def _next_id(self) -> int:
-        """Get next request ID"""
-        self.request_id += 1
-        return self.request_id
-
-    async def _send_request(self, method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Send a JSON-RPC request and get response"""
-        request_id = self._next_id()
-
-        message = {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "method": method,
-            "params": params or {}
-        }
-
-        headers = {
-            **self.headers,
-            "Content-Type": "application/json",
-            "Accept": "text/event-stream, application/json"
-        }
-
-        if self.session_id and method != "initialize":
-            headers["mcp-session-id"] = self.session_id
-
-        print(f"📤 Sending: {method} (id={request_id})")
-
-        response = await self.client.post(
-            self.url,
-            json=message,
-            headers=headers
-        )
-        response.raise_for_status()
-
-        # Extract session ID from initialize response
-        if method == "initialize":
-            self.session_id = response.headers.get("mcp-session-id")
-            if self.session_id:
-                print(f"🔑 Session ID: {self.session_id}")
-
-        # Parse SSE or JSON response
-        content_type = response.headers.get("content-type", "")
-
-        if "text/event-stream" in content_type:
-            # Parse SSE format
-            lines = response.text.split('\n')
-            for line in lines:
-                if line.startswith("data: "):
-                    data = line[6:].strip()
-                    if data:
-                        result = json.loads(data)
-                        print(f"📥 Received: id={result.get('id')}")
-                        return result
-        else:
-            # Direct JSON response
-            return response.json()
-
-        raise ValueError("No valid response received")
-
-    async def initialize(self):
-        """Initialize the MCP connection"""
-        result = await self._send_request("initialize", {
-            "protocolVersion": "2024-11-05",
-            "capabilities": {},
-            "clientInfo": {"name": "test-client", "version": "1.0.0"}
-        })
+import sys
+import os
 
-        # Send initialized notification (required by protocol)
-        await self._send_notification("notifications/initialized")
-
-        return result
-
-    async def _send_notification(self, method: str, params: Dict[str, Any] = None):
-        """Send a notification (no response expected)"""
-        message = {
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params or {}
-        }
-
-        headers = {
-            **self.headers,
-            "Content-Type": "application/json",
-            "Accept": "text/event-stream, application/json"
-        }
-
-        if self.session_id:
-            headers["mcp-session-id"] = self.session_id
-
-        print(f"📤 Sending notification: {method}")
-
-        await self.client.post(
-            self.url,
-            json=message,
-            headers=headers
-        )
-
-    async def list_tools(self):
-        """List available tools"""
-        return await self._send_request("tools/list")
-
-    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]):
-        """Call a tool with arguments"""
-        return await self._send_request("tools/call", {
-            "name": tool_name,
-            "arguments": arguments
-        })
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-    async def close(self):
-        """Close the client connection"""
-        await self.client.aclose()
+from mcp_bridge.client import MCPSession
 
 
 async def main():
     """Test the weather MCP tools"""
 
     # Load config
-    import os
     from pathlib import Path
 
     config_path = Path.home() / ".config" / "mcp-bridge" / "weather.json"
@@ -152,9 +33,11 @@ async def main():
     print(f"🌐 Server URL: {config['url']}\n")
 
     # Create client
-    client = MCPClient(
-        url=config["url"],
-        headers=config.get("headers", {})
+    client = MCPSession(
+        config["url"],
+        headers=config.get("headers", {}),
+        http_path=config.get("http_path"),
+        client_info={"name": "test-client", "version": "1.0.0"}
     )
 
     try:
@@ -162,22 +45,17 @@ async def main():
         print("=" * 60)
         print("STEP 1: Initialize Connection")
         print("=" * 60)
-        init_response = await client.initialize()
-        print(f"✅ Server: {init_response['result']['serverInfo']['name']} "
-              f"v{init_response['result']['serverInfo']['version']}")
+        init_result = await client.initialize()
+        print(f"🔑 Session ID: {client.session_id}")
+        print(f"✅ Server: {init_result['serverInfo']['name']} "
+              f"v{init_result['serverInfo']['version']}")
         print()
 
         # List tools
         print("=" * 60)
         print("STEP 2: List Available Tools")
         print("=" * 60)
-        tools_response = await client.list_tools()
-
-        if 'error' in tools_response:
-            print(f"❌ Error from server: {tools_response['error']}")
-            tools = []
-        else:
-            tools = tools_response.get('result', {}).get('tools', [])
+        tools = await client.list_tools()
 
         print(f"Found {len(tools)} tools:\n")
         for tool in tools:
@@ -194,12 +72,12 @@ async def main():
         location = "Tallahassee"
         print(f"🌤️  Getting weather for: {location}\n")
 
-        weather_response = await client.call_tool("get_hourly_weather", {
+        weather_result = await client.call_tool("get_hourly_weather", {
             "location": location
         })
 
-        if "result" in weather_response:
-            weather_data = weather_response["result"]["content"][0]["text"]
+        if not weather_result.get("isError"):
+            weather_data = weather_result["content"][0]["text"]
             weather_json = json.loads(weather_data)
 
             print(f"📍 Location: {weather_json['location']}")
@@ -252,12 +130,12 @@ async def main():
         location = "Tokyo, Japan"
         print(f"📍 Geocoding: {location}\n")
 
-        geocode_response = await client.call_tool("geocode_location", {
+        geocode_result = await client.call_tool("geocode_location", {
             "location": location
         })
 
-        if "result" in geocode_response:
-            geocode_data = geocode_response["result"]["content"][0]["text"]
+        if not geocode_result.get("isError"):
+            geocode_data = geocode_result["content"][0]["text"]
             geocode_json = json.loads(geocode_data)
 
             print(f"  Location: {geocode_json.get('location', 'N/A')}")